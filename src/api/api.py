@@ -2,7 +2,7 @@
 ---------------------------------------------------------------------------------------------------
 Nom du script : api.py
 
-Dernière mise à jour : mercredi 12 février 2025
+Dernière mise à jour : samedi 17 octobre 2026
 
 Fonction de ce script : API pour la prédiction du temps de réponse des pompiers
 
@@ -20,26 +20,42 @@ Tâches réalisées par ce script :
 """
 
 import os
+import json
 import time
+import asyncio
 import logging
 from pathlib import Path
-from datetime import datetime, timedelta
-import pytz
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, status
+# Début de l'import de l'API (durée du démarrage rapportée dans les logs)
+IMPORT_START = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, status
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import numpy as np
 #from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
 #from jose import JWTError, jwt
 
-from src.api.models import PredictionRequest
+from src.api.models import PredictionRequest, CoordinatesPredictionRequest, BatchPredictionRequest
 # from src.api.security import (
 #     Token, User, authenticate_user, create_access_token,
 #     fake_users_db, ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM
 # )
-from src.ml.predict import predict
+from src.ml.predict import (predict_coordinates, predict_coordinates_batch, predict_candidates, predict_batch,
+                            prediction_cache)
+from src.api.batching import MicroBatcher, BATCHING_ENABLED
+from src.api.logs import setup_logging
+from src.ml.artifacts import registry
+from src.utils.geocoding import get_geocoder
+from src.utils.geo_utils import address_to_lat_long
+from src.utils.geo_arrays import bng_to_wgs84
+from src.ml.response_grid import GridManager
+from src.ml.bulk import score_file
+from src.ml.tiles import TileCache, tiles_for_bbox, MIN_ZOOM, MAX_ZOOM, MAX_TILES
+from src.utils.metrics import metrics, REQUESTS, REQUEST_SECONDS
 
 """"
 ---------------------------------------------------------------------------------------------------
@@ -51,54 +67,9 @@ STATIC_DIR = Path("src/api/static")
 LOG_DIR = Path("logs")
 LOG_FILE = LOG_DIR / "api.log"
 
-class ParisTimeFormatter(logging.Formatter):
-    """Formateur personnalisé pour les logs avec le fuseau horaire de Paris."""
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.tz = pytz.timezone('Europe/Paris')
-
-    def formatTime(self, record, datefmt=None):
-        """Surcharge de la méthode de formatage du temps pour utiliser le fuseau horaire de Paris."""
-        dt = datetime.fromtimestamp(record.created, self.tz)
-        if datefmt:
-            return dt.strftime(datefmt)
-        return dt.isoformat()
-
-def setup_logging():
-    """Configure et initialise le système de logging."""
-    # Création du dossier de logs s'il n'existe pas
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-
-    # Création du formateur avec le fuseau horaire de Paris
-    formatter = ParisTimeFormatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S %z'
-    )
-
-    # Configuration des handlers
-    file_handler = logging.FileHandler(LOG_FILE)
-    file_handler.setFormatter(formatter)
-    
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-
-    # Configuration de base du logging
-    logging.basicConfig(
-        level=logging.INFO,
-        handlers=[file_handler, console_handler]
-    )
-
-    # Obtention du logger
-    logger = logging.getLogger(__name__)
-
-    # Activation de la capture des warnings
-    logging.captureWarnings(True)
-
-    return logger
-
-# Initialisation du logger
-logger = setup_logging()
+# Initialisation de la journalisation asynchrone (JSON sur une ligne, écriture en arrière-plan)
+log_listener = setup_logging(LOG_FILE)
+logger = logging.getLogger(__name__)
 
 """"
 ---------------------------------------------------------------------------------------------------
@@ -112,29 +83,160 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Regroupement des requêtes /predict concurrentes en lots
+batcher = MicroBatcher(predict_coordinates_batch) if BATCHING_ENABLED else None
+
+# Grille précalculée des temps d'intervention (mode rapide)
+response_grid = GridManager()
+
+# Cache disque des tuiles de la carte de couverture
+tile_cache = TileCache()
+
+# Nombre d'incidents du lot de chauffe exécuté au démarrage (0 : pas de chauffe)
+WARMUP_ROWS = int(os.getenv('LFB_WARMUP_ROWS', '256'))
+
+# État de préparation de l'API (route /ready)
+readiness = {"ready": False, "error": None, "timings": {}}
+
+def cache_metrics():
+    """Expose les compteurs de succès / échecs des caches (lus dans leurs statistiques)."""
+    counts = []
+    if prediction_cache is not None:
+        prediction_stats = prediction_cache.stats()
+        counts.append(("prediction", prediction_stats["hits"], prediction_stats["misses"]))
+    counts.append(("response_grid", response_grid.hits, response_grid.misses))
+    counts.append(("tiles", tile_cache.hits, tile_cache.misses))
+
+    # Géocodage : cache à deux niveaux puis gazetteer (adresses résolues par méthode)
+    for name, geocoding_stats in get_geocoder().stats().items():
+        if not isinstance(geocoding_stats, dict) or "misses" not in geocoding_stats:
+            continue
+        if "memory_hits" in geocoding_stats:
+            hits = geocoding_stats["memory_hits"] + geocoding_stats["disk_hits"]
+        else:
+            hits = sum(value for key, value in geocoding_stats.items() if key != "misses")
+        counts.append((name, hits, geocoding_stats.get("misses", 0)))
+
+    return [
+        ("lfb_cache_hits_total", "counter", "Succès des caches",
+         [({"cache": cache}, hits) for cache, hits, _ in counts]),
+        ("lfb_cache_misses_total", "counter", "Échecs des caches",
+         [({"cache": cache}, misses) for cache, _, misses in counts])
+    ]
+
+metrics.add_collector(cache_metrics)
+
 """"
 ---------------------------------------------------------------------------------------------------
                             Routes de l'API
 ---------------------------------------------------------------------------------------------------
 """
 
+def warm_up(n_rows=WARMUP_ROWS):
+    """
+    Prépare l'API : chargement des artefacts, du géocodeur, puis lot de chauffe.
+
+    Le lot de chauffe parcourt le chemin complet de prédiction (recherche des stations, encodage,
+    inférence), sans passer par le cache des résultats, sur des incidents placés aux stations avec
+    toutes les catégories connues : les imports différés, les tampons et le modèle sont ainsi
+    initialisés avant la première requête. Un appel sur un seul incident complète la chauffe
+    (taille des lots du regroupement des requêtes).
+
+    Returns:
+        dict: Durées (secondes) de chaque étape
+    """
+    timings = {}
+
+    start_time = time.perf_counter()
+    # Chargement unique des artefacts et démarrage de la surveillance des fichiers
+    # (la grille du mode rapide suit la version des artefacts)
+    registry.add_listener(response_grid.on_artifacts)
+    registry.start()
+    get_geocoder()
+    timings["load_seconds"] = round(time.perf_counter() - start_time, 3)
+
+    start_time = time.perf_counter()
+    if n_rows > 0:
+        artifacts = registry.get()
+        stations = artifacts.stations
+        positions = np.arange(n_rows) % len(stations)
+        incident_groups = list(artifacts.encoders['IncidentGroup'])
+        property_categories = list(artifacts.encoders['PropertyCategory'])
+        predict_coordinates_batch(stations['StationLatitude'].to_numpy()[positions],
+                                  stations['StationLongitude'].to_numpy()[positions],
+                                  np.arange(n_rows) % 24,
+                                  [incident_groups[i % len(incident_groups)] for i in range(n_rows)],
+                                  [property_categories[i % len(property_categories)] for i in range(n_rows)],
+                                  artifacts=artifacts, use_cache=False)
+        predict_coordinates_batch(stations['StationLatitude'].iloc[0], stations['StationLongitude'].iloc[0],
+                                  10, incident_groups[0], property_categories[0],
+                                  artifacts=artifacts, use_cache=False)
+    timings["warmup_seconds"] = round(time.perf_counter() - start_time, 3)
+    return timings
+
+async def prepare():
+    """Tâche de fond du démarrage : chauffe de l'API, puis passage à l'état prêt."""
+    try:
+        timings = await run_in_threadpool(warm_up)
+    except Exception as e:
+        readiness["error"] = str(e)
+        logger.exception("Échec de la préparation de l'API", extra={"event": "startup"})
+        return
+
+    timings["startup_seconds"] = round(time.perf_counter() - IMPORT_START, 3)
+    readiness["timings"].update(timings)
+    readiness["ready"] = True
+    logger.info(f"API prête en {timings['startup_seconds']} secondes", extra={"event": "ready", **readiness["timings"]})
+
 @app.on_event("startup")
 async def startup_event():
     """Exécuté au démarrage de l'application."""
-    logger.info(
-        "\n" + "="*80 + "\n" +
-        "                    Démarrage de l'API London Fire Brigade Response Time\n" +
-        "="*80 + "\n"
-    )
+    readiness["timings"]["import_seconds"] = round(time.perf_counter() - IMPORT_START, 3)
+    logger.info("Démarrage de l'API London Fire Brigade Response Time",
+                extra={"event": "startup", "import_seconds": readiness["timings"]["import_seconds"]})
+
+    # Chargement des artefacts et chauffe en arrière-plan : /verify répond immédiatement,
+    # /ready une fois la chauffe terminée
+    app.state.prepare_task = asyncio.create_task(prepare())
+
+    # Démarrage du regroupement des requêtes
+    if batcher is not None:
+        await batcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Exécuté à l'arrêt de l'application."""
-    logger.info(
-        "\n" + "="*80 + "\n" +
-        "                    Arrêt de l'API London Fire Brigade Response Time\n" +
-        "="*80 + "\n\n"
-    )
+    if batcher is not None:
+        await batcher.stop()
+    registry.stop()
+
+    logger.info("Arrêt de l'API London Fire Brigade Response Time", extra={"event": "shutdown"})
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Compte les requêtes par route et par issue, et mesure leur durée de traitement."""
+    start_time = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        REQUESTS.inc(_route_of(request), "error")
+        raise
+
+    route = _route_of(request)
+    if response.status_code >= 500:
+        outcome = "error"
+    elif response.status_code >= 400:
+        outcome = "client_error"
+    else:
+        outcome = "success"
+    REQUESTS.inc(route, outcome)
+    REQUEST_SECONDS.observe(time.perf_counter() - start_time, route)
+    return response
+
+def _route_of(request):
+    """Retourne le gabarit de la route (par exemple /tiles/{z}/{x}/{y}.geojson) plutôt que le chemin."""
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
 
 # Montage des fichiers statiques
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
@@ -145,62 +247,358 @@ async def favicon():
     """Route pour servir le favicon."""
     return FileResponse(STATIC_DIR / 'favicon.ico')
 
+def fast_lookup(latitude, longitude, request):
+    """Répond à partir de la grille précalculée de la version courante (None si indisponible)."""
+    return response_grid.lookup(latitude, longitude,
+                                request.HourOfCall,
+                                request.IncidentGroup,
+                                request.PropertyCategory,
+                                version=registry.get().version)
+
 # Vérification
 @app.get('/verify')
 def verify():
     """Vérifie que l'API est fonctionnelle."""
-    logger.info("Vérification du statut de l'API")
+    logger.info("Vérification du statut de l'API", extra={"event": "verify", "sampled": True})
     return {"message": "L'API est fonctionnelle."}
 
+# Préparation (artefacts chargés et chauffe terminée)
+@app.get('/ready')
+def ready():
+    """Retourne 200 une fois les artefacts chargés et la chauffe terminée, 503 sinon."""
+    if not readiness["ready"]:
+        detail = ("Échec de la préparation : " + readiness["error"] if readiness["error"]
+                  else "API en cours de préparation")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+    return {"message": "L'API est prête.", "timings": readiness["timings"]}
+
+# Statistiques
+@app.get('/stats')
+def stats():
+    """Retourne les compteurs des caches et du regroupement des requêtes de l'API."""
+    return {
+        "geocoding": get_geocoder().stats(),
+        "batching": batcher.stats() if batcher is not None else None,
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None,
+        "response_grid": response_grid.stats(),
+        "tiles": tile_cache.stats()
+    }
+
+# Métriques (format Prometheus)
+@app.get('/metrics', response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Retourne les histogrammes des étapes de prédiction et les compteurs des requêtes et des caches."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Prédiction
 @app.post('/predict')
-def prediction(request: PredictionRequest):
+async def prediction(request: PredictionRequest, fast: bool = False):
     """
     Route pour la prédiction du temps de réponse.
+
+    Le géocodage est exécuté dans le pool de threads ; l'inférence est regroupée avec celle des
+    requêtes concurrentes (voir src/api/batching.py).
     
     Args:
         request (PredictionRequest): Données de la requête de prédiction
+        fast (bool): Réponse lue dans la grille précalculée lorsqu'elle est disponible
+            (ignoré si k_candidates est fourni)
         
     Returns:
         dict: Résultats de la prédiction
     """
     start_time = time.time()
     
-    # Log de la requête reçue
-    logger.info(
-        "\nNouvelle requête de prédiction reçue :\n"
-        f" - Adresse: {request.address}\n"
-        f" - Heure d'appel: {request.HourOfCall}\n"
-        f" - Type d'incident: {request.IncidentGroup}\n"
-        f" - Type de propriété: {request.PropertyCategory}\n"
-    )
-    
     try:
-        # Calcul de la prédiction
-        result = predict(
-            request.address,
-            request.HourOfCall,
-            request.IncidentGroup,
-            request.PropertyCategory
-        )
+        # Récupération de la latitude et de la longitude du lieu de l'incident
+        latitude, longitude = await run_in_threadpool(address_to_lat_long, request.address)
+
+        # Mode rapide : lecture dans la grille précalculée
+        result = fast_lookup(latitude, longitude, request) if fast and not request.k_candidates else None
+
+        # Calcul de la prédiction (si la grille n'a pas répondu)
+        if request.k_candidates:
+            result = await run_in_threadpool(
+                predict_candidates,
+                latitude,
+                longitude,
+                request.HourOfCall,
+                request.IncidentGroup,
+                request.PropertyCategory,
+                request.k_candidates
+            )
+        elif result is None and batcher is not None:
+            result = await batcher.submit(
+                latitude,
+                longitude,
+                request.HourOfCall,
+                request.IncidentGroup,
+                request.PropertyCategory
+            )
+        elif result is None:
+            result = await run_in_threadpool(
+                predict_coordinates,
+                request.HourOfCall,
+                request.IncidentGroup,
+                request.PropertyCategory,
+                latitude=latitude,
+                longitude=longitude
+            )
         
-        # Log du résultat
-        processing_time = time.time() - start_time
-        logger.info(
-            "\nPrédiction réussie :\n"
-            f" - Station: {result['station']}\n"
-            f" - Distance: {result['DistanceToStation']:.3f} m\n"
-            f" - Temps prédit: {result['prediction']:.1f} secondes\n"
-            f" - Temps de traitement: {processing_time:.3f} secondes\n\n"
-            + "-"*80  + "\n\n"
-        )
+        # Log du résultat (échantillonné)
+        logger.info("Prédiction réussie", extra={
+            "event": "predict",
+            "sampled": True,
+            "address": request.address,
+            "HourOfCall": request.HourOfCall,
+            "IncidentGroup": request.IncidentGroup,
+            "PropertyCategory": request.PropertyCategory,
+            "station": result['station'],
+            "distance_m": round(result['DistanceToStation'], 3),
+            "prediction_s": round(result['prediction'], 1),
+            "processing_time_s": round(time.time() - start_time, 4)
+        })
         
         return result
         
     except Exception as e:
         # Log de l'erreur
-        logger.error(f"Erreur lors de la prédiction : {str(e)}")
+        logger.error(f"Erreur lors de la prédiction : {str(e)}", extra={
+            "event": "predict",
+            "address": request.address,
+            "HourOfCall": request.HourOfCall,
+            "IncidentGroup": request.IncidentGroup,
+            "PropertyCategory": request.PropertyCategory
+        })
+        raise HTTPException(
+            status_code=500,
+            detail="Erreur lors du calcul de la prédiction"
+        )
+
+# Prédiction à partir de coordonnées
+@app.post('/predict/coordinates')
+def prediction_coordinates(request: CoordinatesPredictionRequest, fast: bool = False):
+    """
+    Route pour la prédiction du temps de réponse à partir des coordonnées de l'incident.
+
+    Aucun géocodage n'est effectué : les coordonnées WGS84 (ou BNG converties) sont
+    directement utilisées pour la recherche de la station et l'inférence.
+
+    Args:
+        request (CoordinatesPredictionRequest): Données de la requête de prédiction
+        fast (bool): Réponse lue dans la grille précalculée lorsqu'elle est disponible
+            (ignoré si k_candidates est fourni)
+
+    Returns:
+        dict: Résultats de la prédiction
+    """
+    start_time = time.time()
+
+    try:
+        latitude, longitude = request.latitude, request.longitude
+        if latitude is None:
+            latitude, longitude = bng_to_wgs84(request.easting, request.northing)
+
+        result = fast_lookup(latitude, longitude, request) if fast and not request.k_candidates else None
+        if request.k_candidates:
+            result = predict_candidates(latitude, longitude,
+                                        request.HourOfCall,
+                                        request.IncidentGroup,
+                                        request.PropertyCategory,
+                                        request.k_candidates)
+        elif result is None:
+            result = predict_coordinates(
+                request.HourOfCall,
+                request.IncidentGroup,
+                request.PropertyCategory,
+                latitude=latitude,
+                longitude=longitude
+            )
+    except Exception as e:
+        logger.error(f"Erreur lors de la prédiction : {str(e)}", extra={"event": "predict_coordinates"})
         raise HTTPException(
             status_code=500,
             detail="Erreur lors du calcul de la prédiction"
-        )
\ No newline at end of file
+        )
+
+    logger.info("Prédiction par coordonnées réussie", extra={
+        "event": "predict_coordinates",
+        "sampled": True,
+        "latitude": round(result['latitude'], 6),
+        "longitude": round(result['longitude'], 6),
+        "station": result['station'],
+        "prediction_s": round(result['prediction'], 1),
+        "processing_time_s": round(time.time() - start_time, 4)
+    })
+
+    return result
+
+# Prédiction par lot
+@app.post('/predict/batch')
+def prediction_batch(request: BatchPredictionRequest):
+    """
+    Route pour la prédiction du temps de réponse d'un lot d'incidents.
+
+    Les adresses distinctes sont géocodées une seule fois et le modèle est appelé une seule fois
+    pour l'ensemble du lot.
+
+    Args:
+        request (BatchPredictionRequest): Lot de requêtes de prédiction
+
+    Returns:
+        dict: Résultats dans l'ordre des requêtes, avec une erreur par requête en échec
+    """
+    start_time = time.time()
+
+    try:
+        results = predict_batch(request.items)
+    except Exception as e:
+        logger.error(f"Erreur lors de la prédiction par lot : {str(e)}",
+                     extra={"event": "predict_batch", "items": len(request.items)})
+        raise HTTPException(
+            status_code=500,
+            detail="Erreur lors du calcul des prédictions"
+        )
+
+    logger.info("Prédiction par lot terminée", extra={
+        "event": "predict_batch",
+        "sampled": True,
+        "items": len(results),
+        "errors": sum(1 for result in results if "error" in result),
+        "processing_time_s": round(time.time() - start_time, 4)
+    })
+
+    return {"results": results}
+
+# Prédiction en masse (fichier d'incidents)
+@app.post('/predict/bulk')
+def prediction_bulk(file: UploadFile = File(...), format: Optional[str] = None):
+    """
+    Route pour la prédiction du temps de réponse d'un fichier d'incidents (CSV ou NDJSON).
+
+    Le fichier suit le schéma des incidents de preprocess.py (HourOfCall, IncidentGroup,
+    PropertyCategory, Latitude / Longitude ou Easting_rounded / Northing_rounded). Il est lu par
+    blocs de taille fixe et les résultats sont renvoyés en NDJSON au fil des blocs : la mémoire
+    utilisée ne dépend pas de la taille du fichier.
+
+    Args:
+        file (UploadFile): Fichier d'incidents
+        format (str): 'csv' ou 'ndjson' (déduit de l'extension du fichier par défaut)
+
+    Returns:
+        StreamingResponse: Une ligne JSON par incident, dans l'ordre du fichier
+    """
+    if format is None:
+        format = 'ndjson' if (file.filename or '').lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+    if format not in ('csv', 'ndjson'):
+        raise HTTPException(status_code=400, detail="Format non pris en charge (csv ou ndjson)")
+
+    # Même version des artefacts pour tout le fichier
+    artifacts = registry.get()
+
+    def results():
+        start_time = time.time()
+        n_chunks = 0
+        try:
+            for lines in score_file(artifacts, file.file, format):
+                n_chunks += 1
+                yield lines
+        except Exception as e:
+            # Les blocs déjà envoyés restent valides : l'erreur est signalée par une dernière ligne
+            logger.error(f"Erreur lors de la prédiction en masse : {str(e)}",
+                         extra={"event": "predict_bulk", "upload": file.filename, "chunks": n_chunks})
+            yield json.dumps({"error": "Erreur lors du calcul des prédictions"}) + "\n"
+            return
+
+        logger.info("Prédiction en masse terminée", extra={
+            "event": "predict_bulk",
+            "upload": file.filename,
+            "chunks": n_chunks,
+            "processing_time_s": round(time.time() - start_time, 4)
+        })
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+def check_categories(artifacts, IncidentGroup, PropertyCategory):
+    """
+    Refuse (400) une catégorie absente des encodeurs : elle serait encodée 0, c'est-à-dire
+    calculée pour une autre catégorie.
+    """
+    for column, value in (("IncidentGroup", IncidentGroup), ("PropertyCategory", PropertyCategory)):
+        if value not in artifacts.encoders[column]:
+            raise HTTPException(status_code=400,
+                                detail=f"{column} inconnu : {value} (valeurs : {', '.join(artifacts.encoders[column])})")
+
+# Carte de couverture (tuile unique)
+@app.get('/tiles/{z}/{x}/{y}.geojson')
+def tile(z: int, x: int, y: int, HourOfCall: int, IncidentGroup: str, PropertyCategory: str):
+    """
+    Route retournant une tuile XYZ des temps d'intervention prédits au format GeoJSON.
+
+    Returns:
+        dict: FeatureCollection (un polygone par cellule de la tuile)
+    """
+    if not MIN_ZOOM <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z) or not 0 <= HourOfCall <= 23:
+        raise HTTPException(status_code=400, detail="Tuile ou heure d'appel invalide")
+
+    artifacts = registry.get()
+    check_categories(artifacts, IncidentGroup, PropertyCategory)
+
+    try:
+        return tile_cache.get(artifacts, z, x, y, HourOfCall, IncidentGroup, PropertyCategory)
+    except Exception as e:
+        logger.error(f"Erreur lors du calcul de la tuile : {str(e)}", extra={"event": "tile", "tile": f"{z}/{x}/{y}"})
+        raise HTTPException(
+            status_code=500,
+            detail="Erreur lors du calcul de la tuile"
+        )
+
+# Carte de couverture (emprise)
+@app.get('/heatmap')
+def heatmap(min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int,
+            HourOfCall: int, IncidentGroup: str, PropertyCategory: str):
+    """
+    Route retournant les temps d'intervention prédits sur une emprise au format GeoJSON.
+
+    L'emprise est découpée en tuiles XYZ au niveau de zoom demandé ; chaque tuile est calculée
+    en une passe (recherche des stations et inférence vectorisées) puis mise en cache sur disque.
+
+    Returns:
+        dict: FeatureCollection regroupant les cellules de toutes les tuiles
+    """
+    start_time = time.time()
+
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM or not 0 <= HourOfCall <= 23 or min_lat >= max_lat or min_lon >= max_lon:
+        raise HTTPException(status_code=400, detail="Emprise, zoom ou heure d'appel invalide")
+
+    tiles = tiles_for_bbox(min_lat, min_lon, max_lat, max_lon, zoom)
+    if len(tiles) > MAX_TILES:
+        raise HTTPException(status_code=400,
+                            detail=f"Emprise trop grande pour ce zoom ({len(tiles)} tuiles, maximum {MAX_TILES})")
+
+    # Même version des artefacts pour toutes les tuiles de la réponse
+    artifacts = registry.get()
+    check_categories(artifacts, IncidentGroup, PropertyCategory)
+
+    try:
+        features = []
+        for z, x, y in tiles:
+            features.extend(tile_cache.get(artifacts, z, x, y, HourOfCall, IncidentGroup, PropertyCategory)["features"])
+    except Exception as e:
+        logger.error(f"Erreur lors du calcul de la carte de couverture : {str(e)}",
+                     extra={"event": "heatmap", "zoom": zoom, "tiles": len(tiles)})
+        raise HTTPException(
+            status_code=500,
+            detail="Erreur lors du calcul de la carte de couverture"
+        )
+
+    logger.info("Carte de couverture calculée", extra={
+        "event": "heatmap",
+        "sampled": True,
+        "zoom": zoom,
+        "tiles": len(tiles),
+        "cells": len(features),
+        "processing_time_s": round(time.time() - start_time, 4)
+    })
+
+    return {"type": "FeatureCollection", "version": artifacts.version, "features": features}
@@ -0,0 +1,191 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : batching.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : regroupement des requêtes de prédiction concurrentes (micro-batching)
+
+Tâches réalisées par ce script :
+ - File d'attente des requêtes de prédiction déjà localisées
+ - Envoi immédiat lorsque aucun lot n'est en cours de calcul (pas d'attente à faible charge)
+ - Sinon, constitution de lots dans une fenêtre de temps ou jusqu'à une taille maximale
+ - Calcul des prédictions du lot en un seul appel vectorisé
+ - Restitution du résultat à chaque appelant
+ - Statistiques : taille des lots et délai d'attente en file
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Paramètres
+---------------------------------------------------------------------------------------------------
+"""
+
+# Activation du regroupement des requêtes /predict
+BATCHING_ENABLED = os.getenv('LFB_BATCHING', '1') == '1'
+
+# Taille maximale d'un lot
+BATCH_MAX_SIZE = int(os.getenv('LFB_BATCH_MAX_SIZE', '64'))
+
+# Fenêtre (en millisecondes) pendant laquelle les requêtes sont regroupées
+BATCH_WINDOW_MS = float(os.getenv('LFB_BATCH_WINDOW_MS', '5'))
+
+# Bornes des classes de l'histogramme des tailles de lot
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes concurrentes en lots traités par un seul appel de prédiction.
+
+    Lorsque aucun lot n'est en cours de calcul, les éléments déjà en file sont envoyés
+    immédiatement : une requête isolée n'attend pas. Sinon, le premier élément reçu ouvre une
+    fenêtre de `window_ms` millisecondes ; le lot est envoyé à l'expiration de la fenêtre ou dès
+    qu'il atteint `max_batch_size` éléments. La taille des lots suit ainsi la charge. Le calcul est
+    exécuté dans le pool de threads pour ne pas bloquer la boucle d'événements, et la collecte
+    du lot suivant se poursuit pendant ce temps.
+
+    Args:
+        predict_fn (callable): Fonction (latitudes, longitudes, HourOfCall, IncidentGroup,
+            PropertyCategory) -> liste de résultats dans l'ordre d'entrée
+        max_batch_size (int): Taille maximale d'un lot
+        window_ms (float): Durée de la fenêtre de regroupement
+    """
+
+    def __init__(self, predict_fn, max_batch_size=BATCH_MAX_SIZE, window_ms=BATCH_WINDOW_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._queue = None
+        self._task = None
+        self._pending = set()
+
+        # Statistiques
+        self.batches = 0
+        self.requests = 0
+        self.errors = 0
+        self.batch_sizes = {bound: 0 for bound in BATCH_SIZE_BUCKETS}
+        self.batch_sizes["+Inf"] = 0
+        self.queue_delays = deque(maxlen=4096)
+
+    async def start(self):
+        """Démarre la tâche de collecte des lots."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la collecte et attend la fin des lots en cours."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def submit(self, latitude, longitude, HourOfCall, IncidentGroup, PropertyCategory):
+        """
+        Ajoute une requête localisée à la file et attend son résultat.
+
+        Returns:
+            dict: Résultat de la prédiction
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((time.perf_counter(), future,
+                               (latitude, longitude, HourOfCall, IncidentGroup, PropertyCategory)))
+        return await future
+
+    async def _run(self):
+        """Boucle de collecte : constitue les lots et lance leur calcul."""
+        while True:
+            batch = [await self._queue.get()]
+
+            # Éléments déjà en file (sans attente)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Un lot est en cours de calcul : regroupement des éléments reçus dans la fenêtre
+            deadline = time.perf_counter() + self.window
+            while self._pending and len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._process(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _process(self, batch):
+        """Calcule les prédictions d'un lot et résout les futures des appelants."""
+        started = time.perf_counter()
+        self._record(batch, started)
+
+        columns = list(zip(*(item for _, _, item in batch)))
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(None, self.predict_fn, *columns)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Erreur lors du calcul d'un lot de {len(batch)} prédictions : {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, batch, started):
+        """Met à jour les statistiques de taille de lot et de délai d'attente."""
+        self.batches += 1
+        self.requests += len(batch)
+        bucket = next((bound for bound in BATCH_SIZE_BUCKETS if len(batch) <= bound), "+Inf")
+        self.batch_sizes[bucket] += 1
+        self.queue_delays.extend(started - enqueued for enqueued, _, _ in batch)
+
+    def stats(self):
+        """Retourne les statistiques de regroupement (tailles de lots, délais d'attente en ms)."""
+        delays = sorted(self.queue_delays)
+
+        def quantile(q):
+            return 1000 * delays[min(len(delays) - 1, int(q * len(delays)))] if delays else 0.0
+
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "errors": self.errors,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {f"le_{bound}": count for bound, count in self.batch_sizes.items()},
+            "queue_delay_ms": {
+                "mean": 1000 * sum(delays) / len(delays) if delays else 0.0,
+                "p50": quantile(0.50),
+                "p95": quantile(0.95),
+                "p99": quantile(0.99),
+                "max": 1000 * delays[-1] if delays else 0.0
+            },
+            "max_batch_size": self.max_batch_size,
+            "window_ms": 1000 * self.window
+        }
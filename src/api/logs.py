@@ -0,0 +1,179 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : logs.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : journalisation non bloquante de l'API
+
+Tâches réalisées par ce script :
+ - Enregistrements JSON sur une ligne (horodatage à l'heure de Paris, niveau, logger, message,
+   champs structurés passés par `extra`)
+ - File d'attente entre les threads des requêtes et un thread d'écriture (QueueHandler /
+   QueueListener) : une requête n'attend jamais le disque
+ - Échantillonnage des logs de succès (LFB_LOG_SUCCESS_SAMPLE_RATE)
+ - Rotation de logs/api.log par taille ou par période (LFB_LOG_ROTATION)
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import queue
+import random
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime
+
+import pytz
+
+# Proportion des logs de succès conservés (1 : tous, 0 : aucun)
+SUCCESS_SAMPLE_RATE = float(os.getenv('LFB_LOG_SUCCESS_SAMPLE_RATE', '1.0'))
+
+# Rotation du fichier de logs : 'size' (taille maximale) ou 'time' (période, à minuit par défaut)
+LOG_ROTATION = os.getenv('LFB_LOG_ROTATION', 'size')
+LOG_MAX_MB = float(os.getenv('LFB_LOG_MAX_MB', '10'))
+LOG_ROTATE_WHEN = os.getenv('LFB_LOG_ROTATE_WHEN', 'midnight')
+LOG_BACKUP_COUNT = int(os.getenv('LFB_LOG_BACKUP_COUNT', '7'))
+
+# Attributs standards d'un LogRecord (les autres viennent de `extra`)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Formateurs et filtres
+---------------------------------------------------------------------------------------------------
+"""
+
+class ParisTimeFormatter(logging.Formatter):
+    """Formateur personnalisé pour les logs avec le fuseau horaire de Paris."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tz = pytz.timezone('Europe/Paris')
+
+    def formatTime(self, record, datefmt=None):
+        """Surcharge de la méthode de formatage du temps pour utiliser le fuseau horaire de Paris."""
+        dt = datetime.fromtimestamp(record.created, self.tz)
+        if datefmt:
+            return dt.strftime(datefmt)
+        return dt.isoformat()
+
+
+class JsonFormatter(ParisTimeFormatter):
+    """Formate un enregistrement en un objet JSON sur une ligne (champs `extra` inclus)."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key != 'sampled':
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SuccessSampler(logging.Filter):
+    """
+    Ne conserve qu'une proportion des enregistrements marqués `sampled` (logs de succès).
+
+    Le filtre est appliqué avant la mise en file d'attente : les enregistrements écartés ne
+    coûtent rien au thread d'écriture.
+    """
+
+    def __init__(self, rate=SUCCESS_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, 'sampled', False):
+            return self.rate >= 1 or random.random() < self.rate
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui transmet les champs `extra` au formateur JSON du thread d'écriture."""
+
+    def prepare(self, record):
+        # Le message et l'éventuelle exception sont figés dans le thread appelant (ils peuvent
+        # référencer des objets modifiés ensuite) ; le reste de la mise en forme est différé.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Configuration
+---------------------------------------------------------------------------------------------------
+"""
+
+def _file_handler(log_file):
+    """Crée le handler du fichier de logs avec la rotation configurée."""
+    if LOG_ROTATION == 'time':
+        return logging.handlers.TimedRotatingFileHandler(log_file, when=LOG_ROTATE_WHEN,
+                                                         backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    return logging.handlers.RotatingFileHandler(log_file, maxBytes=int(LOG_MAX_MB * 2**20),
+                                                backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+
+
+def setup_logging(log_file, level=logging.INFO):
+    """
+    Configure la journalisation asynchrone du processus.
+
+    Les handlers du logger racine sont remplacés par un QueueHandler ; le fichier (avec rotation)
+    et la console sont alimentés par un QueueListener dans un thread dédié, arrêté à la sortie
+    du processus (les enregistrements en attente sont alors écrits).
+
+    Args:
+        log_file (Path): Fichier de logs
+        level (int): Niveau minimal des enregistrements
+
+    Returns:
+        logging.handlers.QueueListener: Thread d'écriture (déjà démarré)
+    """
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    formatter = JsonFormatter()
+    file_handler = _file_handler(log_file)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SuccessSampler())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                              respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # Activation de la capture des warnings
+    logging.captureWarnings(True)
+
+    return listener
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
 
 class PredictionRequest(BaseModel):
     """Modèle de données pour les requêtes de prédiction."""
@@ -27,4 +29,150 @@ class PredictionRequest(BaseModel):
         ...,
         description="Type de propriété",
         example="Dwelling"
-    )
\ No newline at end of file
+    )
+
+    k_candidates: Optional[int] = Field(
+        None,
+        ge=1,
+        le=10,
+        description="Nombre de stations candidates (les plus proches) évaluées ; la réponse "
+                    "retourne la plus rapide et la liste classée des candidates",
+        example=3
+    )
+
+class CoordinatesPredictionRequest(BaseModel):
+    """Modèle de données pour les requêtes de prédiction à partir de coordonnées (sans géocodage)."""
+
+    latitude: Optional[float] = Field(
+        None,
+        ge=-90,
+        le=90,
+        description="Latitude de l'incident (WGS84)",
+        example=51.5007042
+    )
+
+    longitude: Optional[float] = Field(
+        None,
+        ge=-180,
+        le=180,
+        description="Longitude de l'incident (WGS84)",
+        example=-0.1245721
+    )
+
+    easting: Optional[float] = Field(
+        None,
+        description="Easting de l'incident (British National Grid, EPSG:27700)",
+        example=530050
+    )
+
+    northing: Optional[float] = Field(
+        None,
+        description="Northing de l'incident (British National Grid, EPSG:27700)",
+        example=179650
+    )
+
+    HourOfCall: int = Field(
+        ...,
+        ge=0,
+        le=23,
+        description="Heure de l'appel (0-23)",
+        example=10
+    )
+
+    IncidentGroup: str = Field(
+        ...,
+        description="Type d'incident",
+        example="Fire"
+    )
+
+    PropertyCategory: str = Field(
+        ...,
+        description="Type de propriété",
+        example="Dwelling"
+    )
+
+    k_candidates: Optional[int] = Field(
+        None,
+        ge=1,
+        le=10,
+        description="Nombre de stations candidates (les plus proches) évaluées ; la réponse "
+                    "retourne la plus rapide et la liste classée des candidates",
+        example=3
+    )
+
+    @model_validator(mode='after')
+    def check_coordinates(self):
+        """Vérifie qu'exactement un couple de coordonnées (WGS84 ou BNG) est fourni."""
+        wgs84 = (self.latitude is not None, self.longitude is not None)
+        bng = (self.easting is not None, self.northing is not None)
+        if len(set(wgs84)) > 1 or len(set(bng)) > 1:
+            raise ValueError("les coordonnées doivent être fournies par couple")
+        if all(wgs84) == all(bng):
+            raise ValueError("fournir soit (latitude, longitude), soit (easting, northing)")
+        return self
+
+
+class BatchPredictionItem(BaseModel):
+    """Requête de prédiction au sein d'un lot, avec coordonnées éventuellement déjà connues."""
+
+    address: Optional[str] = Field(
+        None,
+        description="Adresse de l'incident (inutile si latitude et longitude sont fournies)",
+        example="Big Ben, London"
+    )
+
+    latitude: Optional[float] = Field(
+        None,
+        ge=-90,
+        le=90,
+        description="Latitude de l'incident (WGS84)",
+        example=51.5007042
+    )
+
+    longitude: Optional[float] = Field(
+        None,
+        ge=-180,
+        le=180,
+        description="Longitude de l'incident (WGS84)",
+        example=-0.1245721
+    )
+
+    HourOfCall: int = Field(
+        ...,
+        ge=0,
+        le=23,
+        description="Heure de l'appel (0-23)",
+        example=10
+    )
+
+    IncidentGroup: str = Field(
+        ...,
+        description="Type d'incident",
+        example="Fire"
+    )
+
+    PropertyCategory: str = Field(
+        ...,
+        description="Type de propriété",
+        example="Dwelling"
+    )
+
+    @model_validator(mode='after')
+    def check_location(self):
+        """Vérifie qu'une adresse ou un couple (latitude, longitude) est fourni."""
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude et longitude doivent être fournies ensemble")
+        if self.latitude is None and not self.address:
+            raise ValueError("une adresse ou un couple (latitude, longitude) est requis")
+        return self
+
+
+class BatchPredictionRequest(BaseModel):
+    """Modèle de données pour les requêtes de prédiction par lot."""
+
+    items: List[BatchPredictionItem] = Field(
+        ...,
+        min_length=1,
+        max_length=10000,
+        description="Requêtes de prédiction"
+    )
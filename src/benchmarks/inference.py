@@ -0,0 +1,71 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : inference.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : comparaison des moteurs d'inférence (xgboost et évaluateur NumPy)
+
+Tâches réalisées par ce script :
+ - Mesure du temps de chargement de chaque moteur
+ - Mesure du temps de prédiction pour plusieurs tailles de lot
+ - Affichage du temps médian par appel et par incident
+
+Utilisation :
+
+    python -m src.benchmarks.inference --sizes 1 64 4096 --repeat 50
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import time
+import argparse
+import statistics
+
+from src.ml.artifacts import get_artifacts, load_model, MODEL_PATH
+from src.benchmarks.parity import synthetic_incidents
+
+
+def time_calls(fn, repeat):
+    """Retourne le temps médian (en secondes) d'un appel à fn."""
+    fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comparaison des moteurs d'inférence")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 64, 4096], help="Tailles de lot")
+    parser.add_argument('--repeat', type=int, default=50, help="Nombre de répétitions par mesure")
+    args = parser.parse_args(argv)
+
+    artifacts = get_artifacts()
+    incidents = synthetic_incidents(artifacts, max(args.sizes))
+    X = artifacts.features.build(**incidents).copy()
+
+    models = {}
+    for backend in ('xgboost', 'numpy'):
+        start = time.perf_counter()
+        models[backend] = load_model(MODEL_PATH, backend)
+        print(f"Chargement {backend:<8}: {1000 * (time.perf_counter() - start):8.1f} ms")
+
+    print("")
+    print(f"{'lot':>6} | {'moteur':<8} | {'ms / appel':>10} | {'µs / incident':>13}")
+    for size in args.sizes:
+        batch = X[:size]
+        for backend, model in models.items():
+            duration = time_calls(lambda: model.predict(batch), args.repeat)
+            print(f"{size:>6} | {backend:<8} | {1000 * duration:>10.3f} | {1e6 * duration / size:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
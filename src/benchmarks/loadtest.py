@@ -0,0 +1,341 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : loadtest.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : test de charge reproductible de l'API
+
+Tâches réalisées par ce script :
+ - Démarrage de src.api.api:app (uvicorn) avec un géocodeur local (aucun accès réseau)
+ - Génération d'un mélange réaliste de requêtes (adresses, heures, types d'incident et de
+   propriété, routes), à graine fixe
+ - Paliers de charge (concurrence, débit cible), en boucle ouverte ou fermée
+ - Rapport JSON : latences p50 / p95 / p99, taux d'erreur et débit par palier et par route,
+   avec le commit testé (comparaison entre commits)
+
+Utilisation :
+
+    python -m src.benchmarks.loadtest --stages 8:50 32:200 64:0 --duration 30 --output loadtest.json
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+# Lieux connus de Londres (adresse, latitude, longitude)
+LANDMARKS = [
+    ("Big Ben, London", 51.5007042, -0.1245721),
+    ("Tower Bridge, London", 51.5054564, -0.0753565),
+    ("British Museum, London", 51.5194133, -0.1269566),
+    ("King's Cross Station, London", 51.5316396, -0.1239759),
+    ("Wembley Stadium, London", 51.5560208, -0.2795188),
+    ("Heathrow Airport, London", 51.4679914, -0.4550650),
+    ("O2 Arena, London", 51.5030119, 0.0031776),
+    ("Canary Wharf, London", 51.5054306, -0.0235333),
+    ("Buckingham Palace, London", 51.5013673, -0.1418864),
+    ("Royal Observatory Greenwich, London", 51.4769, -0.0005),
+    ("Kew Gardens, London", 51.4787438, -0.2955578),
+    ("Croydon, London", 51.3713049, -0.1013530),
+    ("Stratford, London", 51.5423045, -0.0026000),
+    ("Brixton, London", 51.4613416, -0.1156520),
+    ("Ealing Broadway, London", 51.5149, -0.3017),
+    ("Romford, London", 51.5750, 0.1829),
+    ("Enfield Town, London", 51.6523, -0.0807),
+    ("Kingston upon Thames, London", 51.4123, -0.3007),
+    ("Bromley, London", 51.4039, 0.0198),
+    ("Harrow on the Hill, London", 51.5793, -0.3366),
+]
+
+# Emprise des adresses synthétiques (Grand Londres)
+BOUNDS = (51.30, -0.50, 51.68, 0.30)
+
+# Répartition approximative des incidents de la LFB
+INCIDENT_GROUPS = {"False Alarm": 0.48, "Special Service": 0.32, "Fire": 0.20}
+PROPERTY_CATEGORIES = {"Dwelling": 0.45, "Outdoor": 0.15, "Non Residential": 0.15, "Road Vehicle": 0.10,
+                       "Outdoor Structure": 0.08, "Other Residential": 0.05, "Rail Vehicle": 0.02}
+
+# Profil horaire des appels (plus d'appels en journée et en soirée)
+HOUR_WEIGHTS = [2, 2, 1.5, 1, 1, 1, 1.5, 2.5, 3, 3.5, 4, 4, 4.5, 4.5, 4.5, 5, 5, 5.5, 5.5, 5, 4.5, 4, 3.5, 2.5]
+
+# Répartition par défaut entre les routes
+DEFAULT_MIX = "predict=0.8,coordinates=0.15,fast=0.05"
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Génération des requêtes
+---------------------------------------------------------------------------------------------------
+"""
+
+def make_locations(n_addresses, seed):
+    """Retourne les lieux des requêtes : lieux connus puis adresses synthétiques."""
+    rng = random.Random(seed)
+    locations = list(LANDMARKS)
+    lat_min, lon_min, lat_max, lon_max = BOUNDS
+    for i in range(max(0, n_addresses - len(locations))):
+        locations.append((f"{i + 1} Load Test Road, London",
+                          round(rng.uniform(lat_min, lat_max), 6),
+                          round(rng.uniform(lon_min, lon_max), 6)))
+    return locations[:max(n_addresses, 1)]
+
+
+def parse_mix(mix):
+    """Convertit 'predict=0.8,coordinates=0.2' en {route: poids}."""
+    weights = {}
+    for part in mix.split(','):
+        name, weight = part.split('=')
+        if name not in ('predict', 'coordinates', 'fast'):
+            raise ValueError(f"Route inconnue dans le mélange : {name}")
+        weights[name] = float(weight)
+    return weights
+
+
+def make_requests(locations, mix, n_requests, seed):
+    """
+    Génère la liste des requêtes (route, URL relative, corps JSON), reproductible pour une graine.
+    """
+    rng = random.Random(seed)
+    routes = list(mix)
+    route_weights = [mix[route] for route in routes]
+
+    requests = []
+    for _ in range(n_requests):
+        route = rng.choices(routes, route_weights)[0]
+        address, latitude, longitude = rng.choice(locations)
+        payload = {
+            "HourOfCall": rng.choices(range(24), HOUR_WEIGHTS)[0],
+            "IncidentGroup": rng.choices(list(INCIDENT_GROUPS), list(INCIDENT_GROUPS.values()))[0],
+            "PropertyCategory": rng.choices(list(PROPERTY_CATEGORIES), list(PROPERTY_CATEGORIES.values()))[0]
+        }
+        if route == 'coordinates':
+            requests.append((route, "/predict/coordinates", dict(payload, latitude=latitude, longitude=longitude)))
+        else:
+            url = "/predict?fast=true" if route == 'fast' else "/predict"
+            requests.append((route, url, dict(payload, address=address)))
+    return requests
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Serveur
+---------------------------------------------------------------------------------------------------
+"""
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(locations, workers, workdir, autobuild_grid):
+    """
+    Démarre l'API avec le géocodeur 'static' alimenté par la table des lieux du test.
+
+    Le cache de géocodage est placé dans un dossier temporaire pour que chaque exécution parte
+    du même état.
+
+    Returns:
+        tuple: (processus, URL de base)
+    """
+    table = Path(workdir) / 'locations.json'
+    with open(table, 'w') as f:
+        json.dump({address: [latitude, longitude] for address, latitude, longitude in locations}, f)
+
+    port = _free_port()
+    env = dict(os.environ,
+               LFB_GEOCODER='static',
+               LFB_STATIC_GEOCODER_PATH=str(table),
+               LFB_GAZETTEER_PATH=str(Path(workdir) / 'no_gazetteer.csv'),
+               LFB_GEOCODING_CACHE_PATH=str(Path(workdir) / 'geocoding_cache.sqlite'),
+               LFB_GRID_AUTOBUILD='1' if autobuild_grid else '0')
+    process = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'src.api.api:app',
+                                '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+                                '--log-level', 'warning'],
+                               env=env, stdout=subprocess.DEVNULL,
+                               stderr=open(Path(workdir) / 'server.log', 'w'))
+    return process, f"http://127.0.0.1:{port}"
+
+
+def wait_ready(base_url, timeout=60):
+    """Attend que l'API réponde sur /ready (artefacts chargés et chauffe terminée)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"L'API ne répond pas après {timeout} secondes")
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Exécution d'un palier
+---------------------------------------------------------------------------------------------------
+"""
+
+async def run_stage(base_url, requests, concurrency, target_rps, duration):
+    """
+    Exécute un palier de charge.
+
+    Avec un débit cible (boucle ouverte), la requête i est planifiée à t0 + i / débit et sa
+    latence est mesurée depuis l'instant planifié : l'attente d'une connexion libre, lorsque la
+    concurrence maximale est atteinte, est donc comptée (pas d'omission coordonnée). Sans débit
+    cible (0), `concurrency` clients envoient leurs requêtes en boucle fermée.
+
+    Returns:
+        list: (route, latence en secondes, succès) par requête
+    """
+    samples = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def send(request, scheduled):
+            route, url, payload = request
+            try:
+                response = await client.post(url, json=payload)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            samples.append((route, time.perf_counter() - scheduled, ok))
+
+        start = time.perf_counter()
+        end = start + duration
+
+        if target_rps > 0:
+            semaphore = asyncio.Semaphore(concurrency)
+            tasks = []
+
+            async def limited(request, scheduled):
+                async with semaphore:
+                    await send(request, scheduled)
+
+            for i in range(int(duration * target_rps)):
+                scheduled = start + i / target_rps
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                tasks.append(asyncio.create_task(limited(requests[i % len(requests)], scheduled)))
+            await asyncio.gather(*tasks)
+        else:
+            counter = iter(range(sys.maxsize))
+
+            async def worker():
+                while time.perf_counter() < end:
+                    await send(requests[next(counter) % len(requests)], time.perf_counter())
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        elapsed = time.perf_counter() - start
+
+    return samples, elapsed
+
+
+def summarize(samples, elapsed):
+    """Calcule les latences (ms), le taux d'erreur et le débit d'un ensemble de requêtes."""
+    if not samples:
+        return {"requests": 0}
+    latencies = 1000 * np.array([latency for _, latency, _ in samples])
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 3),
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p95": round(float(np.percentile(latencies, 95)), 3),
+            "p99": round(float(np.percentile(latencies, 99)), 3),
+            "max": round(float(latencies.max()), 3)
+        }
+    }
+
+
+def _commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge de l'API")
+    parser.add_argument('--stages', nargs='+', default=['8:50', '32:200', '64:0'],
+                        help="Paliers concurrence:débit cible (requêtes/s, 0 = boucle fermée)")
+    parser.add_argument('--duration', type=float, default=30, help="Durée de chaque palier (secondes)")
+    parser.add_argument('--warmup', type=float, default=5, help="Durée du préchauffage (secondes)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Répartition entre les routes predict, coordinates, fast")
+    parser.add_argument('--addresses', type=int, default=500, help="Nombre d'adresses distinctes")
+    parser.add_argument('--seed', type=int, default=0, help="Graine de génération des requêtes")
+    parser.add_argument('--workers', type=int, default=1, help="Nombre de workers uvicorn")
+    parser.add_argument('--url', default=None, help="URL d'une API déjà démarrée (pas de démarrage local)")
+    parser.add_argument('--output', default='loadtest.json', help="Rapport JSON")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    locations = make_locations(args.addresses, args.seed)
+    requests = make_requests(locations, mix, 100_000, args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        process = None
+        base_url = args.url
+        if base_url is None:
+            process, base_url = start_server(locations, args.workers, workdir, autobuild_grid='fast' in mix)
+        try:
+            wait_ready(base_url)
+
+            # Préchauffage (chargement paresseux, caches) : non mesuré
+            if args.warmup > 0:
+                asyncio.run(run_stage(base_url, requests, 8, 0, args.warmup))
+
+            stages = []
+            for stage in args.stages:
+                concurrency, target_rps = (int(value) for value in stage.split(':'))
+                samples, elapsed = asyncio.run(run_stage(base_url, requests, concurrency, target_rps, args.duration))
+                result = {"concurrency": concurrency, "target_rps": target_rps, **summarize(samples, elapsed)}
+                result["routes"] = {route: summarize([s for s in samples if s[0] == route], elapsed)
+                                    for route in mix}
+                stages.append(result)
+                print(f"concurrence {concurrency:>4}, débit cible {target_rps:>5} : "
+                      f"{result['throughput_rps']:>8.1f} req/s, "
+                      f"p50 {result['latency_ms']['p50']:.1f} ms, p95 {result['latency_ms']['p95']:.1f} ms, "
+                      f"p99 {result['latency_ms']['p99']:.1f} ms, erreurs {100 * result['error_rate']:.2f} %")
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    report = {
+        "commit": _commit(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key != 'output'},
+        "stages": stages
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Rapport : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : micro.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : micro-benchmarks des fonctions critiques (prédiction et preprocessing)
+
+Tâches réalisées par ce script :
+ - Jeux de données synthétiques de taille réaliste (≈ 100 stations, 1 à 10 millions d'incidents)
+ - Mesure de : haversine (scalaire et vectorisée), conversion BNG > WGS84, recherche de la
+   station la plus proche, encodage des catégories, construction des variables, construction
+   de la DMatrix, Booster.predict, inplace_predict, évaluateur NumPy, et appels apply ligne à
+   ligne de preprocess.py
+ - Sauvegarde des résultats comme référence (baselines) et comparaison à la référence :
+   échec (code de sortie 1) si un benchmark régresse au-delà d'un seuil
+ - Comparaison refusée (code de sortie 2) si la référence a été mesurée avec d'autres tailles
+   (--rows, --apply-rows) ou sur une autre architecture : les temps par ligne ne sont pas
+   comparables
+
+Utilisation :
+
+    python -m src.benchmarks.micro --rows 1000000 --save            # crée la référence
+    python -m src.benchmarks.micro --rows 1000000 --threshold 0.10  # compare à la référence
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+
+import numpy as np
+import pandas as pd
+
+from src.ml.artifacts import load_encoders, MODEL_PATH, ENCODERS_PATH
+from src.ml.features import FeatureBuilder, FEATURE_COLUMNS
+from src.ml.trees import TreeEnsemble
+from src.utils.geo_arrays import haversine, bng_to_wgs84, _bng_transformer
+from src.utils.station_index import StationIndex
+
+# Fichier de référence par défaut
+BASELINE_PATH = './src/benchmarks/baselines.json'
+
+# Emprise du Grand Londres (degrés) et coordonnées BNG correspondantes (mètres)
+BOUNDS = (51.28, -0.52, 51.70, 0.34)
+BNG_BOUNDS = (503000, 155000, 562000, 201000)
+
+N_STATIONS = 102
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Données synthétiques
+---------------------------------------------------------------------------------------------------
+"""
+
+def synthetic_stations(encoders, n_stations=N_STATIONS, seed=0):
+    """Stations réparties sur Londres, nommées d'après le vocabulaire des encodeurs."""
+    rng = np.random.default_rng(seed)
+    names = list(encoders['DeployedFromStation_Name'])[:n_stations]
+    boroughs = list(encoders['IncGeo_BoroughName'])
+    lat_min, lon_min, lat_max, lon_max = BOUNDS
+    return pd.DataFrame({
+        'Station': names,
+        'StationBorough': [boroughs[i % len(boroughs)] for i in range(len(names))],
+        'StationLatitude': rng.uniform(lat_min, lat_max, len(names)),
+        'StationLongitude': rng.uniform(lon_min, lon_max, len(names))
+    })
+
+
+def synthetic_incidents(encoders, n_rows, seed=0):
+    """Incidents aléatoires : coordonnées BNG et WGS84, heure, catégories."""
+    rng = np.random.default_rng(seed)
+    e_min, n_min, e_max, n_max = BNG_BOUNDS
+    lat_min, lon_min, lat_max, lon_max = BOUNDS
+    return {
+        'easting': rng.integers(e_min, e_max, n_rows).astype(np.float64),
+        'northing': rng.integers(n_min, n_max, n_rows).astype(np.float64),
+        'latitudes': rng.uniform(lat_min, lat_max, n_rows),
+        'longitudes': rng.uniform(lon_min, lon_max, n_rows),
+        'HourOfCall': rng.integers(0, 24, n_rows),
+        'IncidentGroup': rng.choice(list(encoders['IncidentGroup']), n_rows),
+        'PropertyCategory': rng.choice(list(encoders['PropertyCategory']), n_rows)
+    }
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Benchmarks
+---------------------------------------------------------------------------------------------------
+"""
+
+def build_benchmarks(n_rows, apply_rows, seed=0):
+    """
+    Prépare les benchmarks sur les données synthétiques.
+
+    Returns:
+        dict: {nom: (fonction, nombre de lignes traitées par appel[, préparation])} ; si une
+        fonction de préparation est fournie, elle est appelée avant chaque mesure (hors temps
+        mesuré) et son résultat est passé à la fonction mesurée
+    """
+    import xgboost as xgb
+
+    encoders = load_encoders(ENCODERS_PATH)
+    stations = synthetic_stations(encoders, seed=seed)
+    incidents = synthetic_incidents(encoders, n_rows, seed=seed)
+    index = StationIndex.from_stations(stations)
+    features = FeatureBuilder(encoders, stations)
+
+    lats, lons = incidents['latitudes'], incidents['longitudes']
+    positions, distances = index.query(lats, lons, k=1)
+    positions, distances = positions[:, 0], distances[:, 0]
+    X = features.build(incidents['HourOfCall'], incidents['IncidentGroup'], incidents['PropertyCategory'],
+                       lats, lons, positions, distances).copy()
+
+    booster = xgb.Booster()
+    booster.load_model(MODEL_PATH)
+    ensemble = TreeEnsemble.from_xgboost_json(MODEL_PATH)
+
+    # Tableaux des appels apply de preprocess.py (ligne à ligne)
+    station_lats = stations['StationLatitude'].to_numpy()[positions]
+    station_lons = stations['StationLongitude'].to_numpy()[positions]
+    df_apply = pd.DataFrame({
+        'Easting_rounded': incidents['easting'][:apply_rows],
+        'Northing_rounded': incidents['northing'][:apply_rows],
+        'IncidentLatitude': lats[:apply_rows],
+        'IncidentLongitude': lons[:apply_rows],
+        'StationLatitude': station_lats[:apply_rows],
+        'StationLongitude': station_lons[:apply_rows]
+    })
+    transformer = _bng_transformer()
+    scalar_rows = min(apply_rows, 10_000)
+
+    def haversine_scalar():
+        for i in range(scalar_rows):
+            haversine(lats[i], lons[i], station_lats[i], station_lons[i])
+
+    return {
+        'haversine_scalar': (haversine_scalar, scalar_rows),
+        'haversine_vectorized': (lambda: haversine(lats, lons, station_lats, station_lons), n_rows),
+        'haversine_vectorized_float32': (lambda: haversine(lats, lons, station_lats, station_lons,
+                                                           dtype=np.float32), n_rows),
+        'bng_to_wgs84_vectorized': (lambda: bng_to_wgs84(incidents['easting'], incidents['northing']), n_rows),
+        'station_search': (lambda: index.query(lats, lons, k=1), n_rows),
+        'encoder_lookup': (lambda: features.encode('IncidentGroup', incidents['IncidentGroup']), n_rows),
+        'feature_build': (lambda: features.build(incidents['HourOfCall'], incidents['IncidentGroup'],
+                                                 incidents['PropertyCategory'], lats, lons,
+                                                 positions, distances), n_rows),
+        'dmatrix_construction': (lambda: xgb.DMatrix(X, feature_names=FEATURE_COLUMNS), n_rows),
+        # DMatrix neuve à chaque mesure : XGBoost met en cache les prédictions d'une DMatrix déjà vue
+        'booster_predict': (lambda dmatrix: booster.predict(dmatrix), n_rows,
+                            lambda: xgb.DMatrix(X, feature_names=FEATURE_COLUMNS)),
+        'booster_inplace_predict': (lambda: booster.inplace_predict(X, validate_features=False), n_rows),
+        'numpy_trees_predict': (lambda: ensemble.predict(X), n_rows),
+        'preprocess_apply_bng': (lambda: df_apply.apply(
+            lambda row: transformer.transform(row['Easting_rounded'], row['Northing_rounded']),
+            axis=1), apply_rows),
+        'preprocess_apply_haversine': (lambda: df_apply.apply(
+            lambda row: haversine(row['IncidentLatitude'], row['IncidentLongitude'],
+                                  row['StationLatitude'], row['StationLongitude']),
+            axis=1), apply_rows),
+    }
+
+
+def run(benchmarks, repeat, only=None):
+    """
+    Mesure chaque benchmark (temps médian sur `repeat` appels, après un appel de chauffe).
+
+    Returns:
+        dict: {nom: {"rows", "seconds", "ns_per_row"}}
+    """
+    results = {}
+    for name, (fn, rows, *setup) in benchmarks.items():
+        if only and name not in only:
+            continue
+        durations = []
+        for i in range(repeat + 1):
+            args = (setup[0](),) if setup else ()
+            start = time.perf_counter()
+            fn(*args)
+            if i > 0:
+                durations.append(time.perf_counter() - start)
+        seconds = statistics.median(durations)
+        results[name] = {"rows": rows, "seconds": round(seconds, 6), "ns_per_row": round(1e9 * seconds / rows, 2)}
+        print(f"{name:<28} {rows:>10} lignes {1000 * seconds:>10.2f} ms {1e9 * seconds / rows:>12.1f} ns/ligne")
+    return results
+
+
+def run_meta(rows, apply_rows):
+    """Conditions de mesure, enregistrées avec la référence."""
+    return {"rows": rows, "apply_rows": apply_rows, "python": platform.python_version(),
+            "machine": platform.machine(), "saved_at": time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+
+
+# Conditions qui doivent être identiques à celles de la référence pour comparer les temps
+COMPARABLE_META = ('rows', 'apply_rows', 'machine')
+
+
+def meta_mismatches(meta, baseline_meta):
+    """
+    Conditions de mesure différentes de celles de la référence.
+
+    Returns:
+        list: (clé, valeur de référence, valeur courante) pour chaque clé de COMPARABLE_META
+    """
+    return [(key, baseline_meta.get(key), meta[key]) for key in COMPARABLE_META
+            if baseline_meta.get(key) != meta[key]]
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare les résultats à la référence (temps par ligne).
+
+    Returns:
+        list: Benchmarks en régression : (nom, ns/ligne de référence, ns/ligne mesurés)
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ratio = result["ns_per_row"] / reference["ns_per_row"]
+        status = "RÉGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name:<28} {reference['ns_per_row']:>12.1f} > {result['ns_per_row']:>12.1f} ns/ligne "
+              f"({100 * (ratio - 1):+6.1f} %) {status}")
+        if ratio > 1 + threshold:
+            regressions.append((name, reference["ns_per_row"], result["ns_per_row"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks des fonctions critiques")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Nombre d'incidents synthétiques")
+    parser.add_argument('--apply-rows', type=int, default=20_000,
+                        help="Nombre de lignes des benchmarks ligne à ligne (apply, haversine scalaire)")
+    parser.add_argument('--repeat', type=int, default=3, help="Nombre de mesures par benchmark")
+    parser.add_argument('--only', nargs='+', default=None, help="Benchmarks à exécuter")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Fichier de référence")
+    parser.add_argument('--save', action='store_true', help="Enregistre les résultats comme référence")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Régression tolérée (0.10 : 10 %% plus lent que la référence)")
+    args = parser.parse_args(argv)
+
+    benchmarks = build_benchmarks(args.rows, args.apply_rows)
+    results = run(benchmarks, args.repeat, args.only)
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({"meta": run_meta(args.rows, args.apply_rows), "benchmarks": results}, f, indent=2)
+        print(f"Référence enregistrée : {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"Aucune référence ({args.baseline}) : relancer avec --save pour la créer")
+        return 0
+
+    # Temps par ligne comparables uniquement dans les mêmes conditions de mesure
+    meta = run_meta(args.rows, args.apply_rows)
+    baseline_meta = baseline.get("meta", {})
+    mismatches = meta_mismatches(meta, baseline_meta)
+    if mismatches:
+        for key, reference, current in mismatches:
+            print(f"{key} : {reference} pour la référence, {current} pour cette mesure")
+        print(f"Comparaison refusée : relancer avec les paramètres de la référence ({args.baseline}) "
+              "ou l'enregistrer de nouveau avec --save")
+        return 2
+    if baseline_meta.get("python") != meta["python"]:
+        print(f"Attention : référence mesurée avec Python {baseline_meta.get('python')}, "
+              f"cette mesure avec Python {meta['python']}")
+
+    regressions = compare(results, baseline["benchmarks"], args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) en régression de plus de {100 * args.threshold:.0f} %")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : parity.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : contrôle de parité des chemins d'inférence
+
+Tâches réalisées par ce script :
+ - Génération d'incidents synthétiques sur le Grand Londres
+ - Chemin de référence : DataFrame nommé > DMatrix > Booster.predict
+ - Chemin rapide : tampon float32 > Booster.inplace_predict
+ - Évaluateur NumPy des arbres (src/ml/trees.py), avec et sans valeurs manquantes
+ - Vérification de l'égalité au bit près des variables et des prédictions
+
+Les mêmes vérifications sont exécutées par pytest (tests/test_features.py, tests/test_trees.py) ;
+ce script les reprend sur le modèle et les stations complets.
+
+Utilisation :
+
+    python -m src.benchmarks.parity --rows 10000
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import sys
+import argparse
+
+import numpy as np
+import xgboost as xgb
+
+from src.ml.artifacts import get_artifacts, MODEL_PATH, XGBoostModel
+from src.ml.features import build_feature_frame, FEATURE_COLUMNS
+from src.ml.trees import TreeEnsemble
+
+# Emprise approximative du Grand Londres
+LATITUDE_RANGE = (51.28, 51.70)
+LONGITUDE_RANGE = (-0.51, 0.34)
+
+
+def synthetic_incidents(artifacts, n_rows, seed=42):
+    """
+    Génère des incidents synthétiques (catégories connues et inconnues comprises).
+
+    Returns:
+        dict: Variables d'entrée de FeatureBuilder.build / build_feature_frame
+    """
+    rng = np.random.default_rng(seed)
+
+    incident_groups = list(artifacts.encoders['IncidentGroup']) + ['Unknown']
+    property_categories = list(artifacts.encoders['PropertyCategory']) + ['Unknown']
+
+    latitudes = rng.uniform(*LATITUDE_RANGE, n_rows)
+    longitudes = rng.uniform(*LONGITUDE_RANGE, n_rows)
+    indices, distances = artifacts.station_index.query(latitudes, longitudes, k=1)
+
+    return {
+        "HourOfCall": rng.integers(0, 24, n_rows).tolist(),
+        "IncidentGroup": rng.choice(incident_groups, n_rows).tolist(),
+        "PropertyCategory": rng.choice(property_categories, n_rows).tolist(),
+        "latitudes": latitudes,
+        "longitudes": longitudes,
+        "station_positions": indices[:, 0],
+        "distances": distances[:, 0]
+    }
+
+
+def check_features(artifacts, model, incidents):
+    """
+    Compare le chemin DataFrame/DMatrix et le chemin tampon float32/inplace_predict.
+
+    Returns:
+        bool: True si variables et prédictions sont identiques au bit près
+    """
+    frame = build_feature_frame(artifacts.encoders, artifacts.stations, **incidents)
+    reference = model.booster.predict(xgb.DMatrix(frame))
+
+    X = artifacts.features.build(**incidents)
+    features_equal = np.array_equal(frame.to_numpy(dtype=np.float32), X)
+    predictions = model.predict(X)
+    predictions_equal = np.array_equal(reference, predictions)
+
+    print(f"Variables identiques (float32)            : {features_equal}")
+    print(f"Prédictions identiques (au bit près)     : {predictions_equal}")
+    if not predictions_equal:
+        print(f"Écart maximal : {np.max(np.abs(reference - predictions))}")
+
+    return features_equal and predictions_equal
+
+
+def check_trees(model, ensemble, X):
+    """
+    Compare Booster.predict et l'évaluateur NumPy des arbres sur une matrice de variables.
+
+    Returns:
+        bool: True si les prédictions sont identiques au bit près
+    """
+    reference = model.booster.predict(xgb.DMatrix(X, feature_names=FEATURE_COLUMNS))
+    predictions = ensemble.predict(X)
+    predictions_equal = np.array_equal(reference, predictions)
+
+    print(f"Évaluateur NumPy identique (au bit près) : {predictions_equal}")
+    if not predictions_equal:
+        print(f"Écart maximal : {np.max(np.abs(reference - predictions))}")
+
+    return predictions_equal
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Contrôle de parité des chemins d'inférence")
+    parser.add_argument('--rows', type=int, default=10000, help="Nombre d'incidents synthétiques")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur aléatoire")
+    args = parser.parse_args(argv)
+
+    artifacts = get_artifacts()
+    model = XGBoostModel(MODEL_PATH)
+    ensemble = TreeEnsemble.from_xgboost_json(MODEL_PATH)
+    incidents = synthetic_incidents(artifacts, args.rows, args.seed)
+
+    ok = check_features(artifacts, model, incidents)
+
+    # Cas d'un seul incident (chemin de /predict)
+    single = {key: value[:1] for key, value in incidents.items()}
+    ok = check_features(artifacts, model, single) and ok
+
+    # Évaluateur NumPy, avec et sans valeurs manquantes
+    X = artifacts.features.build(**incidents).copy()
+    ok = check_trees(model, ensemble, X) and ok
+    X[::3, -1] = np.nan
+    X[::5, 2] = np.nan
+    ok = check_trees(model, ensemble, X) and ok
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : gazetteer.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : construction du gazetteer local (data/3_external/london_gazetteer.csv)
+utilisé par src/utils/gazetteer.py
+
+Source : OS Open Names (Ordnance Survey, Open Government Licence), téléchargeable sur
+https://osdatahub.os.uk/downloads/open/OpenNames au format CSV. L'archive contient un fichier
+d'en-tête (Doc/OS_Open_Names_Header.csv) et des fichiers de données sans en-tête (DATA/*.csv),
+un par carré de 100 km ; seuls les carrés TQ et TL couvrent le Grand Londres.
+
+Tâches réalisées par ce script :
+ - Lecture en continu des fichiers OS Open Names (mémoire bornée par le nombre de rues)
+ - Sélection des entrées de la région London : codes postaux ('Postcode') et rues
+   ('Named Road', 'Section Of Named Road')
+ - Une ligne par (rue, district postal, borough) : centroïde moyen des tronçons, de sorte que
+   les rues homonymes de boroughs différents restent distinctes
+ - Centroïde de chaque district postal (moyenne de ses codes postaux)
+ - Conversion British National Grid > WGS84 (src/utils/geo_arrays.py)
+
+Format du fichier produit : name, kind ('postcode' ou 'street'), latitude, longitude, district,
+borough (voir src/utils/gazetteer.py)
+
+Utilisation :
+
+    python -m src.data.gazetteer opname_csv_gb/DATA/TQ*.csv opname_csv_gb/DATA/TL*.csv \\
+        --header opname_csv_gb/Doc/OS_Open_Names_Header.csv
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import csv
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.geo_arrays import bng_to_wgs84
+from src.utils.gazetteer import GAZETTEER_PATH, normalize_postcode
+
+logger = logging.getLogger(__name__)
+
+# Colonnes des fichiers OS Open Names (utilisées si aucun fichier d'en-tête n'est fourni)
+OPEN_NAMES_COLUMNS = [
+    'ID', 'NAMES_URI', 'NAME1', 'NAME1_LANG', 'NAME2', 'NAME2_LANG', 'TYPE', 'LOCAL_TYPE',
+    'GEOMETRY_X', 'GEOMETRY_Y', 'MOST_DETAIL_VIEW_RES', 'LEAST_DETAIL_VIEW_RES',
+    'MBR_XMIN', 'MBR_YMIN', 'MBR_XMAX', 'MBR_YMAX', 'POSTCODE_DISTRICT', 'POSTCODE_DISTRICT_URI',
+    'POPULATED_PLACE', 'POPULATED_PLACE_URI', 'POPULATED_PLACE_TYPE',
+    'DISTRICT_BOROUGH', 'DISTRICT_BOROUGH_URI', 'DISTRICT_BOROUGH_TYPE',
+    'COUNTY_UNITARY', 'COUNTY_UNITARY_URI', 'COUNTY_UNITARY_TYPE',
+    'REGION', 'REGION_URI', 'COUNTRY', 'COUNTRY_URI',
+    'RELATED_SPATIAL_OBJECT', 'SAME_AS_DBPEDIA', 'SAME_AS_GEONAMES'
+]
+
+# Région retenue et types d'entrées
+REGION = 'London'
+STREET_TYPES = {'Named Road', 'Section Of Named Road'}
+POSTCODE_TYPE = 'Postcode'
+
+GAZETTEER_COLUMNS = ['name', 'kind', 'latitude', 'longitude', 'district', 'borough']
+
+
+def read_header(path):
+    """Lit les noms de colonnes du fichier d'en-tête OS Open Names."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f))
+
+
+def _rows(paths, columns):
+    for path in paths:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.DictReader(f, fieldnames=columns)
+
+
+def build_gazetteer(paths, output=GAZETTEER_PATH, columns=OPEN_NAMES_COLUMNS, region=REGION):
+    """
+    Construit le gazetteer à partir de fichiers OS Open Names.
+
+    Args:
+        paths (list): Fichiers de données OS Open Names (sans en-tête)
+        output (str): Fichier CSV produit
+        columns (list): Noms des colonnes des fichiers de données
+        region (str): Région retenue (colonne REGION)
+
+    Returns:
+        dict: Nombre de lignes écrites par type ('postcode', 'street')
+    """
+    postcodes = {}
+    streets = {}
+    districts = {}
+
+    for row in _rows(paths, columns):
+        if row['REGION'] != region:
+            continue
+        easting, northing = float(row['GEOMETRY_X']), float(row['GEOMETRY_Y'])
+
+        if row['LOCAL_TYPE'] == POSTCODE_TYPE:
+            postcode = row['NAME1'].upper()
+            postcodes[postcode] = (easting, northing)
+            totals = districts.setdefault(postcode.split()[0], [0.0, 0.0, 0])
+        elif row['LOCAL_TYPE'] in STREET_TYPES and row['NAME1']:
+            # Boroughs de Londres : DISTRICT_BOROUGH, ou COUNTY_UNITARY pour la City et certains fichiers
+            borough = row['DISTRICT_BOROUGH'] or row['COUNTY_UNITARY']
+            key = (row['NAME1'], normalize_postcode(row['POSTCODE_DISTRICT']), borough)
+            totals = streets.setdefault(key, [0.0, 0.0, 0])
+        else:
+            continue
+
+        # Sommes des coordonnées du district ou de la rue (centroïde moyen)
+        totals[0] += easting
+        totals[1] += northing
+        totals[2] += 1
+
+    # Un centroïde par code postal, par district et par (rue, district, borough)
+    entries = [(name, 'postcode', x, y, '', '') for name, (x, y) in sorted(postcodes.items())]
+    entries += [(name, 'postcode', x / n, y / n, '', '') for name, (x, y, n) in sorted(districts.items())]
+    entries += [(name, 'street', x / n, y / n, district, borough)
+                for (name, district, borough), (x, y, n) in sorted(streets.items())]
+
+    if entries:
+        latitudes, longitudes = bng_to_wgs84(np.array([entry[2] for entry in entries]),
+                                             np.array([entry[3] for entry in entries]), dtype=np.float64)
+    else:
+        latitudes, longitudes = [], []
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(GAZETTEER_COLUMNS)
+        for (name, kind, _, _, district, borough), latitude, longitude in zip(entries, latitudes, longitudes):
+            writer.writerow([name, kind, f"{latitude:.6f}", f"{longitude:.6f}", district, borough])
+
+    counts = {"postcode": len(postcodes) + len(districts), "street": len(streets)}
+    logger.info(f"Gazetteer écrit dans {output} : {counts['postcode']} codes postaux, {counts['street']} rues")
+    return counts
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Construction du gazetteer local à partir d'OS Open Names")
+    parser.add_argument('csv', nargs='+', help="Fichiers de données OS Open Names (DATA/*.csv)")
+    parser.add_argument('--header', help="Fichier d'en-tête (Doc/OS_Open_Names_Header.csv)")
+    parser.add_argument('--output', default=GAZETTEER_PATH, help="Fichier CSV produit")
+    parser.add_argument('--region', default=REGION, help="Région retenue (colonne REGION)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    build_gazetteer(args.csv, args.output, read_header(args.header) if args.header else OPEN_NAMES_COLUMNS,
+                    args.region)
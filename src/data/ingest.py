@@ -0,0 +1,377 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : ingest.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : cache colonnaire des données brutes (CSV de data/2_CSV > Parquet)
+
+Tâches réalisées par ce script :
+ - Conversion de chaque CSV brut (incidents, mobilisations) en un fichier Parquet typé :
+   types explicites des colonnes connues, catégories encodées par dictionnaire, identifiants et
+   autres colonnes en texte ; lecture et écriture en continu (mémoire bornée)
+ - Manifeste des conversions (empreinte SHA-256 du contenu, taille, date de modification) :
+   un CSV inchangé n'est jamais relu ; si seule sa date change, l'empreinte est recalculée
+   et le fichier Parquet existant est conservé
+ - Lecture des seules colonnes utiles depuis le cache (load_raw)
+ - Chargement de plusieurs sources en parallèle (load_sources) : conversion, vérification du
+   schéma, sélection des colonnes et suppression des lignes incomplètes dans des processus ;
+   seules des tables compactes (colonnes utiles) reviennent au processus principal
+
+Utilisation :
+
+    python -m src.data.ingest data/2_CSV/*.csv
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import csv
+import json
+import time
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Répertoire du cache (fichiers Parquet et manifeste)
+RAW_CACHE_DIR = os.getenv('LFB_RAW_CACHE_DIR', './data/2_parquet')
+
+# Version du format du cache : à incrémenter si les types ci-dessous changent (reconversion)
+CACHE_FORMAT = 1
+
+# Nombre de processus pour la conversion et le chargement des sources (défaut : nombre de cœurs)
+INGEST_WORKERS = int(os.getenv('LFB_INGEST_WORKERS', '0')) or os.cpu_count()
+
+# Taille des blocs lus dans les CSV (octets)
+BLOCK_SIZE = 64 << 20
+
+# Valeurs lues comme manquantes (valeurs par défaut de pandas.read_csv, dont 'NULL')
+NULL_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+               '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+# Types explicites des colonnes connues (les autres colonnes sont conservées en texte)
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+COLUMN_TYPES = {
+    # Incidents
+    'IncidentNumber': pa.string(),
+    'CalYear': pa.int16(),
+    'HourOfCall': pa.int8(),
+    'IncidentGroup': CATEGORY,
+    'StopCodeDescription': CATEGORY,
+    'SpecialServiceType': CATEGORY,
+    'PropertyCategory': CATEGORY,
+    'PropertyType': CATEGORY,
+    'AddressQualifier': CATEGORY,
+    'Postcode_district': CATEGORY,
+    'IncGeo_BoroughCode': CATEGORY,
+    'IncGeo_BoroughName': CATEGORY,
+    'ProperCase': CATEGORY,
+    'IncGeo_WardCode': CATEGORY,
+    'IncGeo_WardName': CATEGORY,
+    'IncGeo_WardNameNew': CATEGORY,
+    'Easting_m': pa.float64(),
+    'Northing_m': pa.float64(),
+    'Easting_rounded': pa.float64(),
+    'Northing_rounded': pa.float64(),
+    'Latitude': pa.float64(),
+    'Longitude': pa.float64(),
+    'FRS': CATEGORY,
+    'IncidentStationGround': CATEGORY,
+    'FirstPumpArriving_AttendanceTime': pa.float64(),
+    'FirstPumpArriving_DeployedFromStation': CATEGORY,
+    'SecondPumpArriving_AttendanceTime': pa.float64(),
+    'SecondPumpArriving_DeployedFromStation': CATEGORY,
+    'NumStationsWithPumpsAttending': pa.float64(),
+    'NumPumpsAttending': pa.float64(),
+    'PumpCount': pa.float64(),
+    'PumpMinutesRounded': pa.float64(),
+    'NumCalls': pa.float64(),
+    # Mobilisations
+    'ResourceMobilisationId': pa.int64(),
+    'Resource_Code': CATEGORY,
+    'PerformanceReporting': CATEGORY,
+    'TurnoutTimeSeconds': pa.float64(),
+    'TravelTimeSeconds': pa.float64(),
+    'AttendanceTimeSeconds': pa.float64(),
+    'DeployedFromStation_Code': CATEGORY,
+    'DeployedFromStation_Name': CATEGORY,
+    'DeployedFromLocation': CATEGORY,
+    'PumpOrder': pa.float64(),
+    'PlusCode_Code': CATEGORY,
+    'PlusCode_Description': CATEGORY,
+    'DelayCodeId': pa.float64(),
+    'DelayCode_Description': CATEGORY
+}
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Manifeste
+---------------------------------------------------------------------------------------------------
+"""
+
+def _manifest_path(cache_dir):
+    return Path(cache_dir) / 'manifest.json'
+
+
+def read_manifest(cache_dir=RAW_CACHE_DIR):
+    """Retourne le manifeste du cache ({nom du CSV: description de la conversion})."""
+    try:
+        with open(_manifest_path(cache_dir), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(manifest, cache_dir=RAW_CACHE_DIR):
+    """Écrit le manifeste (écriture atomique)."""
+    path = _manifest_path(cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def file_hash(path, block_size=1 << 20):
+    """Empreinte SHA-256 du contenu d'un fichier (lu par blocs)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Conversion CSV > Parquet
+---------------------------------------------------------------------------------------------------
+"""
+
+def _header(path):
+    """Noms des colonnes du CSV (première ligne)."""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f))
+
+
+def convert(csv_path, parquet_path):
+    """
+    Convertit un CSV en fichier Parquet typé, bloc par bloc.
+
+    Returns:
+        dict: Nombre de lignes et liste des colonnes
+    """
+    columns = _header(csv_path)
+    convert_options = pa_csv.ConvertOptions(
+        column_types={column: COLUMN_TYPES.get(column, pa.string()) for column in columns},
+        null_values=NULL_VALUES,
+        strings_can_be_null=True
+    )
+    read_options = pa_csv.ReadOptions(block_size=BLOCK_SIZE, encoding='utf-8')
+
+    parquet_path = Path(parquet_path)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = parquet_path.with_suffix('.tmp')
+
+    n_rows = 0
+    reader = pa_csv.open_csv(csv_path, read_options=read_options, convert_options=convert_options)
+    with pq.ParquetWriter(tmp_path, reader.schema, compression='snappy') as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            n_rows += batch.num_rows
+    os.replace(tmp_path, parquet_path)
+
+    return {"rows": n_rows, "columns": columns}
+
+
+def ingest(csv_path, cache_dir=RAW_CACHE_DIR, manifest=None):
+    """
+    Met à jour le cache d'un CSV brut, si nécessaire.
+
+    Le CSV n'est relu que si son contenu a changé : taille et date de modification identiques à
+    celles du manifeste, ou sinon empreinte SHA-256 identique, et le fichier Parquet est conservé.
+
+    Args:
+        csv_path (str): CSV brut
+        cache_dir (str): Répertoire du cache
+        manifest (dict): Manifeste à mettre à jour (lu et écrit par la fonction si None)
+
+    Returns:
+        str: Chemin du fichier Parquet
+    """
+    save = manifest is None
+    if manifest is None:
+        manifest = read_manifest(cache_dir)
+
+    csv_path = Path(csv_path)
+    parquet_path = Path(cache_dir) / f"{csv_path.stem}.parquet"
+    stat = csv_path.stat()
+    entry = manifest.get(csv_path.name)
+
+    up_to_date = (entry is not None
+                  and entry.get("format") == CACHE_FORMAT
+                  and entry.get("size") == stat.st_size
+                  and parquet_path.exists())
+
+    if up_to_date and entry.get("mtime_ns") != stat.st_mtime_ns:
+        # Date modifiée (copie, checkout...) : le contenu fait foi
+        up_to_date = file_hash(csv_path) == entry.get("sha256")
+        if up_to_date:
+            entry["mtime_ns"] = stat.st_mtime_ns
+
+    if not up_to_date:
+        start_time = time.time()
+        sha256 = file_hash(csv_path)
+        summary = convert(csv_path, parquet_path)
+        manifest[csv_path.name] = {
+            "format": CACHE_FORMAT,
+            "sha256": sha256,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "parquet": parquet_path.name,
+            **summary
+        }
+        logger.info(f"{csv_path} converti en {parquet_path} : {summary['rows']} lignes "
+                    f"({round(time.time() - start_time)} secondes)")
+
+    if save:
+        write_manifest(manifest, cache_dir)
+    return str(parquet_path)
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Lecture depuis le cache
+---------------------------------------------------------------------------------------------------
+"""
+
+def raw_columns(csv_path, cache_dir=RAW_CACHE_DIR):
+    """Liste complète des colonnes d'un CSV brut (lue dans le cache, mis à jour si nécessaire)."""
+    return pq.read_schema(ingest(csv_path, cache_dir)).names
+
+
+def load_raw(csv_path, columns=None, cache_dir=RAW_CACHE_DIR):
+    """
+    Charge un CSV brut depuis le cache Parquet (mis à jour si nécessaire).
+
+    Args:
+        csv_path (str): CSV brut
+        columns (list): Colonnes à lire (toutes si None) ; les colonnes absentes sont ignorées
+
+    Returns:
+        pd.DataFrame: Données (catégories en type 'category')
+    """
+    parquet_path = ingest(csv_path, cache_dir)
+    if columns is not None:
+        available = pq.read_schema(parquet_path).names
+        columns = [column for column in columns if column in available]
+    return pq.read_table(parquet_path, columns=columns).to_pandas()
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Chargement en parallèle
+---------------------------------------------------------------------------------------------------
+"""
+
+def _load_source(csv_path, columns, required, cache_dir):
+    """
+    Charge une source dans un processus du pool : conversion si nécessaire, vérification du
+    schéma, sélection des colonnes, suppression des lignes sans valeur pour `required`.
+
+    Returns:
+        tuple: (table Arrow, liste complète des colonnes, entrée du manifeste)
+    """
+    manifest = read_manifest(cache_dir)
+    parquet_path = ingest(csv_path, cache_dir, manifest)
+    all_columns = pq.read_schema(parquet_path).names
+
+    # Vérification du schéma : colonnes utiles présentes
+    missing = [column for column in columns if column not in all_columns]
+    if missing:
+        raise ValueError(f"{csv_path} : colonnes manquantes {missing}")
+
+    table = pq.read_table(parquet_path, columns=columns)
+    for column in required:
+        table = table.filter(pc.is_valid(table[column]))
+
+    return table, all_columns, manifest[Path(csv_path).name]
+
+
+def load_sources(sources, workers=INGEST_WORKERS, cache_dir=RAW_CACHE_DIR):
+    """
+    Charge plusieurs CSV bruts en parallèle (un processus par source, au plus `workers`).
+
+    Args:
+        sources (dict): {nom: (CSV brut, colonnes à lire, colonnes obligatoires)}
+        workers (int): Nombre de processus (1 : chargement dans le processus courant)
+
+    Returns:
+        dict: {nom: (pd.DataFrame, liste complète des colonnes du CSV)}
+    """
+    workers = max(1, min(workers, len(sources)))
+    arguments = {name: (csv_path, list(columns), list(required), cache_dir)
+                 for name, (csv_path, columns, required) in sources.items()}
+
+    if workers == 1:
+        results = {name: _load_source(*args) for name, args in arguments.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(_load_source, *args) for name, args in arguments.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
+    # Manifeste mis à jour une seule fois, par le processus principal
+    manifest = read_manifest(cache_dir)
+    for name, (_, _, entry) in results.items():
+        manifest[Path(sources[name][0]).name] = entry
+    write_manifest(manifest, cache_dir)
+
+    return {name: (table.to_pandas(), all_columns) for name, (table, all_columns, _) in results.items()}
+
+
+def _ingest_one(csv_path, cache_dir):
+    manifest = read_manifest(cache_dir)
+    ingest(csv_path, cache_dir, manifest)
+    return manifest[Path(csv_path).name]
+
+
+def ingest_all(csv_paths, workers=INGEST_WORKERS, cache_dir=RAW_CACHE_DIR):
+    """Met à jour le cache de plusieurs CSV bruts en parallèle (manifeste écrit une seule fois)."""
+    workers = max(1, min(workers, len(csv_paths)))
+    if workers == 1:
+        entries = [_ingest_one(csv_path, cache_dir) for csv_path in csv_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            entries = list(pool.map(_ingest_one, csv_paths, [cache_dir] * len(csv_paths)))
+
+    manifest = read_manifest(cache_dir)
+    for csv_path, entry in zip(csv_paths, entries):
+        manifest[Path(csv_path).name] = entry
+    write_manifest(manifest, cache_dir)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Conversion des CSV bruts en fichiers Parquet typés")
+    parser.add_argument('csv', nargs='+', help="CSV bruts (data/2_CSV)")
+    parser.add_argument('--cache-dir', default=RAW_CACHE_DIR, help="Répertoire du cache")
+    parser.add_argument('--workers', type=int, default=INGEST_WORKERS, help="Nombre de processus")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    ingest_all(args.csv, args.workers, args.cache_dir)
@@ -1,7 +1,9 @@
 import os
+import json
 import streamlit as st
 import requests
 import folium
+from branca.colormap import LinearColormap
 from streamlit_folium import folium_static
 from streamlit_mermaid import st_mermaid
 
@@ -11,7 +13,7 @@ st.title("Prédiction du temps d'intervention des pompiers de Londres")
 # Menu de navigation étendu
 page = st.sidebar.radio(
     "Navigation",
-    ["Contexte", "Exploration", "Modélisation", "Architecture", "Prédiction", "Logs", "En cours de développement"]
+    ["Contexte", "Exploration", "Modélisation", "Architecture", "Prédiction", "Carte de couverture", "Logs", "En cours de développement"]
 )
 
 def show_context():
@@ -259,6 +261,66 @@ Distance : {results['DistanceToStation'] / 1000:.3f} km
         except requests.exceptions.RequestException as e:
             st.error(f"Erreur lors de la requête : {str(e)}")
 
+@st.cache_data
+def load_categories(path=os.getenv('LFB_ENCODERS_PATH', './models/encoders.json')):
+    """Valeurs connues du modèle pour IncidentGroup et PropertyCategory (encodeurs entraînés)."""
+    with open(path, 'r') as f:
+        encoders = json.load(f)
+    return encoders['IncidentGroup'], encoders['PropertyCategory']
+
+def show_coverage():
+    """Affiche la carte des temps d'intervention prédits sur Londres."""
+    incident_groups, property_categories = load_categories()
+    hour = st.number_input("Heure d'appel", min_value=0, max_value=23, value=10)
+    incident_group = st.selectbox("Type d'incident", incident_groups,
+                                  index=incident_groups.index("Fire") if "Fire" in incident_groups else 0)
+    property_category = st.selectbox("Type de propriété", property_categories,
+                                     index=property_categories.index("Dwelling") if "Dwelling" in property_categories else 0)
+    zoom = st.slider("Niveau de détail (zoom des tuiles)", min_value=9, max_value=11, value=10)
+
+    if st.button("Afficher la carte de couverture"):
+
+        api_url = os.getenv('API_URL', 'http://127.0.0.1:8000')
+        url = f"{api_url}/heatmap"
+
+        # Emprise du Grand Londres
+        params = {
+            "min_lat": 51.28, "min_lon": -0.52, "max_lat": 51.70, "max_lon": 0.34,
+            "zoom": zoom,
+            "HourOfCall": hour,
+            "IncidentGroup": incident_group,
+            "PropertyCategory": property_category
+        }
+
+        try:
+            response = requests.get(url, params=params)
+            response.raise_for_status()
+            heatmap = response.json()
+
+            predictions = [feature['properties']['prediction'] for feature in heatmap['features']]
+            colormap = LinearColormap(['green', 'yellow', 'red'],
+                                      vmin=min(predictions), vmax=max(predictions),
+                                      caption="Temps d'intervention prédit (secondes)")
+
+            # Carte avec les cellules colorées selon le temps prédit
+            m = folium.Map(location=[51.5, -0.1], zoom_start=10)
+            folium.GeoJson(
+                heatmap,
+                style_function=lambda feature: {
+                    'fillColor': colormap(feature['properties']['prediction']),
+                    'fillOpacity': 0.5,
+                    'weight': 0
+                },
+                tooltip=folium.GeoJsonTooltip(fields=['prediction', 'station'],
+                                              aliases=['Temps prédit (s)', 'Caserne'])
+            ).add_to(m)
+            colormap.add_to(m)
+
+            folium_static(m)
+
+        except requests.exceptions.RequestException as e:
+            st.error(f"Erreur lors de la requête : {str(e)}")
+
 def show_logs():
     """Affiche la section Logs."""
     st.subheader("Logs du Système")
@@ -333,6 +395,8 @@ elif page == "Architecture":
     show_architecture()
 elif page == "Prédiction":
     show_prediction()
+elif page == "Carte de couverture":
+    show_coverage()
 elif page == "Logs":
     show_logs()
 else:  # En cours de développement
@@ -0,0 +1,402 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : artifacts.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : registre des artefacts nécessaires à la prédiction (modèle, encodeurs, stations)
+
+Tâches réalisées par ce script :
+ - Chargement unique du modèle XGBoost, des encodeurs et de la liste des stations
+ - Choix du moteur d'inférence : xgboost ou évaluateur NumPy (sans xgboost)
+ - Construction de l'index spatial des stations
+ - Mise à disposition d'un instantané immuable partagé par toutes les requêtes
+ - Manifeste de déploiement (models/deploy.json) : empreintes SHA-256 du modèle, des encodeurs
+   et des stations, écrit après la copie des fichiers ; modèle et encodeurs forment une seule
+   version, chargée seulement si les fichiers correspondent au manifeste
+ - Surveillance du manifeste et rechargement en arrière-plan lorsqu'il change (une modification
+   isolée de encoders.json ou du modèle n'est jamais servie avec l'autre fichier)
+ - Remplacement atomique de l'instantané
+
+Utilisation (déploiement, après la copie du modèle et des encodeurs) :
+
+    python -m src.ml.artifacts
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import pandas as pd
+
+from src.ml.features import FeatureBuilder
+from src.ml.trees import TreeEnsemble
+from src.utils.station_index import StationIndex
+
+logger = logging.getLogger(__name__)
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Chemins et paramètres
+---------------------------------------------------------------------------------------------------
+"""
+
+MODEL_PATH = './models/model-XGB.json'
+ENCODERS_PATH = './models/encoders.json'
+STATIONS_PATH = './data/3_external/final_stations_list.csv'
+
+# Manifeste de déploiement (empreintes des fichiers de la version déployée)
+DEPLOY_MANIFEST_PATH = os.getenv('LFB_DEPLOY_MANIFEST_PATH', './models/deploy.json')
+ARTIFACT_NAMES = ('model', 'encoders', 'stations')
+
+# Moteur d'inférence : 'xgboost' (Booster.inplace_predict) ou 'numpy' (src/ml/trees.py)
+INFERENCE_BACKEND = os.getenv('LFB_INFERENCE_BACKEND', 'xgboost')
+
+# Intervalle (en secondes) entre deux vérifications des fichiers par le thread de surveillance
+POLL_INTERVAL = float(os.getenv('LFB_ARTIFACTS_POLL_INTERVAL', '30'))
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Moteurs d'inférence
+---------------------------------------------------------------------------------------------------
+"""
+
+class XGBoostModel:
+    """Modèle XGBoost natif, évalué par prédiction « en place » (sans DMatrix)."""
+
+    def __init__(self, path):
+        import xgboost as xgb
+
+        self.booster = xgb.Booster()
+        self.booster.load_model(path)
+
+    def predict(self, X):
+        return self.booster.inplace_predict(X, validate_features=False)
+
+
+def load_model(path, backend=INFERENCE_BACKEND):
+    """
+    Charge le modèle avec le moteur d'inférence demandé.
+
+    Args:
+        path (str): Chemin vers model-XGB.json
+        backend (str): 'xgboost' ou 'numpy'
+
+    Returns:
+        Objet exposant predict(X) sur une matrice float32 de variables
+    """
+    if backend == 'numpy':
+        return TreeEnsemble.from_xgboost_json(path)
+    if backend == 'xgboost':
+        return XGBoostModel(path)
+    raise ValueError(f"Moteur d'inférence inconnu : {backend}")
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Instantané des artefacts
+---------------------------------------------------------------------------------------------------
+"""
+
+@dataclass(frozen=True)
+class Artifacts:
+    """
+    Instantané immuable des artefacts de prédiction.
+
+    Un instantané n'est jamais modifié après sa création : un rechargement en construit un
+    nouveau et remplace la référence détenue par le registre.
+
+    Attributes:
+        model (XGBoostModel | TreeEnsemble): Modèle chargé, exposant predict(X)
+        encoders (Mapping): Encodeurs {colonne: {valeur: code}} en lecture seule
+        stations (pd.DataFrame): Liste des stations (à ne pas modifier)
+        station_index (StationIndex): Index spatial construit sur la liste des stations
+        features (FeatureBuilder): Constructeur des variables du modèle (tampon float32)
+        version (str): Empreinte des fichiers source, identifie le jeu d'artefacts
+        loaded_at (float): Horodatage du chargement
+    """
+
+    model: object
+    encoders: Mapping[str, Mapping[str, int]]
+    stations: pd.DataFrame
+    station_index: StationIndex
+    features: FeatureBuilder
+    version: str
+    loaded_at: float
+
+
+def _file_hash(path):
+    """Calcule l'empreinte SHA-256 d'un fichier."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_stat(path):
+    """Retourne (date de modification, taille) d'un fichier."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_deploy_manifest(path=DEPLOY_MANIFEST_PATH):
+    """Retourne le manifeste de déploiement {artefact: sha256}, ou None s'il n'existe pas."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_deploy_manifest(model_path=MODEL_PATH,
+                          encoders_path=ENCODERS_PATH,
+                          stations_path=STATIONS_PATH,
+                          path=DEPLOY_MANIFEST_PATH):
+    """
+    Écrit le manifeste de déploiement (écriture atomique) à partir des fichiers en place.
+
+    À exécuter une fois le modèle et les encodeurs copiés : l'API recharge alors les deux
+    ensemble.
+
+    Returns:
+        dict: Manifeste écrit
+    """
+    manifest = {name: _file_hash(file_path)
+                for name, file_path in zip(ARTIFACT_NAMES, (model_path, encoders_path, stations_path))}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def load_encoders(path):
+    """
+    Charge les encodeurs depuis le JSON et construit les dictionnaires {valeur: code}.
+
+    Args:
+        path (str): Chemin vers encoders.json
+
+    Returns:
+        Mapping: Encodeurs en lecture seule
+    """
+    with open(path, 'r') as f:
+        encoders = json.load(f)
+
+    return MappingProxyType({
+        category: MappingProxyType({value: idx for idx, value in enumerate(values)})
+        for category, values in encoders.items()
+    })
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Registre des artefacts
+---------------------------------------------------------------------------------------------------
+"""
+
+class ArtifactRegistry:
+    """
+    Registre des artefacts à l'échelle du processus.
+
+    Les artefacts sont chargés une seule fois puis partagés. Lorsqu'un manifeste de déploiement
+    existe, les empreintes des fichiers doivent lui correspondre ; sinon le chargement échoue
+    (l'instantané courant reste en service). Un thread de surveillance vérifie périodiquement
+    le manifeste seul et recharge l'ensemble lorsqu'il change : un fichier modifié sans nouveau
+    manifeste n'est pas rechargé. Sans manifeste, les artefacts sont chargés au démarrage et ne
+    sont pas rechargés.
+
+    Le nouvel instantané est entièrement construit avant de remplacer l'ancien : une requête en
+    cours conserve l'instantané qu'elle a obtenu.
+    """
+
+    def __init__(self,
+                 model_path=MODEL_PATH,
+                 encoders_path=ENCODERS_PATH,
+                 stations_path=STATIONS_PATH,
+                 poll_interval=POLL_INTERVAL,
+                 backend=INFERENCE_BACKEND,
+                 manifest_path=DEPLOY_MANIFEST_PATH):
+        self.paths = (model_path, encoders_path, stations_path)
+        self.manifest_path = manifest_path
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self._artifacts: Optional[Artifacts] = None
+        self._manifest_stat = None
+        self._manifest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners = []
+
+    def _build(self, hashes):
+        """Construit un nouvel instantané à partir des fichiers."""
+        model_path, encoders_path, stations_path = self.paths
+
+        # Récupération du modèle XGBoost
+        model = load_model(model_path, self.backend)
+
+        # Récupération des encodeurs et des stations
+        encoders = load_encoders(encoders_path)
+        stations = pd.read_csv(stations_path)
+
+        version = hashlib.sha256(''.join(hashes).encode()).hexdigest()[:12]
+
+        return Artifacts(model=model,
+                         encoders=encoders,
+                         stations=stations,
+                         station_index=StationIndex.from_stations(stations),
+                         features=FeatureBuilder(encoders, stations),
+                         version=version,
+                         loaded_at=time.time())
+
+    def _manifest_file_stat(self):
+        return _file_stat(self.manifest_path) if os.path.exists(self.manifest_path) else None
+
+    def _load_locked(self):
+        """Construit un instantané cohérent avec le manifeste et le met en service (verrou détenu)."""
+        manifest_stat = self._manifest_file_stat()
+        manifest = read_deploy_manifest(self.manifest_path)
+        hashes = tuple(_file_hash(path) for path in self.paths)
+
+        # Modèle et encodeurs doivent être ceux du manifeste (même version de déploiement)
+        if manifest is not None:
+            mismatched = [name for name, file_hash in zip(ARTIFACT_NAMES, hashes)
+                          if name in manifest and manifest[name] != file_hash]
+            if mismatched:
+                raise ValueError(f"Fichiers différents du manifeste de déploiement {self.manifest_path} : "
+                                 f"{', '.join(mismatched)}")
+
+        artifacts = self._build(hashes)
+
+        # Remplacement atomique de la référence
+        self._artifacts = artifacts
+        self._manifest_stat, self._manifest = manifest_stat, manifest
+
+        logger.info(f"Artefacts chargés (version {artifacts.version})")
+        return artifacts
+
+    def _notify(self, artifacts):
+        """Notification des composants dépendants (caches à invalider...)."""
+        for listener in self._listeners:
+            listener(artifacts)
+
+    def load(self):
+        """
+        Charge (ou recharge) les artefacts et remplace l'instantané courant.
+
+        Returns:
+            Artifacts: Nouvel instantané
+        """
+        with self._lock:
+            artifacts = self._load_locked()
+        self._notify(artifacts)
+        return artifacts
+
+    def add_listener(self, callback):
+        """
+        Enregistre une fonction appelée avec le nouvel instantané après chaque chargement.
+
+        Si les artefacts sont déjà chargés, la fonction est appelée immédiatement.
+        """
+        self._listeners.append(callback)
+        if self._artifacts is not None:
+            callback(self._artifacts)
+
+    def get(self):
+        """
+        Retourne l'instantané courant, en le chargeant au premier appel.
+
+        Returns:
+            Artifacts: Instantané courant
+        """
+        artifacts = self._artifacts
+        if artifacts is None:
+            # Chargement sous verrou : des premiers appels concurrents ne chargent qu'une fois
+            with self._lock:
+                artifacts = self._artifacts
+                loaded = artifacts is None
+                if loaded:
+                    artifacts = self._load_locked()
+            if loaded:
+                self._notify(artifacts)
+        return artifacts
+
+    def refresh(self):
+        """
+        Recharge les artefacts si le manifeste de déploiement a changé.
+
+        Le manifeste n'est relu que si sa date de modification ou sa taille a changé.
+
+        Returns:
+            bool: True si un rechargement a eu lieu
+        """
+        manifest_stat = self._manifest_file_stat()
+        if manifest_stat == self._manifest_stat:
+            return False
+
+        manifest = read_deploy_manifest(self.manifest_path)
+        if manifest is None or manifest == self._manifest:
+            self._manifest_stat = manifest_stat
+            return False
+
+        logger.info("Nouveau manifeste de déploiement détecté, rechargement en cours")
+        self.load()
+        return True
+
+    def _watch(self):
+        """Boucle du thread de surveillance."""
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # L'instantané courant reste en service si le rechargement échoue
+                logger.error(f"Erreur lors du rechargement des artefacts : {str(e)}")
+
+    def start(self):
+        """Charge les artefacts et démarre le thread de surveillance."""
+        self.get()
+        if self._thread is None and self.poll_interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="artifacts-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Arrête le thread de surveillance."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+# Registre partagé par le processus
+registry = ArtifactRegistry()
+
+
+def get_artifacts():
+    """Retourne l'instantané courant du registre partagé."""
+    return registry.get()
+
+
+if __name__ == "__main__":
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Déploiement : manifeste des fichiers en place (modèle, encodeurs, stations)
+    manifest = write_deploy_manifest()
+    logger.info(f"Manifeste de déploiement écrit dans {DEPLOY_MANIFEST_PATH} : {manifest}")
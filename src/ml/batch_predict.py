@@ -0,0 +1,176 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : batch_predict.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : prédiction hors ligne d'un fichier d'incidents (sans l'API)
+
+Tâches réalisées par ce script :
+ - Lecture d'un fichier CSV ou Parquet par blocs (colonnes utiles uniquement)
+ - Répartition des blocs sur un pool de processus ; chaque processus charge une seule fois le
+   modèle, les encodeurs et l'index des stations
+ - Évaluation vectorisée de chaque bloc (src/ml/bulk.py)
+ - Écriture des résultats dans un fichier Parquet, dans l'ordre du fichier d'entrée
+ - Suivi de la progression et du débit
+
+Utilisation :
+
+    python -m src.ml.batch_predict incidents.csv predictions.parquet --workers 8
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.ml.bulk import BULK_COLUMNS, iter_chunks, score_frame
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'incidents par bloc envoyé à un processus
+CHUNK_ROWS = 200_000
+
+# Schéma du fichier de sortie (fixé, pour que tous les blocs soient compatibles)
+OUTPUT_SCHEMA = pa.schema([
+    ('row', pa.int64()),
+    ('IncidentNumber', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('station', pa.string()),
+    ('StationBorough', pa.string()),
+    ('DistanceToStation', pa.float64()),
+    ('prediction', pa.float64()),
+    ('error', pa.string())
+])
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Lecture des blocs
+---------------------------------------------------------------------------------------------------
+"""
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Lit un fichier d'incidents CSV ou Parquet par blocs.
+
+    Yields:
+        pd.DataFrame: Bloc d'incidents (colonnes de BULK_COLUMNS présentes dans le fichier)
+    """
+    if str(path).endswith('.parquet'):
+        parquet_file = pq.ParquetFile(path)
+        columns = [column for column in parquet_file.schema_arrow.names if column in BULK_COLUMNS]
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        with open(path, 'rb') as f:
+            yield from iter_chunks(f, 'csv', chunk_rows)
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Processus de calcul
+---------------------------------------------------------------------------------------------------
+"""
+
+_artifacts = None
+
+
+def _init_worker(threads):
+    """Charge les artefacts une seule fois par processus."""
+    global _artifacts
+    from src.ml.artifacts import get_artifacts
+
+    _artifacts = get_artifacts()
+
+    # Un pool de processus : limitation des threads XGBoost de chacun
+    booster = getattr(_artifacts.model, 'booster', None)
+    if booster is not None:
+        booster.set_param({'nthread': threads})
+
+
+def _score(chunk, offset):
+    """Évalue un bloc dans un processus du pool."""
+    return score_frame(_artifacts, chunk, offset)
+
+
+def batch_predict(input_path, output_path, workers=None, chunk_rows=CHUNK_ROWS, threads=1):
+    """
+    Évalue un fichier d'incidents et écrit les résultats au format Parquet.
+
+    Les blocs sont soumis au pool au fur et à mesure de la lecture, avec au plus deux blocs en
+    attente par processus : la mémoire reste bornée quelle que soit la taille du fichier. Les
+    résultats sont écrits dans l'ordre des blocs.
+
+    Args:
+        input_path (str): Fichier d'incidents (.csv ou .parquet)
+        output_path (str): Fichier Parquet de sortie
+        workers (int): Nombre de processus (par défaut, nombre de cœurs)
+        chunk_rows (int): Nombre d'incidents par bloc
+        threads (int): Nombre de threads XGBoost par processus
+
+    Returns:
+        dict: Nombre d'incidents, d'erreurs, durée et débit
+    """
+    workers = workers or os.cpu_count()
+    start_time = time.time()
+    n_rows = 0
+    n_errors = 0
+
+    def write(writer, result):
+        nonlocal n_rows, n_errors
+        writer.write_table(pa.Table.from_pandas(result, schema=OUTPUT_SCHEMA, preserve_index=False))
+        n_rows += len(result)
+        n_errors += int(result['error'].notna().sum())
+        elapsed = time.time() - start_time
+        logger.info(f"{n_rows} incidents évalués ({n_rows / elapsed:,.0f} incidents/s)")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,)) as pool, \
+            pq.ParquetWriter(output_path, OUTPUT_SCHEMA) as writer:
+        pending = deque()
+        offset = 0
+        for chunk in read_chunks(input_path, chunk_rows):
+            pending.append(pool.submit(_score, chunk, offset))
+            offset += len(chunk)
+            if len(pending) >= 2 * workers:
+                write(writer, pending.popleft().result())
+        while pending:
+            write(writer, pending.popleft().result())
+
+    elapsed = time.time() - start_time
+    return {
+        "rows": n_rows,
+        "errors": n_errors,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(n_rows / elapsed) if elapsed else None
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Prédiction hors ligne d'un fichier d'incidents")
+    parser.add_argument('input', help="Fichier d'incidents (.csv ou .parquet)")
+    parser.add_argument('output', help="Fichier Parquet de sortie")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Nombre d'incidents par bloc")
+    parser.add_argument('--threads', type=int, default=1, help="Nombre de threads XGBoost par processus")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    summary = batch_predict(args.input, args.output, args.workers, args.chunk_rows, args.threads)
+    logger.info(f"Terminé : {summary['rows']} incidents, {summary['errors']} erreurs, "
+                f"{summary['seconds']} secondes ({summary['rows_per_second']} incidents/s) : {args.output}")
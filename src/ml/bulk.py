@@ -0,0 +1,204 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : bulk.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : prédiction en masse d'un fichier d'incidents (CSV ou NDJSON)
+
+Tâches réalisées par ce script :
+ - Lecture du fichier par blocs de taille fixe (mémoire bornée quelle que soit sa taille)
+ - Schéma des incidents de preprocess.py : HourOfCall, IncidentGroup, PropertyCategory et
+   coordonnées (Latitude / Longitude, sinon Easting_rounded / Northing_rounded)
+ - Pour chaque bloc : conversion BNG > WGS84, recherche des stations et inférence vectorisées
+ - Production des résultats au format NDJSON, bloc par bloc
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.utils.geo_arrays import bng_to_wgs84
+from src.utils.metrics import STAGE_SECONDS
+
+# Nombre d'incidents lus et évalués par bloc
+BULK_CHUNK_ROWS = int(os.getenv('LFB_BULK_CHUNK_ROWS', '10000'))
+
+# Colonnes lues (les autres colonnes du fichier sont ignorées)
+BULK_COLUMNS = ['IncidentNumber', 'HourOfCall', 'HourOfCall_x', 'IncidentGroup', 'PropertyCategory',
+                'Latitude', 'Longitude', 'Easting_rounded', 'Northing_rounded']
+
+# Colonnes de la sortie (lignes valides)
+OUTPUT_COLUMNS = ['row', 'IncidentNumber', 'latitude', 'longitude', 'station', 'StationBorough',
+                  'DistanceToStation', 'prediction']
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Lecture par blocs
+---------------------------------------------------------------------------------------------------
+"""
+
+def iter_chunks(fileobj, fmt, chunk_rows=BULK_CHUNK_ROWS):
+    """
+    Lit un fichier d'incidents par blocs.
+
+    Args:
+        fileobj: Fichier binaire ou texte (UTF-8)
+        fmt (str): 'csv' ou 'ndjson'
+        chunk_rows (int): Nombre de lignes par bloc
+
+    Yields:
+        pd.DataFrame: Bloc d'incidents (colonnes de BULK_COLUMNS présentes dans le fichier)
+    """
+    if isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(fileobj, 'mode', ''):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8')
+
+    if fmt == 'csv':
+        reader = pd.read_csv(fileobj, chunksize=chunk_rows, usecols=lambda column: column in BULK_COLUMNS,
+                             dtype={'IncidentNumber': str, 'IncidentGroup': str, 'PropertyCategory': str})
+    elif fmt == 'ndjson':
+        reader = pd.read_json(fileobj, lines=True, chunksize=chunk_rows, dtype=False)
+    else:
+        raise ValueError(f"Format non pris en charge : {fmt}")
+
+    for chunk in reader:
+        yield chunk[[column for column in chunk.columns if column in BULK_COLUMNS]]
+
+
+def _column(chunk, *names):
+    """Retourne la première colonne présente parmi `names` (en float64), ou une colonne de NaN."""
+    for name in names:
+        if name in chunk.columns:
+            return pd.to_numeric(chunk[name], errors='coerce').to_numpy(dtype=np.float64, copy=True)
+    return np.full(len(chunk), np.nan)
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Évaluation d'un bloc
+---------------------------------------------------------------------------------------------------
+"""
+
+def score_frame(artifacts, chunk, offset=0):
+    """
+    Évalue un bloc d'incidents en une passe vectorisée.
+
+    Les lignes sans coordonnées exploitables, ou dont l'heure d'appel n'est pas un entier de 0 à
+    23 (même règle que les modèles de l'API), reçoivent une erreur ; les catégories inconnues
+    sont encodées à 0, comme pour les autres routes. Un numéro d'incident manquant vaut null.
+
+    Args:
+        artifacts (Artifacts): Instantané des artefacts
+        chunk (pd.DataFrame): Bloc d'incidents
+        offset (int): Numéro de la première ligne du bloc dans le fichier
+
+    Returns:
+        pd.DataFrame: Une ligne par incident, dans l'ordre du fichier (colonnes OUTPUT_COLUMNS et
+        'error', vide pour les lignes évaluées)
+    """
+    n_rows = len(chunk)
+    rows = np.arange(offset, offset + n_rows)
+
+    # Coordonnées : WGS84 si disponibles, sinon conversion vectorisée des coordonnées BNG
+    latitudes = _column(chunk, 'Latitude')
+    longitudes = _column(chunk, 'Longitude')
+    missing = np.isnan(latitudes) | np.isnan(longitudes)
+    if missing.any():
+        eastings = _column(chunk, 'Easting_rounded')[missing]
+        northings = _column(chunk, 'Northing_rounded')[missing]
+        bng_latitudes, bng_longitudes = bng_to_wgs84(eastings, northings)
+        latitudes[missing] = bng_latitudes
+        longitudes[missing] = bng_longitudes
+
+    hours = _column(chunk, 'HourOfCall', 'HourOfCall_x')
+    with np.errstate(invalid='ignore'):
+        valid_hours = (hours >= 0) & (hours <= 23) & (hours == np.floor(hours))
+    valid_coordinates = np.isfinite(latitudes) & np.isfinite(longitudes)
+    valid = valid_coordinates & valid_hours
+    errors = np.where(valid_coordinates, None, "Coordonnées manquantes")
+    errors[~valid_hours] = "Heure d'appel manquante ou invalide (entier de 0 à 23)"
+
+    incident_numbers = np.full(n_rows, None, dtype=object)
+    if 'IncidentNumber' in chunk.columns:
+        present = chunk['IncidentNumber'].notna().to_numpy()
+        incident_numbers[present] = chunk['IncidentNumber'][present].astype(str).to_numpy()
+    incident_groups = chunk['IncidentGroup'].to_numpy() if 'IncidentGroup' in chunk.columns else np.full(n_rows, '')
+    property_categories = (chunk['PropertyCategory'].to_numpy() if 'PropertyCategory' in chunk.columns
+                           else np.full(n_rows, ''))
+
+    result = pd.DataFrame({
+        'row': rows,
+        'IncidentNumber': incident_numbers,
+        'latitude': latitudes,
+        'longitude': longitudes,
+        'station': np.full(n_rows, None, dtype=object),
+        'StationBorough': np.full(n_rows, None, dtype=object),
+        'DistanceToStation': np.full(n_rows, np.nan),
+        'prediction': np.full(n_rows, np.nan),
+        'error': errors
+    }, columns=OUTPUT_COLUMNS + ['error'])
+
+    if valid.any():
+        # Station la plus proche et inférence pour toutes les lignes valides du bloc
+        with STAGE_SECONDS.time('station_search'):
+            indices, distances = artifacts.station_index.query(latitudes[valid], longitudes[valid], k=1)
+            station_positions, distances = indices[:, 0], distances[:, 0]
+        with STAGE_SECONDS.time('encoding'):
+            X = artifacts.features.build(hours[valid], incident_groups[valid], property_categories[valid],
+                                         latitudes[valid], longitudes[valid], station_positions, distances)
+        with STAGE_SECONDS.time('inference'):
+            predictions = artifacts.model.predict(X)
+
+        stations = artifacts.stations
+        result.loc[valid, 'station'] = stations['Station'].to_numpy()[station_positions]
+        result.loc[valid, 'StationBorough'] = stations['StationBorough'].to_numpy()[station_positions]
+        result.loc[valid, 'DistanceToStation'] = distances
+        result.loc[valid, 'prediction'] = predictions.astype(np.float64)
+
+    return result
+
+
+def score_chunk(artifacts, chunk, offset=0):
+    """
+    Évalue un bloc d'incidents (voir score_frame) et le met au format NDJSON.
+
+    Returns:
+        str: Une ligne JSON par incident, dans l'ordre du fichier (terminées par un saut de ligne) :
+        résultat, ou {"row", "IncidentNumber", "error"} pour une ligne non évaluée
+    """
+    result = score_frame(artifacts, chunk, offset)
+    valid = result['error'].isna().to_numpy()
+
+    lines = np.empty(len(result), dtype=object)
+    if valid.any():
+        lines[valid] = (result.loc[valid, OUTPUT_COLUMNS]
+                        .to_json(orient='records', lines=True, force_ascii=False).splitlines())
+    if not valid.all():
+        lines[~valid] = (result.loc[~valid, ['row', 'IncidentNumber', 'error']]
+                         .to_json(orient='records', lines=True, force_ascii=False).splitlines())
+
+    return "\n".join(lines) + "\n"
+
+
+def score_file(artifacts, fileobj, fmt, chunk_rows=BULK_CHUNK_ROWS):
+    """
+    Évalue un fichier d'incidents bloc par bloc.
+
+    Yields:
+        str: Résultats NDJSON d'un bloc (terminés par un saut de ligne)
+    """
+    offset = 0
+    for chunk in iter_chunks(fileobj, fmt, chunk_rows):
+        if len(chunk):
+            yield score_chunk(artifacts, chunk, offset)
+        offset += len(chunk)
@@ -0,0 +1,159 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : features.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : construction des variables du modèle pour l'inférence
+
+Tâches réalisées par ce script :
+ - Ordre des variables du modèle (FEATURE_COLUMNS)
+ - Pré-calcul des encodages propres à chaque station (station, arrondissement, caserne)
+ - Écriture des variables dans un tampon NumPy float32 préalloué (sans DataFrame)
+ - Construction de référence sous forme de DataFrame (contrôle de parité)
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Colonnes à utiliser (ordre des variables du modèle)
+FEATURE_COLUMNS = ['HourOfCall_x',
+                   'IncidentGroup',
+                   'IncidentStationGround',
+                   'PropertyCategory',
+                   'IncGeo_BoroughName',
+                   'DeployedFromStation_Name',
+                   'IncidentLatitude', 'IncidentLongitude',
+                   'StationLatitude', 'StationLongitude',
+                   'DistanceToStation']
+
+
+class FeatureBuilder:
+    """
+    Construit la matrice des variables du modèle directement dans un tampon float32.
+
+    Les encodages qui ne dépendent que de la station (IncidentStationGround, IncGeo_BoroughName,
+    DeployedFromStation_Name) sont calculés une seule fois par station à la construction. Chaque
+    thread dispose de son propre tampon, agrandi si nécessaire et réutilisé d'un appel à l'autre.
+
+    Le résultat est identique (au bit près) à celui de la DMatrix construite à partir du
+    DataFrame de référence : XGBoost convertit lui aussi les variables en float32.
+
+    Args:
+        encoders (Mapping): Encodeurs {colonne: {valeur: code}}
+        stations (pd.DataFrame): Liste des stations
+    """
+
+    def __init__(self, encoders, stations):
+        self.encoders = encoders
+
+        station_names = stations['Station'].to_numpy()
+        boroughs = stations['StationBorough'].to_numpy()
+
+        # Encodages par station (dans l'ordre de la table des stations)
+        self.station_codes = np.array(
+            [encoders['IncidentStationGround'].get(value, 0) for value in station_names], dtype=np.float32)
+        self.borough_codes = np.array(
+            [encoders['IncGeo_BoroughName'].get(value, 0) for value in boroughs], dtype=np.float32)
+        self.deployed_codes = np.array(
+            [encoders['DeployedFromStation_Name'].get(value, 0) for value in station_names], dtype=np.float32)
+        self.station_latitudes = stations['StationLatitude'].to_numpy(dtype=np.float64)
+        self.station_longitudes = stations['StationLongitude'].to_numpy(dtype=np.float64)
+
+        self._local = threading.local()
+
+    def _buffer(self, n_rows):
+        """Retourne une vue (n_rows, n_variables) sur le tampon du thread courant."""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape[0] < n_rows:
+            capacity = max(n_rows, 2 * (buffer.shape[0] if buffer is not None else 32))
+            buffer = np.empty((capacity, len(FEATURE_COLUMNS)), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer[:n_rows]
+
+    def encode(self, category, values):
+        """Encode une liste de valeurs catégorielles (0 pour une valeur inconnue)."""
+        encoder = self.encoders[category]
+        if isinstance(values, str):
+            return encoder.get(values, 0)
+        return [encoder.get(value, 0) for value in values]
+
+    def build(self,
+              HourOfCall,
+              IncidentGroup,
+              PropertyCategory,
+              latitudes,
+              longitudes,
+              station_positions,
+              distances):
+        """
+        Écrit les variables d'un lot d'incidents dans le tampon préalloué.
+
+        Les variables HourOfCall, IncidentGroup et PropertyCategory peuvent être des scalaires
+        (communs à tout le lot) ou des séquences.
+
+        Returns:
+            np.ndarray: Matrice float32 (n_incidents, 11), vue sur le tampon du thread courant ;
+            elle est réécrite au prochain appel dans le même thread.
+        """
+        station_positions = np.asarray(station_positions)
+        X = self._buffer(len(station_positions))
+
+        X[:, 0] = HourOfCall
+        X[:, 1] = self.encode('IncidentGroup', IncidentGroup)
+        X[:, 2] = self.station_codes[station_positions]
+        X[:, 3] = self.encode('PropertyCategory', PropertyCategory)
+        X[:, 4] = self.borough_codes[station_positions]
+        X[:, 5] = self.deployed_codes[station_positions]
+        X[:, 6] = latitudes
+        X[:, 7] = longitudes
+        X[:, 8] = self.station_latitudes[station_positions]
+        X[:, 9] = self.station_longitudes[station_positions]
+        X[:, 10] = distances
+
+        return X
+
+
+def build_feature_frame(encoders,
+                        stations,
+                        HourOfCall,
+                        IncidentGroup,
+                        PropertyCategory,
+                        latitudes,
+                        longitudes,
+                        station_positions,
+                        distances):
+    """
+    Construction de référence des variables sous forme de DataFrame nommé.
+
+    C'est la construction historique de predict() : elle sert de référence au contrôle de parité
+    du tampon float32 (tests/test_features.py, src/benchmarks/parity.py).
+
+    Returns:
+        pd.DataFrame: Une ligne par incident, dans l'ordre des colonnes du modèle
+    """
+    station_names = stations['Station'].to_numpy()[station_positions]
+    boroughs = stations['StationBorough'].to_numpy()[station_positions]
+
+    return pd.DataFrame({
+        'HourOfCall_x': np.asarray(HourOfCall, dtype=np.int64),
+        'IncidentGroup': [encoders['IncidentGroup'].get(value, 0) for value in IncidentGroup],
+        'IncidentStationGround': [encoders['IncidentStationGround'].get(value, 0) for value in station_names],
+        'PropertyCategory': [encoders['PropertyCategory'].get(value, 0) for value in PropertyCategory],
+        'IncGeo_BoroughName': [encoders['IncGeo_BoroughName'].get(value, 0) for value in boroughs],
+        'DeployedFromStation_Name': [encoders['DeployedFromStation_Name'].get(value, 0) for value in station_names],
+        'IncidentLatitude': latitudes,
+        'IncidentLongitude': longitudes,
+        'StationLatitude': stations['StationLatitude'].to_numpy()[station_positions],
+        'StationLongitude': stations['StationLongitude'].to_numpy()[station_positions],
+        'DistanceToStation': distances
+    }, columns=FEATURE_COLUMNS)
@@ -1,88 +1,276 @@
-import time
-import json
 import numpy as np
-import pandas as pd
-import xgboost as xgb
 
-from src.utils.geo_utils import address_to_lat_long, haversine
+from src.ml.artifacts import get_artifacts, registry
+from src.ml.result_cache import PredictionCache, PREDICTION_CACHE_ENABLED
+from src.utils.geo_utils import address_to_lat_long
+from src.utils.geo_arrays import bng_to_wgs84
+from src.utils.metrics import STAGE_SECONDS
+
+# Cache des résultats de prédiction, vidé à chaque rechargement des artefacts
+prediction_cache = PredictionCache() if PREDICTION_CACHE_ENABLED else None
+if prediction_cache is not None:
+    registry.add_listener(prediction_cache.clear)
+
+
+def predict_features(artifacts, X):
+    """
+    Calcule les prédictions du modèle sur une matrice float32 de variables.
+
+    Avec le moteur xgboost, la prédiction « en place » évite la construction d'une DMatrix ;
+    avec le moteur numpy, les arbres sont évalués sans xgboost (src/ml/trees.py).
+
+    Args:
+        artifacts (Artifacts): Instantané des artefacts
+        X (np.ndarray): Matrice float32 (n_incidents, 11) dans l'ordre de FEATURE_COLUMNS
+
+    Returns:
+        np.ndarray: Temps d'intervention prédits (secondes)
+    """
+    return artifacts.model.predict(X)
+
+
+def _per_row(value, n_rows):
+    """Répète une valeur scalaire pour chaque incident du lot."""
+    if isinstance(value, (str, int, np.integer)):
+        return [value] * n_rows
+    return list(value)
+
+
+def _predict_located(artifacts, latitudes, longitudes, HourOfCall, IncidentGroup, PropertyCategory):
+    """Recherche des stations et inférence pour un lot d'incidents localisés (sans cache)."""
+    df_stations = artifacts.stations
+
+    # Identification de la station la plus proche de chaque incident
+    with STAGE_SECONDS.time('station_search'):
+        indices, distances = artifacts.station_index.query(latitudes, longitudes, k=1)
+        station_positions, distances = indices[:, 0], distances[:, 0]
+
+    # Construction des variables dans le tampon float32 (sans DataFrame)
+    with STAGE_SECONDS.time('encoding'):
+        X_predict = artifacts.features.build(HourOfCall, IncidentGroup, PropertyCategory,
+                                             latitudes, longitudes, station_positions, distances)
+
+    # Calcul des prédictions (un seul appel au modèle pour tout le lot)
+    with STAGE_SECONDS.time('inference'):
+        predictions = predict_features(artifacts, X_predict)
+
+    return [
+        {
+            "latitude": float(latitudes[i]),
+            "longitude": float(longitudes[i]),
+            **_station_result(df_stations, position, distances[i], predictions[i])
+        }
+        for i, position in enumerate(station_positions)
+    ]
+
+
+def _station_result(df_stations, position, distance, prediction):
+    """Champs du résultat propres à une station (station, arrondissement, position, distance, prédiction)."""
+    return {
+        "station": df_stations['Station'].iat[position],
+        "StationBorough": df_stations['StationBorough'].iat[position],
+        "StationLatitude": float(df_stations['StationLatitude'].iat[position]),
+        "StationLongitude": float(df_stations['StationLongitude'].iat[position]),
+        "DistanceToStation": float(distance),
+        "prediction": float(prediction)
+    }
+
+
+def predict_coordinates_batch(latitudes,
+                              longitudes,
+                              HourOfCall,
+                              IncidentGroup,
+                              PropertyCategory,
+                              artifacts=None,
+                              use_cache=True):
+    """
+    Prédit le temps d'intervention d'un lot d'incidents dont les coordonnées sont connues.
+
+    Les incidents présents dans le cache des résultats ne sont pas recalculés. Pour les autres,
+    la recherche des stations les plus proches est faite en une passe vectorisée sur l'index
+    spatial, puis le modèle est appelé une seule fois sur la matrice complète.
+
+    Returns:
+        list: Un dictionnaire de résultat par incident, dans l'ordre d'entrée
+    """
+    # Récupération des artefacts partagés (modèle, encodeurs, stations)
+    if artifacts is None:
+        artifacts = get_artifacts()
+
+    latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+    n_rows = len(latitudes)
+    HourOfCall = _per_row(HourOfCall, n_rows)
+    IncidentGroup = _per_row(IncidentGroup, n_rows)
+    PropertyCategory = _per_row(PropertyCategory, n_rows)
+
+    cache = prediction_cache if use_cache else None
+    if cache is None:
+        return _predict_located(artifacts, latitudes, longitudes, HourOfCall, IncidentGroup, PropertyCategory)
+
+    # Recherche des résultats en cache
+    results = [None] * n_rows
+    keys = [cache.key(latitudes[i], longitudes[i], HourOfCall[i], IncidentGroup[i], PropertyCategory[i],
+                      artifacts.version)
+            for i in range(n_rows)]
+    for i, key in enumerate(keys):
+        cached = cache.get(key)
+        if cached is not None:
+            results[i] = dict(cached, latitude=float(latitudes[i]), longitude=float(longitudes[i]))
+
+    # Calcul des incidents absents du cache
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = _predict_located(artifacts,
+                                    latitudes[missing],
+                                    longitudes[missing],
+                                    [HourOfCall[i] for i in missing],
+                                    [IncidentGroup[i] for i in missing],
+                                    [PropertyCategory[i] for i in missing])
+        for i, result in zip(missing, computed):
+            # Copie en cache : le résultat retourné peut être modifié par l'appelant
+            cache.put(keys[i], dict(result))
+            results[i] = result
+
+    return results
+
+
+def predict_candidates(latitude,
+                       longitude,
+                       HourOfCall,
+                       IncidentGroup,
+                       PropertyCategory,
+                       k_candidates,
+                       artifacts=None):
+    """
+    Prédit le temps d'intervention depuis chacune des k stations les plus proches de l'incident.
+
+    La station la plus proche n'est pas toujours la plus rapide : une ligne de variables est
+    construite par station candidate (station, arrondissement, distance) et toutes les lignes
+    sont évaluées en un seul appel au modèle. Le cache des résultats n'est pas utilisé.
+
+    Returns:
+        dict: Résultat de la station la plus rapide, avec la liste "candidates" des stations
+        classées par temps prédit croissant
+    """
+    if artifacts is None:
+        artifacts = get_artifacts()
+    df_stations = artifacts.stations
+
+    # Les k stations les plus proches (triées par distance)
+    with STAGE_SECONDS.time('station_search'):
+        indices, distances = artifacts.station_index.query(latitude, longitude, k=k_candidates)
+        station_positions, distances = indices[0], distances[0]
+    n_candidates = len(station_positions)
+
+    # Une ligne de variables par station candidate
+    with STAGE_SECONDS.time('encoding'):
+        X_predict = artifacts.features.build(HourOfCall, IncidentGroup, PropertyCategory,
+                                             np.full(n_candidates, latitude, dtype=np.float64),
+                                             np.full(n_candidates, longitude, dtype=np.float64),
+                                             station_positions, distances)
+
+    # Un seul appel au modèle pour toutes les candidates
+    with STAGE_SECONDS.time('inference'):
+        predictions = predict_features(artifacts, X_predict)
+
+    candidates = [
+        {"rank": rank, **_station_result(df_stations, station_positions[i], distances[i], predictions[i])}
+        for rank, i in enumerate(np.argsort(predictions, kind='stable'), start=1)
+    ]
+    best = {key: value for key, value in candidates[0].items() if key != "rank"}
+
+    return {
+        "latitude": float(latitude),
+        "longitude": float(longitude),
+        **best,
+        "candidates": candidates
+    }
+
 
 def predict(address,
            HourOfCall,
            IncidentGroup,
            PropertyCategory):
-    
-    # Récupération du modèle XGBoost
-    xgb_model = xgb.Booster()
-    xgb_model.load_model('./models/model-XGB.json')
-
-    # Récupération des encodeurs depuis le JSON
-    with open('./models/encoders.json', 'r') as f:
-        encoders = json.load(f)
-        
-    # Création des encodeurs à partir des classes stockées
-    l_e_ = {
-        category: {value: idx for idx, value in enumerate(values)}
-        for category, values in encoders.items()
-    }
-    
-    # Récupération des données géospatiales sur les stations de pompiers
-    df_stations = pd.read_csv('./data/3_external/final_stations_list.csv')
-
-    # Colonnes à utiliser 
-    columns = ['HourOfCall_x', 
-               'IncidentGroup', 
-               'IncidentStationGround',
-               'PropertyCategory', 
-               'IncGeo_BoroughName', 
-               'DeployedFromStation_Name',
-               'IncidentLatitude', 'IncidentLongitude', 
-               'StationLatitude', 'StationLongitude', 
-               'DistanceToStation']
 
     # Récupération de la latitude et de la longitude du lieu de l'incident
     latitude, longitude = address_to_lat_long(address)
 
-    # Calcul des distances entre le lieu de l'incident et les stations
-    df_stations['DistanceToStation'] = df_stations.apply(
-        lambda row: haversine(row['StationLatitude'], row['StationLongitude'], 
-                            latitude, longitude),
-        axis=1)
-
-    # Identification de la station la plus proche
-    station = df_stations.iloc[df_stations['DistanceToStation'].idxmin()]
-
-    # Construction des variables pour la prédiction
-    incident_encoded = l_e_['IncidentGroup'].get(IncidentGroup, 0)
-    station_encoded = l_e_['IncidentStationGround'].get(station['Station'], 0)
-    property_encoded = l_e_['PropertyCategory'].get(PropertyCategory, 0)
-    borough_encoded = l_e_['IncGeo_BoroughName'].get(station['StationBorough'], 0)
-    deployed_encoded = l_e_['DeployedFromStation_Name'].get(station['Station'], 0)
-
-    X_predict = pd.DataFrame(data=[[
-        HourOfCall,
-        incident_encoded,
-        station_encoded,
-        property_encoded,
-        borough_encoded,
-        deployed_encoded,
-        latitude, longitude,
-        station["StationLatitude"], station["StationLongitude"],
-        station["DistanceToStation"]
-    ]], columns=columns)
-    
-    # Conversion en DMatrix pour XGBoost
-    dmatrix = xgb.DMatrix(X_predict)
-    
-    # Calcul de la prédiction
-    prediction = float(xgb_model.predict(dmatrix)[0])
-    
-    return {
-        "latitude": latitude,
-        "longitude": longitude,
-        "station": station['Station'],
-        "StationBorough": station['StationBorough'],
-        "StationLatitude": station["StationLatitude"],
-        "StationLongitude": station["StationLongitude"],
-        "DistanceToStation": station["DistanceToStation"],
-        "prediction": prediction
-    }
\ No newline at end of file
+    return predict_coordinates_batch([latitude], [longitude],
+                                     [HourOfCall], [IncidentGroup], [PropertyCategory])[0]
+
+
+def predict_coordinates(HourOfCall,
+                        IncidentGroup,
+                        PropertyCategory,
+                        latitude=None,
+                        longitude=None,
+                        easting=None,
+                        northing=None):
+    """
+    Prédit le temps d'intervention à partir des coordonnées de l'incident, sans géocodage.
+
+    Les coordonnées sont fournies soit en WGS84 (latitude, longitude), soit en British National
+    Grid (easting, northing) ; ces dernières sont converties comme lors de l'entraînement.
+
+    Returns:
+        dict: Résultat de la prédiction
+    """
+    if latitude is None or longitude is None:
+        latitude, longitude = bng_to_wgs84(easting, northing)
+
+    return predict_coordinates_batch([latitude], [longitude],
+                                     [HourOfCall], [IncidentGroup], [PropertyCategory])[0]
+
+
+def predict_batch(items):
+    """
+    Prédit le temps d'intervention d'un lot de requêtes.
+
+    Chaque adresse distincte n'est géocodée qu'une fois ; les requêtes dont les coordonnées
+    sont déjà fournies ne sont pas géocodées. Les prédictions sont calculées en un seul appel.
+
+    Args:
+        items (list): Requêtes (address, latitude, longitude, HourOfCall, IncidentGroup, PropertyCategory)
+
+    Returns:
+        list: Pour chaque requête, dans l'ordre d'entrée, {"index", "result"} ou {"index", "error"}
+    """
+    # Géocodage des adresses distinctes
+    coordinates = {}
+    errors = {}
+    for item in items:
+        if item.latitude is not None and item.longitude is not None:
+            continue
+        if item.address in coordinates or item.address in errors:
+            continue
+        try:
+            coordinates[item.address] = address_to_lat_long(item.address)
+        except Exception as e:
+            errors[item.address] = f"Erreur lors du géocodage : {str(e)}"
+
+    # Sélection des requêtes localisées
+    responses = [None] * len(items)
+    located = []
+    for i, item in enumerate(items):
+        if item.latitude is not None and item.longitude is not None:
+            located.append((i, item.latitude, item.longitude))
+        elif item.address in coordinates:
+            located.append((i, *coordinates[item.address]))
+        else:
+            responses[i] = {"index": i, "error": errors[item.address]}
+
+    # Calcul des prédictions pour toutes les requêtes localisées
+    if located:
+        positions = [i for i, _, _ in located]
+        results = predict_coordinates_batch(
+            [latitude for _, latitude, _ in located],
+            [longitude for _, _, longitude in located],
+            [items[i].HourOfCall for i in positions],
+            [items[i].IncidentGroup for i in positions],
+            [items[i].PropertyCategory for i in positions]
+        )
+        for i, result in zip(positions, results):
+            responses[i] = {"index": i, "result": result}
+
+    return responses
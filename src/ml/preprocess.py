@@ -2,15 +2,15 @@
 ---------------------------------------------------------------------------------------------------
 Nom du script : preprocess.py
 
-Dernière mise à jour : dimanche 26 janvier 2025
+Dernière mise à jour : samedi 17 octobre 2026
 
 Fonction de ce script : préparation des données pour la modélisation et la prédiction
 
 Tâches réalisées par ce script :
- - Chargement des données d'incidents
+ - Chargement des données d'incidents (cache Parquet typé des CSV bruts, colonnes utiles uniquement)
  - Concaténation des données d'incidents : df_incidents
  - Traitement des valeurs manquantes (FirstPumpArriving_AttendanceTime)
- - Chargement des données de mobilisation
+ - Chargement des données de mobilisation (cache Parquet typé des CSV bruts, colonnes utiles uniquement)
  - Concaténation des données de mobilisation : df_mobilisation
  - Jointure des données d'incidents et de mobilisations (colonne 'IncidentNumber')  : df_incidents_mobilisations
  - Sélection de colonnes
@@ -50,11 +50,11 @@ import time
 import logging
 import numpy as np
 import pandas as pd
-from pyproj import Transformer
 from sklearn.preprocessing import LabelEncoder
 import json
 
-from src.utils.geo_utils import haversine
+from src.data.ingest import load_sources
+from src.utils.geo_arrays import haversine, bng_to_wgs84
 
 
 
@@ -77,6 +77,13 @@ path_mobilisation_1 = "./data/2_CSV/mobilisation_2009_2014.csv"
 path_mobilisation_2 = "./data/2_CSV/mobilisation_2015_2020.csv"
 path_mobilisation_3 = "./data/2_CSV/mobilisation_2021_2024.csv"
 
+# colonnes lues dans le cache Parquet des CSV bruts (src/data/ingest.py)
+# ('HourOfCall' est lue des deux côtés : la jointure produit 'HourOfCall_x')
+incident_columns = ['IncidentNumber', 'HourOfCall', 'IncidentGroup', 'IncidentStationGround', 'PropertyCategory',
+                    'Northing_rounded', 'Easting_rounded', 'IncGeo_BoroughName', 'Latitude', 'Longitude',
+                    'FirstPumpArriving_AttendanceTime']
+mobilisation_columns = ['IncidentNumber', 'HourOfCall', 'DeployedFromStation_Name', 'AttendanceTimeSeconds']
+
 # données des stations
 path_to_stations="./data/3_external/final_stations_list.csv"
 
@@ -178,7 +185,7 @@ def preprocess(path_incident_1,
     # LOG - Construction du message à logger
     message = ["",
                "",
-               "TRAITEMENT - Chargement des données d'incidents :",
+               "TRAITEMENT - Chargement des données d'incidents (en parallèle avec les données de mobilisation) :",
                f" - df_incidents_1 : {path_incident_1}",
                f" - df_incidents_2 : {path_incident_2}",
                "...",
@@ -186,9 +193,31 @@ def preprocess(path_incident_1,
                ]
     logger.info("\n".join(message))
 
-    # TRAITEMENT - Chargement des données d'incidents
-    df_incidents_1 = pd.read_csv(path_incident_1, low_memory=False)
-    df_incidents_2 = pd.read_csv(path_incident_2, low_memory=False)
+    # TRAITEMENT - Chargement des données d'incidents et de mobilisation, en parallèle (un processus par fichier)
+    # TRAITEMENT - ... depuis le cache Parquet typé (CSV convertis une seule fois), colonnes utiles uniquement ;
+    # TRAITEMENT - ... vérification des colonnes et suppression des incidents sans FirstPumpArriving_AttendanceTime
+    # TRAITEMENT - ... dans les processus
+    try:
+        sources = load_sources({
+            'incidents_1': (path_incident_1, incident_columns, ['FirstPumpArriving_AttendanceTime']),
+            'incidents_2': (path_incident_2, incident_columns, ['FirstPumpArriving_AttendanceTime']),
+            'mobilisation_1': (path_mobilisation_1, mobilisation_columns, []),
+            'mobilisation_2': (path_mobilisation_2, mobilisation_columns, []),
+            'mobilisation_3': (path_mobilisation_3, mobilisation_columns, [])
+        })
+    except ValueError as e:
+        # TEST UNITAIRE - Colonne utile absente d'un fichier (vérification faite dans les processus)
+        message = ["",
+                   "",
+                   f"TEST UNITAIRE - {e}",
+                   "TEST UNITAIRE - Arrêt du script",
+                   "",
+                   "--------------------------------------------------------------------------------------------------------------------------"
+                   ]
+        logger.info("\n".join(message))
+        return
+    df_incidents_1, incident_columns_1 = sources['incidents_1']
+    df_incidents_2, incident_columns_2 = sources['incidents_2']
 
     # LOG - Construction du message à logger
     message = ["",
@@ -226,7 +255,8 @@ def preprocess(path_incident_1,
 
     # TRAITEMENT - Concaténation
     # TEST UNITAIRE - Vérifier que df_incidents_1 et df_incidents_2 ont bien le même nombre de colonnes
-    if (df_incidents_1.shape[1] == df_incidents_2.shape[1]):
+    # TEST UNITAIRE - ... (colonnes des CSV complets, retournées par le chargement)
+    if (len(incident_columns_1) == len(incident_columns_2)):
         df_incidents = pd.concat([df_incidents_1, df_incidents_2])
     else:
         message = ["",
@@ -275,9 +305,11 @@ def preprocess(path_incident_1,
     logger.info("\n".join(message))
 
     # TRAITEMENT - Chargement des données de mobilisation
-    df_mobilisation_1 = pd.read_csv(path_mobilisation_1, low_memory=False)
-    df_mobilisation_2 = pd.read_csv(path_mobilisation_2, low_memory=False)
-    df_mobilisation_3 = pd.read_csv(path_mobilisation_3, low_memory=False)
+    # TRAITEMENT - ... (déjà chargées, en parallèle avec les données d'incidents)
+    df_mobilisation_1 = sources['mobilisation_1'][0]
+    df_mobilisation_2 = sources['mobilisation_2'][0]
+    df_mobilisation_3 = sources['mobilisation_3'][0]
+    del sources
 
     # TRAITEMENT - Concaténation des données de mobilisation : df_mobilisation
     df_mobilisation = pd.concat([df_mobilisation_1, df_mobilisation_2, df_mobilisation_3])
@@ -365,15 +397,12 @@ def preprocess(path_incident_1,
                ]
     logger.info("\n".join(message))
 
-    # TRAITEMENT - Création d'un transformateur pour la conversion ...
-    # TRAITEMENT - ... (Easting_rounded, Northing_rounded) > (Latitude, Longitude)
-    transformer = Transformer.from_crs("epsg:27700", "epsg:4326")
-
     # TRAITEMENT - Calcul de IncidentLatitude et IncidentLongitude
-    df_incidents_mobilisations['IncidentLatitude'], df_incidents_mobilisations['IncidentLongitude'] = zip(
-        *df_incidents_mobilisations.apply(lambda row: transformer.transform(row['Easting_rounded'], 
-                                                                            row['Northing_rounded']),
-                                        axis=1))
+    # TRAITEMENT - ... conversion (Easting_rounded, Northing_rounded) > (Latitude, Longitude) des colonnes
+    # TRAITEMENT - ... entières en un seul appel (même fonction que pour la prédiction)
+    df_incidents_mobilisations['IncidentLatitude'], df_incidents_mobilisations['IncidentLongitude'] = bng_to_wgs84(
+        df_incidents_mobilisations['Easting_rounded'].to_numpy(dtype=np.float64),
+        df_incidents_mobilisations['Northing_rounded'].to_numpy(dtype=np.float64))
 
     # TRAITEMENT - Suppression des colonnes 'Northing_rounded', 'Easting_rounded', 'Latitude', 'Longitude'
     df_incidents_mobilisations = df_incidents_mobilisations.drop(columns=['Northing_rounded', 'Easting_rounded', 
@@ -472,12 +501,11 @@ def preprocess(path_incident_1,
     logger.info("\n".join(message))
 
     # TRAITEMENT - Calcul de la distance entre l'incident et la station avec la fonction Haversine
-    df_modelisation['DistanceToStation'] = df_modelisation.apply(
-        lambda row: haversine(row['IncidentLatitude'], row['IncidentLongitude'], 
-                            row['StationLatitude'], row['StationLongitude']
-                            ),
-        axis=1
-    )
+    # TRAITEMENT - ... sur les colonnes entières (même fonction que pour la prédiction)
+    df_modelisation['DistanceToStation'] = haversine(df_modelisation['IncidentLatitude'].to_numpy(),
+                                                     df_modelisation['IncidentLongitude'].to_numpy(),
+                                                     df_modelisation['StationLatitude'].to_numpy(),
+                                                     df_modelisation['StationLongitude'].to_numpy())
 
     # LOG - Construction du message à logger
     message = ["",
@@ -500,7 +528,8 @@ def preprocess(path_incident_1,
     """
 
     # TRAITEMENT - Détection des colonnes de type 'object'
-    non_numeric_cols = df_modelisation.select_dtypes(include=['object']).columns
+    # TRAITEMENT - ... (ou 'category' : catégories encodées par dictionnaire dans le cache Parquet)
+    non_numeric_cols = df_modelisation.select_dtypes(include=['object', 'category']).columns
 
     # LOG - Construction du message à logger
     message = ["",
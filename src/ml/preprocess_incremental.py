@@ -0,0 +1,432 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : preprocess_incremental.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : préparation incrémentale des données pour la modélisation (par mois)
+
+Tâches réalisées par ce script :
+ - Jeu de données de modélisation partitionné par année et par mois de l'incident
+   (data/4_processed/modelisation/year=AAAA/month=MM/*.parquet), et manifeste des partitions
+   déjà traitées
+ - À chaque exécution, seules les sources modifiées (empreinte SHA-256 du cache brut) sont
+   relues, d'abord leur seule colonne CalYear : les années dont le nombre de lignes a changé
+   sont les seules lues ensuite (filtre pyarrow sur CalYear, sans parcourir l'historique)
+ - Un mois est traité s'il est absent du manifeste ou si son nombre d'incidents ou de
+   mobilisations a changé (mois publié partiellement puis complété, correction tardive) : ses
+   fichiers sont alors réécrits, avec les mêmes traitements que preprocess_stream.py
+ - Encodeurs en ajout seul : les valeurs nouvelles reçoivent les codes suivants, les codes
+   existants ne sont jamais renumérotés ; à la première exécution, les codes sont repris des
+   encodeurs déployés (models/encoders.json) pour rester ceux du modèle servi
+ - Encodeurs écrits dans le répertoire du jeu de données (encoders.json), jamais sur l'artefact
+   servi par l'API, qui le recharge à chaud : ils sont déployés avec le modèle réentraîné
+ - Résumé de chaque partition (nombre de lignes, décompte des valeurs de
+   AttendanceTimeSeconds) : les quantiles Q1 et Q3 et les bornes du filtre des outliers sont
+   recalculés à partir des résumés, sans relire les partitions
+ - Les partitions sont stockées avant filtre des outliers ; le filtre, qui dépend des bornes
+   courantes, est appliqué à la lecture (load_modelisation, export_csv)
+
+Une correction qui ne change pas le nombre de lignes d'un mois (valeur modifiée sur place) n'est
+pas détectée : elle nécessite --rebuild.
+
+Utilisation :
+
+    python -m src.ml.preprocess_incremental                 # traite les nouveaux mois
+    python -m src.ml.preprocess_incremental --export-csv    # et écrit df_modelisation.csv
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.data.ingest import ingest, ingest_all, read_manifest as read_raw_manifest, RAW_CACHE_DIR
+from src.ml.preprocess_stream import (incident_index, incident_partitions, transform_chunk, quantile_from_counts,
+                                      peak_memory_mb, check_encoders_path, CATEGORICAL_COLUMNS, MOBILISATION_COLUMNS,
+                                      OUTPUT_COLUMNS, CHUNK_ROWS, DEPLOYED_ENCODERS_PATH)
+from src.ml import preprocess as paths
+
+logger = logging.getLogger(__name__)
+
+# Répertoire du jeu de données de modélisation partitionné
+MODELISATION_DIR = os.getenv('LFB_MODELISATION_DIR', './data/4_processed/modelisation')
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Manifeste
+---------------------------------------------------------------------------------------------------
+"""
+
+def read_manifest(dataset_dir=MODELISATION_DIR):
+    """
+    Retourne le manifeste du jeu de données.
+
+    Returns:
+        dict: {"partitions": {'AAAA-MM': résumé}, "encoders": {colonne: classes},
+        "bounds": [lower_bound, upper_bound], "sources": {CSV: sha256},
+        "source_years": {CSV: {année: nombre de lignes}}}
+    """
+    try:
+        with open(Path(dataset_dir) / '_manifest.json', 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"partitions": {}, "encoders": {column: [] for column in CATEGORICAL_COLUMNS},
+                "bounds": None, "sources": {}, "source_years": {}}
+
+
+def write_manifest(manifest, dataset_dir=MODELISATION_DIR):
+    """Écrit le manifeste (écriture atomique, après les partitions)."""
+    path = Path(dataset_dir) / '_manifest.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _partition_dir(dataset_dir, partition):
+    year, month = partition.split('-')
+    return Path(dataset_dir) / f"year={year}" / f"month={month}"
+
+
+def compute_bounds(partitions):
+    """
+    Bornes du filtre des outliers (Q1 - 1.5 * IQR, Q3 + 1.5 * IQR) à partir des résumés des
+    partitions (décompte des valeurs de AttendanceTimeSeconds).
+    """
+    counts = {}
+    for summary in partitions.values():
+        for value, count in summary["attendance_counts"].items():
+            counts[float(value)] = counts.get(float(value), 0) + count
+    if not counts:
+        return None
+
+    values = np.array(sorted(counts))
+    Q1 = quantile_from_counts(values, np.array([counts[value] for value in values]), 0.25)
+    Q3 = quantile_from_counts(values, np.array([counts[value] for value in values]), 0.75)
+    IQR = Q3 - Q1
+    return [float(Q1 - 1.5 * IQR), float(Q3 + 1.5 * IQR)]
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Traitement incrémental
+---------------------------------------------------------------------------------------------------
+"""
+
+def seed_encoders(manifest_encoders, deployed_path=DEPLOYED_ENCODERS_PATH):
+    """
+    Vocabulaires de départ : ceux du manifeste, ou, pour une colonne encore vide (première
+    exécution), ceux des encodeurs déployés, afin de conserver les codes du modèle servi.
+
+    Un vocabulaire du manifeste qui ne prolonge pas celui des encodeurs déployés (codes
+    différents) est signalé : les encodeurs produits ne doivent pas être servis avec ce modèle.
+    """
+    try:
+        with open(deployed_path, 'r') as f:
+            deployed = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Encodeurs déployés introuvables ({deployed_path}) : codes attribués à partir de zéro")
+        deployed = {}
+
+    encoders = {}
+    for column in CATEGORICAL_COLUMNS:
+        classes = list(manifest_encoders.get(column, []))
+        deployed_classes = deployed.get(column, [])
+        if not classes:
+            classes = list(deployed_classes)
+        elif classes[:len(deployed_classes)] != deployed_classes:
+            logger.warning(f"{column} : codes différents de ceux des encodeurs déployés ({deployed_path})")
+        encoders[column] = classes
+    return encoders
+
+
+def encode_append(chunk, encoders, codes):
+    """
+    Encode les colonnes catégorielles d'un bloc ; les valeurs inconnues sont ajoutées à la fin
+    des vocabulaires (codes suivants, dans l'ordre alphabétique).
+    """
+    for column in CATEGORICAL_COLUMNS:
+        new_values = sorted(set(chunk[column].unique()) - codes[column].keys())
+        for value in new_values:
+            codes[column][value] = len(encoders[column])
+            encoders[column].append(value)
+    return chunk.assign(**{column: chunk[column].map(codes[column]).astype(np.int64)
+                            for column in CATEGORICAL_COLUMNS})
+
+
+def changed_years(paths, manifest, cache_dir=RAW_CACHE_DIR):
+    """
+    Années (CalYear) dont le nombre de lignes a changé depuis la dernière exécution.
+
+    Seules les sources dont l'empreinte (SHA-256 du cache brut) a changé sont relues, et d'elles
+    la seule colonne CalYear.
+
+    Returns:
+        tuple: (ensemble des années modifiées, {CSV: {année: nombre de lignes}} à jour)
+    """
+    raw_manifest = read_raw_manifest(cache_dir)
+    source_years = dict(manifest.get("source_years", {}))
+    years = set()
+    for path in paths:
+        name = Path(path).name
+        sha256 = raw_manifest.get(name, {}).get("sha256")
+        if name in source_years and sha256 == manifest["sources"].get(name):
+            continue
+
+        calyears = pq.read_table(ingest(path, cache_dir), columns=['CalYear'])['CalYear'].to_pandas()
+        counts = {str(year): int(count) for year, count in calyears.value_counts().items()}
+        previous = source_years.get(name, {})
+        years |= {int(year) for year in counts.keys() | previous.keys() if counts.get(year) != previous.get(year)}
+        source_years[name] = counts
+    return years, source_years
+
+
+def month_rows(incident_paths, mobilisation_paths, years, cache_dir=RAW_CACHE_DIR, chunk_rows=CHUNK_ROWS):
+    """
+    Nombre d'incidents (avec FirstPumpArriving_AttendanceTime) et de mobilisations de ces
+    incidents, pour chaque mois des années `years` ; seules les lignes de ces années sont lues.
+
+    Returns:
+        dict: {'AAAA-MM': {"incidents": nombre, "mobilisations": nombre}}
+    """
+    condition = ds.field('CalYear').isin(sorted(years))
+
+    # Partition de chaque incident des années lues
+    frames = []
+    for path in incident_paths:
+        frame = ds.dataset(ingest(path, cache_dir), format='parquet').to_table(
+            columns=['IncidentNumber', 'DateOfCall'],
+            filter=condition & ds.field('FirstPumpArriving_AttendanceTime').is_valid()).to_pandas()
+        frames.append(pd.Series(incident_partitions(frame['DateOfCall']).to_numpy(), index=frame['IncidentNumber']))
+    partitions = pd.concat(frames).dropna()
+    partitions = partitions[~partitions.index.duplicated()]
+
+    counts = {partition: {"incidents": int(count), "mobilisations": 0}
+              for partition, count in partitions.value_counts().items()}
+    for path in mobilisation_paths:
+        dataset = ds.dataset(ingest(path, cache_dir), format='parquet')
+        for batch in dataset.to_batches(columns=['IncidentNumber'], filter=condition, batch_size=chunk_rows):
+            for partition, count in batch.column('IncidentNumber').to_pandas().map(partitions).value_counts().items():
+                counts[partition]["mobilisations"] += int(count)
+    return counts
+
+
+def preprocess_incremental(incident_paths,
+                           mobilisation_paths,
+                           path_to_stations,
+                           dataset_dir=MODELISATION_DIR,
+                           path_to_encoders=None,
+                           chunk_rows=CHUNK_ROWS,
+                           cache_dir=RAW_CACHE_DIR,
+                           deployed_encoders_path=DEPLOYED_ENCODERS_PATH):
+    """
+    Ajoute au jeu de données partitionné les mois d'incidents pas encore traités, et retraite
+    ceux dont le nombre d'incidents ou de mobilisations a changé.
+
+    Les encodeurs sont écrits dans `path_to_encoders` (défaut : encoders.json du jeu de
+    données) ; écrire sur les encodeurs servis par l'API est refusé.
+
+    Returns:
+        dict: Partitions (ré)écrites, nombre de lignes, bornes, durée et pic de mémoire (Mo)
+    """
+    start_time = time.time()
+    manifest = read_manifest(dataset_dir)
+
+    if path_to_encoders is None:
+        path_to_encoders = Path(dataset_dir) / 'encoders.json'
+    check_encoders_path(path_to_encoders, deployed_encoders_path)
+
+    # Mise à jour du cache des CSV bruts, en parallèle (un processus par fichier)
+    ingest_all(list(incident_paths) + list(mobilisation_paths), cache_dir=cache_dir)
+
+    # Années modifiées dans les sources, puis mois nouveaux ou modifiés de ces années
+    source_paths = list(incident_paths) + list(mobilisation_paths)
+    years, source_years = changed_years(source_paths, manifest, cache_dir)
+    rows_by_month = month_rows(incident_paths, mobilisation_paths, years, cache_dir, chunk_rows) if years else {}
+    new_partitions = sorted(partition for partition, rows in rows_by_month.items()
+                            if manifest["partitions"].get(partition, {}).get("source_rows") != rows)
+    removed_partitions = sorted(partition for partition in manifest["partitions"]
+                                if int(partition[:4]) in years and partition not in rows_by_month)
+
+    raw_manifest = read_raw_manifest(cache_dir)
+    manifest["sources"] = {Path(path).name: raw_manifest.get(Path(path).name, {}).get("sha256")
+                           for path in source_paths}
+    manifest["source_years"] = source_years
+
+    # Mois disparus des sources : supprimés
+    for partition in removed_partitions:
+        shutil.rmtree(_partition_dir(dataset_dir, partition), ignore_errors=True)
+        del manifest["partitions"][partition]
+
+    if not new_partitions:
+        logger.info("Aucun mois nouveau ou modifié à traiter")
+        manifest["bounds"] = compute_bounds(manifest["partitions"])
+        write_manifest(manifest, dataset_dir)
+        return {"partitions": [], "rows": 0, "bounds": manifest["bounds"],
+                "seconds": round(time.time() - start_time, 3), "peak_memory_mb": round(peak_memory_mb())}
+
+    # Index des incidents des mois à traiter uniquement
+    incidents = incident_index(incident_paths, cache_dir, partitions=set(new_partitions))
+    logger.info(f"Mois à traiter : {', '.join(new_partitions)} ({len(incidents)} incidents)")
+
+    # Mois modifiés, ou fichiers d'une exécution interrompue : supprimés puis réécrits
+    for partition in new_partitions:
+        shutil.rmtree(_partition_dir(dataset_dir, partition), ignore_errors=True)
+
+    df_stations = pd.read_csv(path_to_stations)
+    encoders = seed_encoders(manifest["encoders"], deployed_encoders_path)
+    codes = {column: {value: code for code, value in enumerate(classes)} for column, classes in encoders.items()}
+    summaries = {partition: {"rows": 0, "attendance_counts": {}, "source_rows": rows_by_month[partition]}
+                 for partition in new_partitions}
+    run_id = uuid.uuid4().hex[:8]
+    n_rows = 0
+    n_files = 0
+
+    # Mobilisations des années à traiter lues par blocs (colonnes utiles) ; seules celles des
+    # incidents des mois à traiter sont jointes
+    condition = ds.field('CalYear').isin(sorted({int(partition[:4]) for partition in new_partitions}))
+    for path in mobilisation_paths:
+        dataset = ds.dataset(ingest(path, cache_dir), format='parquet')
+        for batch in dataset.to_batches(columns=MOBILISATION_COLUMNS, filter=condition, batch_size=chunk_rows):
+            chunk = transform_chunk(batch.to_pandas(), incidents, df_stations, extra_columns=['Partition'])
+            if chunk.empty:
+                continue
+            chunk = encode_append(chunk, encoders, codes)
+
+            for partition, rows in chunk.groupby('Partition', observed=True):
+                rows = rows[OUTPUT_COLUMNS]
+                summary = summaries[partition]
+                summary["rows"] += len(rows)
+                for value, count in rows['AttendanceTimeSeconds'].value_counts().items():
+                    key = repr(float(value))
+                    summary["attendance_counts"][key] = summary["attendance_counts"].get(key, 0) + int(count)
+
+                partition_dir = _partition_dir(dataset_dir, partition)
+                partition_dir.mkdir(parents=True, exist_ok=True)
+                pq.write_table(pa.Table.from_pandas(rows, preserve_index=False),
+                               partition_dir / f"part-{run_id}-{n_files:05d}.parquet")
+                n_files += 1
+
+            n_rows += len(chunk)
+            logger.info(f"{n_rows} lignes ajoutées ({round(time.time() - start_time)} secondes, "
+                        f"pic de mémoire {peak_memory_mb():.0f} Mo)")
+
+    # Mise à jour du manifeste : résumés, encodeurs, bornes recalculées
+    manifest["partitions"].update(summaries)
+    manifest["encoders"] = encoders
+    manifest["bounds"] = compute_bounds(manifest["partitions"])
+
+    Path(path_to_encoders).parent.mkdir(parents=True, exist_ok=True)
+    with open(path_to_encoders, 'w') as f:
+        json.dump(encoders, f)
+    write_manifest(manifest, dataset_dir)
+
+    summary = {
+        "partitions": new_partitions,
+        "rows": n_rows,
+        "bounds": manifest["bounds"],
+        "seconds": round(time.time() - start_time, 3),
+        "peak_memory_mb": round(peak_memory_mb())
+    }
+    logger.info(f"Terminé : {len(new_partitions)} mois, {n_rows} lignes ajoutées, bornes {manifest['bounds']} "
+                f"({summary['seconds']} secondes, pic de mémoire {summary['peak_memory_mb']} Mo)")
+    return summary
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Lecture du jeu de données
+---------------------------------------------------------------------------------------------------
+"""
+
+def _filtered_batches(dataset_dir, batch_size=CHUNK_ROWS):
+    """Blocs du jeu de données (dans l'ordre des partitions), filtrés avec les bornes courantes."""
+    manifest = read_manifest(dataset_dir)
+    if manifest["bounds"] is None:
+        return
+    lower_bound, upper_bound = manifest["bounds"]
+
+    # Manifeste et encodeurs du répertoire ignorés (seuls les fichiers des partitions sont lus)
+    dataset = ds.dataset(dataset_dir, format='parquet', partitioning='hive',
+                         ignore_prefixes=['.', '_', 'encoders.json'])
+    condition = (ds.field('AttendanceTimeSeconds') >= lower_bound) & (ds.field('AttendanceTimeSeconds') <= upper_bound)
+    for fragment in sorted(dataset.get_fragments(), key=lambda fragment: fragment.path):
+        for batch in fragment.to_batches(columns=OUTPUT_COLUMNS, filter=condition, batch_size=batch_size):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+
+def load_modelisation(dataset_dir=MODELISATION_DIR):
+    """
+    Charge df_modelisation depuis le jeu de données partitionné (outliers filtrés).
+
+    Returns:
+        pd.DataFrame: Colonnes de preprocess.py (OUTPUT_COLUMNS)
+    """
+    frames = list(_filtered_batches(dataset_dir))
+    if not frames:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_csv(path_to_CSV, dataset_dir=MODELISATION_DIR):
+    """
+    Écrit df_modelisation au format CSV de preprocess.py (outliers filtrés), bloc par bloc.
+
+    Returns:
+        int: Nombre de lignes écrites
+    """
+    n_output = 0
+    for chunk in _filtered_batches(dataset_dir):
+        chunk.index = pd.RangeIndex(n_output, n_output + len(chunk))
+        chunk.to_csv(path_to_CSV, mode='w' if n_output == 0 else 'a', header=n_output == 0)
+        n_output += len(chunk)
+    return n_output
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Préparation incrémentale des données (nouveaux mois uniquement)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Nombre de mobilisations par bloc")
+    parser.add_argument('--dataset-dir', default=MODELISATION_DIR, help="Jeu de données partitionné")
+    parser.add_argument('--rebuild', action='store_true', help="Supprime le jeu de données et traite tous les mois")
+    parser.add_argument('--export-csv', nargs='?', const=paths.path_to_CSV, default=None,
+                        help="Écrit ensuite df_modelisation au format CSV (défaut : %(const)s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler(paths.path_to_log), logging.StreamHandler()])
+
+    if args.rebuild:
+        shutil.rmtree(args.dataset_dir, ignore_errors=True)
+
+    preprocess_incremental([paths.path_incident_1, paths.path_incident_2],
+                           [paths.path_mobilisation_1, paths.path_mobilisation_2, paths.path_mobilisation_3],
+                           paths.path_to_stations,
+                           args.dataset_dir,
+                           chunk_rows=args.chunk_rows)
+
+    if args.export_csv:
+        n_output = export_csv(args.export_csv, args.dataset_dir)
+        logger.info(f"{n_output} lignes écrites dans {args.export_csv}")
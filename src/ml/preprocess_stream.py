@@ -0,0 +1,369 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : preprocess_stream.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : préparation des données pour la modélisation, par blocs (mémoire bornée)
+
+Tâches réalisées par ce script (mêmes traitements que preprocess.py) :
+ - Index compact des incidents, indexé par 'IncidentNumber' : incidents avec
+   FirstPumpArriving_AttendanceTime, colonnes utiles uniquement, catégories encodées par
+   dictionnaire, IncidentLatitude et IncidentLongitude déjà calculées
+ - Passe 1 : lecture des mobilisations par blocs (cache Parquet, src/data/ingest.py) ; pour
+   chaque bloc, jointure avec l'index des incidents puis avec les stations, suppression des
+   lignes incomplètes, calcul de DistanceToStation ; le bloc est écrit dans un fichier
+   intermédiaire, les vocabulaires des colonnes catégorielles et le décompte des valeurs de
+   AttendanceTimeSeconds sont mis à jour
+ - Quantiles Q1 et Q3 exacts (à partir du décompte des valeurs), bornes du filtre des outliers
+ - Passe 2 : lecture du fichier intermédiaire par blocs, encodage des colonnes catégorielles
+   (vocabulaires triés, comme LabelEncoder), filtre des outliers, ajout au fichier CSV de sortie
+ - Sauvegarde des encodeurs à côté du fichier de sortie (jamais sur models/encoders.json, servi
+   par l'API avec le modèle déployé), rapport du pic de mémoire
+
+La mémoire utilisée dépend de la taille des blocs (--chunk-rows) et de l'index des incidents,
+et non du nombre de mobilisations. Les lignes du fichier de sortie sont dans l'ordre des
+mobilisations (preprocess.py : dans l'ordre des incidents).
+
+Utilisation :
+
+    python -m src.ml.preprocess_stream --chunk-rows 500000
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.data.ingest import ingest, ingest_all, raw_columns, RAW_CACHE_DIR
+from src.utils.geo_arrays import haversine, bng_to_wgs84
+from src.ml import preprocess as paths
+from src.ml.artifacts import ENCODERS_PATH
+
+logger = logging.getLogger(__name__)
+
+# Nombre de mobilisations traitées par bloc
+CHUNK_ROWS = int(os.getenv('LFB_PREPROCESS_CHUNK_ROWS', '500000'))
+
+# Colonnes lues dans le cache des CSV bruts
+INCIDENT_COLUMNS = ['IncidentNumber', 'HourOfCall', 'IncidentGroup', 'IncidentStationGround', 'PropertyCategory',
+                    'IncGeo_BoroughName', 'Easting_rounded', 'Northing_rounded', 'FirstPumpArriving_AttendanceTime']
+MOBILISATION_COLUMNS = ['IncidentNumber', 'DeployedFromStation_Name', 'AttendanceTimeSeconds']
+
+# Colonnes encodées (catégorielles) et colonnes du fichier de sortie (ordre de preprocess.py)
+CATEGORICAL_COLUMNS = ['IncidentGroup', 'IncidentStationGround', 'PropertyCategory', 'IncGeo_BoroughName',
+                       'DeployedFromStation_Name']
+OUTPUT_COLUMNS = ['HourOfCall_x', 'IncidentGroup', 'IncidentStationGround', 'PropertyCategory',
+                  'IncGeo_BoroughName', 'DeployedFromStation_Name', 'AttendanceTimeSeconds',
+                  'IncidentLatitude', 'IncidentLongitude', 'StationLatitude', 'StationLongitude',
+                  'DistanceToStation']
+
+# Encodeurs déployés (servis par l'API) : jamais écrasés par la préparation des données
+DEPLOYED_ENCODERS_PATH = os.getenv('LFB_DEPLOYED_ENCODERS_PATH', ENCODERS_PATH)
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Outils
+---------------------------------------------------------------------------------------------------
+"""
+
+def check_encoders_path(path_to_encoders, deployed_encoders_path=DEPLOYED_ENCODERS_PATH):
+    """
+    Refuse d'écrire les encodeurs sur ceux servis par l'API : l'API les rechargerait avec le
+    modèle en service, entraîné avec d'autres codes.
+    """
+    if Path(path_to_encoders).resolve() == Path(deployed_encoders_path).resolve():
+        raise ValueError(f"{path_to_encoders} : les encodeurs servis par l'API ne sont pas écrasés "
+                         "(déployer les encodeurs avec le modèle réentraîné)")
+
+
+def peak_memory_mb():
+    """Pic de mémoire résidente du processus (Mo)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def quantile_from_counts(values, counts, q):
+    """
+    Quantile d'une série décrite par le décompte de ses valeurs (interpolation linéaire, comme
+    pandas.Series.quantile).
+
+    Args:
+        values (np.ndarray): Valeurs distinctes, triées
+        counts (np.ndarray): Nombre d'occurrences de chaque valeur
+        q (float): Quantile (entre 0 et 1)
+    """
+    cumulative = np.cumsum(counts)
+    position = q * (cumulative[-1] - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, int(cumulative[-1]) - 1)
+
+    # Valeur de la k-ième observation de la série triée
+    def nth(k):
+        return values[np.searchsorted(cumulative, k, side='right')]
+
+    return nth(lower) + (nth(upper) - nth(lower)) * (position - lower)
+
+
+def incident_partitions(dates):
+    """
+    Partition (année et mois, 'AAAA-MM') de chaque incident, à partir de DateOfCall.
+
+    Les dates distinctes sont peu nombreuses : elles sont converties une seule fois chacune.
+    """
+    codes, uniques = pd.factorize(dates)
+    months = pd.to_datetime(pd.Series(uniques), format='mixed', dayfirst=True, errors='coerce').dt.strftime('%Y-%m')
+    return pd.Series(months.to_numpy()[codes], index=dates.index).where(codes >= 0)
+
+
+def _union_categories(frames, columns):
+    """Aligne les catégories des colonnes sur leur union (concaténation sans passage en 'object')."""
+    for column in columns:
+        categories = sorted(set().union(*(frame[column].cat.categories for frame in frames)))
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Index des incidents
+---------------------------------------------------------------------------------------------------
+"""
+
+def incident_index(incident_paths, cache_dir=RAW_CACHE_DIR, partitions=None):
+    """
+    Construit l'index compact des incidents.
+
+    Args:
+        incident_paths (list): CSV bruts des incidents
+        cache_dir (str): Répertoire du cache Parquet des CSV bruts
+        partitions (set): Si fourni, ajoute la colonne 'Partition' ('AAAA-MM') et ne garde que
+            les incidents de ces partitions (traitement incrémental) ; seules les lignes de leurs
+            années (CalYear) sont lues
+
+    Returns:
+        pd.DataFrame: Indexé par 'IncidentNumber' ; colonnes HourOfCall_x, catégories,
+        IncidentLatitude et IncidentLongitude (et Partition)
+    """
+    categories = ['IncidentGroup', 'IncidentStationGround', 'PropertyCategory', 'IncGeo_BoroughName']
+    columns = INCIDENT_COLUMNS if partitions is None else INCIDENT_COLUMNS + ['DateOfCall']
+    if partitions is not None:
+        categories = categories + ['Partition']
+        years = sorted({int(partition[:4]) for partition in partitions})
+
+    frames = []
+    for path in incident_paths:
+        if partitions is None:
+            table = pq.read_table(ingest(path, cache_dir), columns=columns)
+        else:
+            table = ds.dataset(ingest(path, cache_dir), format='parquet').to_table(
+                columns=columns, filter=ds.field('CalYear').isin(years))
+        frame = table.to_pandas()
+        del table
+
+        # Incidents avec FirstPumpArriving_AttendanceTime uniquement
+        frame = frame[frame['FirstPumpArriving_AttendanceTime'].notna()]
+
+        # Partitions à traiter uniquement (avant tout calcul)
+        if partitions is not None:
+            frame = frame.assign(Partition=incident_partitions(frame['DateOfCall'])).drop(columns=['DateOfCall'])
+            frame = frame[frame['Partition'].isin(partitions)]
+
+        # Coordonnées de l'incident (BNG > WGS84, colonne entière)
+        frame['IncidentLatitude'], frame['IncidentLongitude'] = bng_to_wgs84(
+            frame['Easting_rounded'].to_numpy(dtype=np.float64),
+            frame['Northing_rounded'].to_numpy(dtype=np.float64))
+
+        frame = frame.drop(columns=['Easting_rounded', 'Northing_rounded', 'FirstPumpArriving_AttendanceTime'])
+        for column in categories:
+            frame[column] = frame[column].astype('category')
+        frames.append(frame)
+
+    _union_categories(frames, categories)
+    incidents = pd.concat(frames, ignore_index=True).rename(columns={'HourOfCall': 'HourOfCall_x'})
+    return incidents.set_index('IncidentNumber')
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Traitement d'un bloc de mobilisations
+---------------------------------------------------------------------------------------------------
+"""
+
+def transform_chunk(mobilisations, incidents, df_stations, extra_columns=()):
+    """
+    Jointures et variables d'un bloc de mobilisations (avant encodage et filtre des outliers).
+
+    Returns:
+        pd.DataFrame: Colonnes OUTPUT_COLUMNS (catégories en texte), puis `extra_columns`
+        (colonnes de l'index des incidents conservées telles quelles)
+    """
+    # Jointure avec l'index des incidents (jointure interne sur 'IncidentNumber')
+    chunk = mobilisations.join(incidents, on='IncidentNumber', how='inner')
+    chunk = chunk.dropna()
+
+    # Jointure avec les stations (left_on='DeployedFromStation_Name', right_on='Station')
+    chunk = pd.merge(chunk,
+                     df_stations[['Station', 'StationLatitude', 'StationLongitude']],
+                     how='left',
+                     left_on='DeployedFromStation_Name',
+                     right_on='Station')
+    chunk = chunk.drop(columns=['Station', 'IncidentNumber']).dropna()
+
+    # Distance entre l'incident et la station (colonnes entières)
+    chunk['DistanceToStation'] = haversine(chunk['IncidentLatitude'].to_numpy(),
+                                           chunk['IncidentLongitude'].to_numpy(),
+                                           chunk['StationLatitude'].to_numpy(),
+                                           chunk['StationLongitude'].to_numpy())
+
+    for column in CATEGORICAL_COLUMNS:
+        chunk[column] = chunk[column].astype(str)
+    return chunk[OUTPUT_COLUMNS + list(extra_columns)]
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Préparation par blocs
+---------------------------------------------------------------------------------------------------
+"""
+
+def preprocess_stream(incident_paths,
+                      mobilisation_paths,
+                      path_to_stations,
+                      path_to_CSV,
+                      path_to_encoders=None,
+                      chunk_rows=CHUNK_ROWS,
+                      cache_dir=RAW_CACHE_DIR,
+                      deployed_encoders_path=DEPLOYED_ENCODERS_PATH):
+    """
+    Prépare df_modelisation par blocs de mobilisations (voir l'en-tête du script).
+
+    Les encodeurs sont écrits dans `path_to_encoders` (défaut : encoders.json à côté du fichier
+    de sortie) ; écrire sur les encodeurs servis par l'API est refusé.
+
+    Returns:
+        dict: Nombre de lignes, bornes du filtre, durée et pic de mémoire (Mo)
+    """
+    start_time = time.time()
+
+    if path_to_encoders is None:
+        path_to_encoders = Path(path_to_CSV).parent / 'encoders.json'
+    check_encoders_path(path_to_encoders, deployed_encoders_path)
+
+    # Mise à jour du cache des CSV bruts, en parallèle (un processus par fichier)
+    ingest_all(list(incident_paths) + list(mobilisation_paths), cache_dir=cache_dir)
+
+    # TEST UNITAIRE - Vérifier que les fichiers d'incidents ont bien le même nombre de colonnes
+    if len({len(raw_columns(path, cache_dir)) for path in incident_paths}) > 1:
+        raise ValueError("Les fichiers d'incidents n'ont pas le même nombre de colonnes")
+
+    incidents = incident_index(incident_paths, cache_dir)
+    df_stations = pd.read_csv(path_to_stations)
+    logger.info(f"Index des incidents : {len(incidents)} incidents, "
+                f"{incidents.memory_usage(deep=True).sum() / 2**20:.0f} Mo")
+
+    vocabularies = {column: set() for column in CATEGORICAL_COLUMNS}
+    value_counts = pd.Series(dtype=np.int64)
+    n_rows = 0
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path_to_CSV))) as tmp_dir:
+        spool_path = os.path.join(tmp_dir, 'spool.parquet')
+
+        # Passe 1 : jointures et variables, bloc par bloc ; vocabulaires et décompte des valeurs
+        writer = None
+        for path in mobilisation_paths:
+            parquet_file = pq.ParquetFile(ingest(path, cache_dir))
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=MOBILISATION_COLUMNS):
+                chunk = transform_chunk(batch.to_pandas(), incidents, df_stations)
+                if chunk.empty:
+                    continue
+
+                for column in CATEGORICAL_COLUMNS:
+                    vocabularies[column].update(chunk[column].unique())
+                value_counts = value_counts.add(chunk['AttendanceTimeSeconds'].value_counts(), fill_value=0)
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(spool_path, table.schema)
+                writer.write_table(table)
+                n_rows += len(chunk)
+                logger.info(f"Passe 1 : {n_rows} lignes ({round(time.time() - start_time)} secondes, "
+                            f"pic de mémoire {peak_memory_mb():.0f} Mo)")
+        if writer is None:
+            raise ValueError("Aucune mobilisation jointe à un incident")
+        writer.close()
+        del incidents
+
+        # Quantiles Q1 et Q3, écart interquantile et bornes du filtre des outliers
+        value_counts = value_counts.sort_index()
+        values, counts = value_counts.index.to_numpy(), value_counts.to_numpy()
+        Q1 = quantile_from_counts(values, counts, 0.25)
+        Q3 = quantile_from_counts(values, counts, 0.75)
+        IQR = Q3 - Q1
+        lower_bound = Q1 - 1.5 * IQR
+        upper_bound = Q3 + 1.5 * IQR
+        logger.info(f"Q1 = {Q1}, Q3 = {Q3}, IQR = {IQR}, bornes = [{lower_bound}, {upper_bound}]")
+
+        # Encodeurs : vocabulaires triés (classes de LabelEncoder)
+        encoders = {column: sorted(vocabularies[column]) for column in CATEGORICAL_COLUMNS}
+        codes = {column: {value: code for code, value in enumerate(classes)} for column, classes in encoders.items()}
+        with open(path_to_encoders, 'w') as f:
+            json.dump(encoders, f)
+
+        # Passe 2 : encodage, filtre des outliers et ajout au fichier de sortie
+        n_output = 0
+        for batch in pq.ParquetFile(spool_path).iter_batches(batch_size=chunk_rows):
+            chunk = batch.to_pandas()
+            attendance = chunk['AttendanceTimeSeconds']
+            chunk = chunk[(attendance >= lower_bound) & (attendance <= upper_bound)].copy()
+            for column in CATEGORICAL_COLUMNS:
+                chunk[column] = chunk[column].map(codes[column]).astype(np.int64)
+            chunk.index = pd.RangeIndex(n_output, n_output + len(chunk))
+            chunk.to_csv(path_to_CSV, mode='w' if n_output == 0 else 'a', header=n_output == 0)
+            n_output += len(chunk)
+
+    summary = {
+        "rows": n_output,
+        "rows_before_filter": n_rows,
+        "bounds": [lower_bound, upper_bound],
+        "seconds": round(time.time() - start_time, 3),
+        "peak_memory_mb": round(peak_memory_mb())
+    }
+    logger.info(f"Terminé : {n_output} lignes dans {path_to_CSV} ({summary['seconds']} secondes, "
+                f"pic de mémoire {summary['peak_memory_mb']} Mo)")
+    return summary
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Préparation des données par blocs (mémoire bornée)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Nombre de mobilisations par bloc")
+    parser.add_argument('--output', default=paths.path_to_CSV, help="Fichier CSV de sortie")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler(paths.path_to_log), logging.StreamHandler()])
+
+    preprocess_stream([paths.path_incident_1, paths.path_incident_2],
+                      [paths.path_mobilisation_1, paths.path_mobilisation_2, paths.path_mobilisation_3],
+                      paths.path_to_stations,
+                      args.output,
+                      chunk_rows=args.chunk_rows)
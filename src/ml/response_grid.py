@@ -0,0 +1,322 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : response_grid.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : grille précalculée des temps d'intervention sur le Grand Londres
+
+Tâches réalisées par ce script :
+ - Découpage du Grand Londres en cellules de taille fixe
+ - Affectation à chaque cellule de la station la plus proche de son centre
+ - Précalcul des prédictions pour chaque (cellule, heure 0-23, IncidentGroup, PropertyCategory)
+ - Sauvegarde dans un tableau NumPy lu en mémoire projetée (memmap), un dossier par version
+ - Réponse en O(1) par arithmétique d'index (mode « rapide » de l'API)
+ - Construction hors ligne (commande ci-dessous) ; reconstruction en arrière-plan par l'API
+   lorsque la version du modèle change, seulement si LFB_GRID_AUTOBUILD=1
+
+Utilisation (construction hors ligne) :
+
+    python -m src.ml.response_grid
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.geo_arrays import haversine
+
+logger = logging.getLogger(__name__)
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Paramètres
+---------------------------------------------------------------------------------------------------
+"""
+
+# Dossier des grilles (un sous-dossier par version des artefacts)
+GRID_DIR = Path(os.getenv('LFB_GRID_DIR', './data/5_grid'))
+
+# Emprise du Grand Londres (degrés) et taille des cellules
+GRID_BOUNDS = (51.28, -0.52, 51.70, 0.34)  # (lat_min, lon_min, lat_max, lon_max)
+GRID_CELL_DEG = float(os.getenv('LFB_GRID_CELL_DEG', '0.005'))
+
+# Reconstruction automatique de la grille au chargement d'une nouvelle version des artefacts
+# (désactivée par défaut : la construction concurrence le traitement des requêtes)
+GRID_AUTOBUILD = os.getenv('LFB_GRID_AUTOBUILD', '0') == '1'
+
+# Au-delà de cette durée (en secondes), un verrou de construction est considéré comme abandonné
+LOCK_TIMEOUT = 3600
+
+HOURS = 24
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Construction de la grille
+---------------------------------------------------------------------------------------------------
+"""
+
+def grid_shape(bounds=GRID_BOUNDS, cell_deg=GRID_CELL_DEG):
+    """Retourne le nombre de cellules (latitude, longitude) de la grille."""
+    lat_min, lon_min, lat_max, lon_max = bounds
+    return (int(np.ceil(round((lat_max - lat_min) / cell_deg, 9))),
+            int(np.ceil(round((lon_max - lon_min) / cell_deg, 9))))
+
+
+def build_grid(artifacts, path, bounds=GRID_BOUNDS, cell_deg=GRID_CELL_DEG):
+    """
+    Construit la grille des prédictions pour une version des artefacts.
+
+    Les fichiers sont écrits dans un dossier temporaire puis renommés, de sorte qu'une grille
+    visible est toujours complète.
+
+    Args:
+        artifacts (Artifacts): Instantané des artefacts (modèle, encodeurs, stations)
+        path (Path): Dossier de destination
+        bounds (tuple): Emprise (lat_min, lon_min, lat_max, lon_max)
+        cell_deg (float): Taille des cellules en degrés
+
+    Returns:
+        Path: Dossier de la grille
+    """
+    start_time = time.time()
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    tmp_path.mkdir(parents=True, exist_ok=True)
+
+    lat_min, lon_min, _, _ = bounds
+    n_lat, n_lon = grid_shape(bounds, cell_deg)
+    incident_groups = list(artifacts.encoders['IncidentGroup'])
+    property_categories = list(artifacts.encoders['PropertyCategory'])
+
+    # Centres des cellules et station la plus proche (une seule passe vectorisée)
+    latitudes = lat_min + (np.arange(n_lat) + 0.5) * cell_deg
+    longitudes = lon_min + (np.arange(n_lon) + 0.5) * cell_deg
+    cell_latitudes = np.repeat(latitudes, n_lon)
+    cell_longitudes = np.tile(longitudes, n_lat)
+    indices, distances = artifacts.station_index.query(cell_latitudes, cell_longitudes, k=1)
+    station_positions, distances = indices[:, 0], distances[:, 0]
+
+    # Prédictions : un appel au modèle par (heure, IncidentGroup, PropertyCategory)
+    grid = np.lib.format.open_memmap(tmp_path / 'grid.npy', mode='w+', dtype=np.float32,
+                                     shape=(n_lat, n_lon, HOURS, len(incident_groups), len(property_categories)))
+    for hour in range(HOURS):
+        for i, incident_group in enumerate(incident_groups):
+            for j, property_category in enumerate(property_categories):
+                X = artifacts.features.build(hour, incident_group, property_category,
+                                             cell_latitudes, cell_longitudes, station_positions, distances)
+                grid[:, :, hour, i, j] = artifacts.model.predict(X).reshape(n_lat, n_lon)
+    grid.flush()
+    del grid
+
+    np.save(tmp_path / 'stations.npy', station_positions.astype(np.int32).reshape(n_lat, n_lon))
+
+    with open(tmp_path / 'meta.json', 'w') as f:
+        json.dump({
+            "version": artifacts.version,
+            "bounds": list(bounds),
+            "cell_deg": cell_deg,
+            "shape": [n_lat, n_lon],
+            "IncidentGroup": incident_groups,
+            "PropertyCategory": property_categories,
+            "built_at": time.time()
+        }, f)
+
+    # Publication atomique du dossier complet
+    if path.exists():
+        shutil.rmtree(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+
+    logger.info(f"Grille des temps d'intervention construite (version {artifacts.version}, "
+                f"{n_lat} x {n_lon} cellules) en {round(time.time() - start_time)} secondes : {path}")
+    return path
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Lecture de la grille
+---------------------------------------------------------------------------------------------------
+"""
+
+class ResponseGrid:
+    """
+    Grille précalculée lue en mémoire projetée.
+
+    Args:
+        path (Path): Dossier de la grille (grid.npy, stations.npy, meta.json)
+        stations (pd.DataFrame): Table des stations de la même version des artefacts
+    """
+
+    def __init__(self, path, stations):
+        path = Path(path)
+        with open(path / 'meta.json', 'r') as f:
+            meta = json.load(f)
+
+        self.version = meta['version']
+        self.lat_min, self.lon_min, self.lat_max, self.lon_max = meta['bounds']
+        self.cell_deg = meta['cell_deg']
+        self.n_lat, self.n_lon = meta['shape']
+        self.incident_groups = {value: i for i, value in enumerate(meta['IncidentGroup'])}
+        self.property_categories = {value: i for i, value in enumerate(meta['PropertyCategory'])}
+
+        self.grid = np.load(path / 'grid.npy', mmap_mode='r')
+        self.stations = np.load(path / 'stations.npy')
+        self.station_table = stations
+
+    def cell(self, latitude, longitude):
+        """Retourne les indices (ligne, colonne) de la cellule d'un point, ou None hors emprise."""
+        row = int((latitude - self.lat_min) // self.cell_deg)
+        col = int((longitude - self.lon_min) // self.cell_deg)
+        if 0 <= row < self.n_lat and 0 <= col < self.n_lon:
+            return row, col
+        return None
+
+    def lookup(self, latitude, longitude, HourOfCall, IncidentGroup, PropertyCategory):
+        """
+        Répond à partir de la grille.
+
+        La prédiction et la station sont celles du centre de la cellule ; la distance retournée
+        est celle du point demandé à cette station.
+
+        Returns:
+            dict | None: Résultat au format de predict(), ou None si le point est hors emprise ou
+            si une catégorie est inconnue de la grille
+        """
+        cell = self.cell(latitude, longitude)
+        i = self.incident_groups.get(IncidentGroup)
+        j = self.property_categories.get(PropertyCategory)
+        if cell is None or i is None or j is None:
+            return None
+
+        row, col = cell
+        station = self.station_table.iloc[int(self.stations[row, col])]
+
+        return {
+            "latitude": float(latitude),
+            "longitude": float(longitude),
+            "station": station['Station'],
+            "StationBorough": station['StationBorough'],
+            "StationLatitude": float(station['StationLatitude']),
+            "StationLongitude": float(station['StationLongitude']),
+            "DistanceToStation": float(haversine(station['StationLatitude'], station['StationLongitude'],
+                                                 latitude, longitude)),
+            "prediction": float(self.grid[row, col, HourOfCall, i, j])
+        }
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Gestion des versions de la grille
+---------------------------------------------------------------------------------------------------
+"""
+
+class GridManager:
+    """
+    Fournit la grille correspondant à la version courante des artefacts.
+
+    À chaque chargement des artefacts (voir ArtifactRegistry.add_listener), la grille de la
+    nouvelle version est ouverte si elle existe ; sinon, si la reconstruction automatique est
+    activée, elle est reconstruite dans un thread d'arrière-plan. Un fichier verrou évite que plusieurs processus (workers uvicorn) la
+    construisent en même temps. Tant que la grille n'est pas disponible, lookup retourne None.
+    """
+
+    def __init__(self, grid_dir=GRID_DIR, autobuild=GRID_AUTOBUILD):
+        self.grid_dir = Path(grid_dir)
+        self.autobuild = autobuild
+        self.grid = None
+        self.hits = 0
+        self.misses = 0
+
+    def on_artifacts(self, artifacts):
+        """Ouvre (ou fait construire) la grille d'une nouvelle version des artefacts."""
+        path = self.grid_dir / artifacts.version
+        if self.grid is not None and self.grid.version != artifacts.version:
+            self.grid = None
+
+        if (path / 'meta.json').exists():
+            self.grid = ResponseGrid(path, artifacts.stations)
+        elif self.autobuild:
+            threading.Thread(target=self._build, args=(artifacts, path),
+                             name="response-grid-builder", daemon=True).start()
+        else:
+            logger.info(f"Grille absente pour la version {artifacts.version} : "
+                        "construction hors ligne avec python -m src.ml.response_grid")
+
+    def _build(self, artifacts, path):
+        """Construit la grille si aucun autre processus ne s'en charge, puis l'ouvre."""
+        lock = path.with_name(f"{path.name}.lock")
+        try:
+            self.grid_dir.mkdir(parents=True, exist_ok=True)
+            if lock.exists() and time.time() - lock.stat().st_mtime > LOCK_TIMEOUT:
+                lock.unlink()
+            try:
+                os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                # Un autre processus construit la grille : attente de sa publication
+                while lock.exists() and not (path / 'meta.json').exists():
+                    time.sleep(5)
+            else:
+                try:
+                    build_grid(artifacts, path)
+                finally:
+                    lock.unlink()
+
+            if (path / 'meta.json').exists():
+                self.grid = ResponseGrid(path, artifacts.stations)
+        except Exception as e:
+            logger.error(f"Erreur lors de la construction de la grille : {str(e)}")
+
+    def lookup(self, latitude, longitude, HourOfCall, IncidentGroup, PropertyCategory, version=None):
+        """
+        Répond à partir de la grille courante.
+
+        Returns:
+            dict | None: Résultat, ou None si la grille est indisponible (ou d'une autre version)
+        """
+        grid = self.grid
+        result = None
+        if grid is not None and (version is None or grid.version == version):
+            result = grid.lookup(latitude, longitude, HourOfCall, IncidentGroup, PropertyCategory)
+
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def stats(self):
+        """Retourne l'état de la grille et les compteurs du mode rapide."""
+        grid = self.grid
+        return {
+            "version": grid.version if grid is not None else None,
+            "shape": [grid.n_lat, grid.n_lon] if grid is not None else None,
+            "cell_deg": grid.cell_deg if grid is not None else None,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+if __name__ == "__main__":
+
+    from src.ml.artifacts import get_artifacts
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Construction de la grille pour la version courante des artefacts
+    artifacts = get_artifacts()
+    build_grid(artifacts, GRID_DIR / artifacts.version)
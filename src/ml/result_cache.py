@@ -0,0 +1,125 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : result_cache.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : cache des résultats de prédiction
+
+Tâches réalisées par ce script :
+ - Clé : (cellule de latitude / longitude arrondies, HourOfCall, IncidentGroup,
+   PropertyCategory, version des artefacts)
+ - Éviction LRU avec plafond de mémoire
+ - Invalidation au rechargement du modèle ou des encodeurs
+ - Statistiques (succès, échecs, taux de succès)
+
+Le résultat mis en cache est celui du premier incident de la cellule : la station, la distance
+et la prédiction sont donc approchées à la taille de la cellule près (environ 110 m pour
+3 décimales). Les coordonnées retournées restent celles de la requête.
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# Activation du cache
+PREDICTION_CACHE_ENABLED = os.getenv('LFB_PREDICTION_CACHE', '1') == '1'
+
+# Nombre de décimales conservées pour la latitude et la longitude (taille des cellules)
+PREDICTION_CACHE_PRECISION = int(os.getenv('LFB_PREDICTION_CACHE_PRECISION', '3'))
+
+# Plafond de mémoire du cache (en Mo)
+PREDICTION_CACHE_MB = float(os.getenv('LFB_PREDICTION_CACHE_MB', '64'))
+
+
+def _size_of(key, value):
+    """Estime la mémoire occupée par une entrée (clé, dictionnaire de résultat)."""
+    size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+    size += sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value.values())
+    return size
+
+
+class PredictionCache:
+    """
+    Cache LRU des résultats de prédiction, borné en mémoire.
+
+    Args:
+        precision (int): Nombre de décimales des coordonnées dans la clé
+        max_bytes (int): Mémoire maximale estimée occupée par les entrées
+    """
+
+    def __init__(self, precision=PREDICTION_CACHE_PRECISION, max_bytes=int(PREDICTION_CACHE_MB * 2**20)):
+        self.precision = precision
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, latitude, longitude, HourOfCall, IncidentGroup, PropertyCategory, version):
+        """Construit la clé d'un incident (coordonnées arrondies à la cellule)."""
+        return (round(float(latitude), self.precision),
+                round(float(longitude), self.precision),
+                int(HourOfCall),
+                IncidentGroup,
+                PropertyCategory,
+                version)
+
+    def get(self, key):
+        """Retourne le résultat en cache (ou None) et le marque comme récemment utilisé."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Ajoute un résultat en évinçant les entrées les moins récemment utilisées."""
+        size = _size_of(key, value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self, *args):
+        """Vide le cache (appelé au rechargement des artefacts)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    def stats(self):
+        """Retourne les statistiques du cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "precision": self.precision
+            }
@@ -0,0 +1,180 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : tiles.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : tuiles GeoJSON des temps d'intervention prédits (carte de couverture)
+
+Tâches réalisées par ce script :
+ - Conversion entre coordonnées et tuiles de carte (schéma XYZ, Web Mercator)
+ - Liste des tuiles couvrant une emprise à un niveau de zoom donné
+ - Calcul d'une tuile : découpage en cellules, une passe de recherche des stations,
+   un seul appel au modèle
+ - Cache disque des tuiles par (version, heure, incident, propriété, tuile)
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import re
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+# Dossier du cache des tuiles
+TILES_DIR = Path(os.getenv('LFB_TILES_DIR', './data/6_tiles'))
+
+# Nombre de cellules par côté de tuile
+TILE_RESOLUTION = int(os.getenv('LFB_TILE_RESOLUTION', '16'))
+
+# Niveaux de zoom acceptés et nombre maximal de tuiles par requête
+MIN_ZOOM = 8
+MAX_ZOOM = 16
+MAX_TILES = 64
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Géométrie des tuiles
+---------------------------------------------------------------------------------------------------
+"""
+
+def tile_bounds(z, x, y):
+    """
+    Retourne l'emprise d'une tuile XYZ.
+
+    Returns:
+        tuple: (lat_min, lon_min, lat_max, lon_max) en degrés
+    """
+    n = 2 ** z
+    lon_min = x / n * 360 - 180
+    lon_max = (x + 1) / n * 360 - 180
+    lat_max = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    lat_min = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return lat_min, lon_min, lat_max, lon_max
+
+
+def lat_lon_to_tile(latitude, longitude, z):
+    """Retourne les indices (x, y) de la tuile contenant un point."""
+    n = 2 ** z
+    x = int((longitude + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bbox(min_lat, min_lon, max_lat, max_lon, z):
+    """
+    Liste les tuiles couvrant une emprise.
+
+    Returns:
+        list: Tuiles (z, x, y)
+    """
+    x_min, y_min = lat_lon_to_tile(max_lat, min_lon, z)
+    x_max, y_max = lat_lon_to_tile(min_lat, max_lon, z)
+    return [(z, x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Calcul et cache des tuiles
+---------------------------------------------------------------------------------------------------
+"""
+
+def compute_tile(artifacts, z, x, y, HourOfCall, IncidentGroup, PropertyCategory, resolution=TILE_RESOLUTION):
+    """
+    Calcule les temps d'intervention prédits sur les cellules d'une tuile.
+
+    Les cellules sont les mailles d'un découpage régulier de la tuile ; la prédiction de chaque
+    cellule est celle de son centre. La recherche des stations et l'inférence sont faites en
+    une seule passe pour toute la tuile.
+
+    Returns:
+        dict: FeatureCollection GeoJSON (un polygone par cellule, propriétés prediction et station)
+    """
+    lat_min, lon_min, lat_max, lon_max = tile_bounds(z, x, y)
+    lat_edges = np.linspace(lat_min, lat_max, resolution + 1)
+    lon_edges = np.linspace(lon_min, lon_max, resolution + 1)
+    latitudes = np.repeat((lat_edges[:-1] + lat_edges[1:]) / 2, resolution)
+    longitudes = np.tile((lon_edges[:-1] + lon_edges[1:]) / 2, resolution)
+
+    # Station la plus proche de chaque cellule et prédiction (un seul appel au modèle)
+    indices, distances = artifacts.station_index.query(latitudes, longitudes, k=1)
+    station_positions, distances = indices[:, 0], distances[:, 0]
+    X = artifacts.features.build(HourOfCall, IncidentGroup, PropertyCategory,
+                                 latitudes, longitudes, station_positions, distances)
+    predictions = artifacts.model.predict(X)
+    stations = artifacts.stations['Station'].to_numpy()[station_positions]
+
+    features = []
+    for cell in range(len(latitudes)):
+        i, j = divmod(cell, resolution)
+        south, north = round(lat_edges[i], 6), round(lat_edges[i + 1], 6)
+        west, east = round(lon_edges[j], 6), round(lon_edges[j + 1], 6)
+        features.append({
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]]
+            },
+            "properties": {
+                "prediction": round(float(predictions[cell]), 1),
+                "station": stations[cell]
+            }
+        })
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _path_component(value):
+    """Rend une valeur catégorielle utilisable comme nom de dossier."""
+    return re.sub(r"[^\w]+", "_", str(value)).strip("_") or "_"
+
+
+class TileCache:
+    """
+    Cache disque des tuiles calculées.
+
+    Chemin d'une tuile : <dossier>/<version>/<heure>/<incident>/<propriété>/<z>/<x>/<y>.geojson ;
+    une nouvelle version des artefacts utilise donc automatiquement un nouvel espace de cache.
+    """
+
+    def __init__(self, tiles_dir=TILES_DIR):
+        self.tiles_dir = Path(tiles_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, version, z, x, y, HourOfCall, IncidentGroup, PropertyCategory):
+        return (self.tiles_dir / version / str(HourOfCall) / _path_component(IncidentGroup)
+                / _path_component(PropertyCategory) / str(z) / str(x) / f"{y}.geojson")
+
+    def get(self, artifacts, z, x, y, HourOfCall, IncidentGroup, PropertyCategory):
+        """Retourne la tuile depuis le cache disque, en la calculant si nécessaire."""
+        path = self.path(artifacts.version, z, x, y, HourOfCall, IncidentGroup, PropertyCategory)
+        if path.exists():
+            self.hits += 1
+            with open(path, 'r') as f:
+                return json.load(f)
+
+        self.misses += 1
+        tile = compute_tile(artifacts, z, x, y, HourOfCall, IncidentGroup, PropertyCategory)
+
+        # Écriture atomique (fichier temporaire puis renommage)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        with open(tmp_path, 'w') as f:
+            json.dump(tile, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+        return tile
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,210 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : trees.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : évaluation du modèle XGBoost en NumPy pur (sans xgboost)
+
+Tâches réalisées par ce script :
+ - Export des arbres de models/model-XGB.json en tableaux de nœuds à plat
+ - (variable, seuil, fils gauche, fils droit, direction par défaut, valeur de feuille)
+ - Sauvegarde et chargement de l'export au format .npz
+ - Évaluation vectorisée de tous les arbres pour un lot d'incidents
+
+Utilisation (export) :
+
+    python -m src.ml.trees ./models/model-XGB.json ./models/model-XGB.npz
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import sys
+import json
+
+import numpy as np
+
+# Nombre maximal d'incidents évalués simultanément (limite la mémoire des tableaux de nœuds)
+CHUNK_SIZE = 1024
+
+
+class TreeEnsemble:
+    """
+    Ensemble d'arbres de régression stocké à plat.
+
+    Les nœuds de tous les arbres sont concaténés ; les indices des fils sont globaux. Un nœud
+    feuille pointe sur lui-même, ce qui permet de descendre tous les arbres en `depth` étapes
+    sans test de fin. La règle de décision est celle de XGBoost : x < seuil vers la gauche,
+    valeur manquante (NaN) selon la direction par défaut.
+
+    Attributes:
+        feature (np.ndarray): Indice de la variable testée (0 pour une feuille)
+        threshold (np.ndarray): Seuil de décision (float32)
+        left, right (np.ndarray): Indices globaux des fils
+        default_left (np.ndarray): Direction des valeurs manquantes
+        value (np.ndarray): Valeur de la feuille (0 pour un nœud interne)
+        roots (np.ndarray): Indice global de la racine de chaque arbre
+        depth (int): Profondeur maximale des arbres
+        base_score (float): Valeur initiale de la prédiction
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, depth, base_score,
+                 feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.base_score = np.float32(base_score)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+
+    @classmethod
+    def from_xgboost_json(cls, path):
+        """
+        Exporte les arbres d'un modèle XGBoost sauvegardé au format JSON.
+
+        Seuls les arbres de régression à séparations numériques sont pris en charge.
+        """
+        with open(path, 'r') as f:
+            learner = json.load(f)['learner']
+
+        objective = learner['objective']['name']
+        if objective != 'reg:squarederror':
+            raise ValueError(f"Objectif non pris en charge : {objective}")
+
+        trees = learner['gradient_booster']['model']['trees']
+        base_score = float(learner['learner_model_param']['base_score'])
+
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        depth = 0
+        offset = 0
+        for tree in trees:
+            if any(tree['split_type']):
+                raise ValueError("Les séparations catégorielles ne sont pas prises en charge")
+
+            tree_left = np.asarray(tree['left_children'], dtype=np.int32)
+            tree_right = np.asarray(tree['right_children'], dtype=np.int32)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            is_leaf = tree_left == -1
+            nodes = np.arange(len(tree_left), dtype=np.int32)
+
+            feature.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+            threshold.append(np.where(is_leaf, np.float32(0), conditions))
+            left.append(np.where(is_leaf, nodes, tree_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree_right) + offset)
+            default_left.append(np.asarray(tree['default_left'], dtype=bool))
+            value.append(np.where(is_leaf, conditions, np.float32(0)))
+            roots.append(offset)
+
+            depth = max(depth, _tree_depth(tree_left, tree_right))
+            offset += len(tree_left)
+
+        return cls(feature=np.concatenate(feature),
+                   threshold=np.concatenate(threshold),
+                   left=np.concatenate(left).astype(np.int32),
+                   right=np.concatenate(right).astype(np.int32),
+                   default_left=np.concatenate(default_left),
+                   value=np.concatenate(value),
+                   roots=np.asarray(roots, dtype=np.int32),
+                   depth=depth,
+                   base_score=base_score,
+                   feature_names=learner.get('feature_names'))
+
+    def save(self, path):
+        """Sauvegarde l'export au format .npz."""
+        np.savez(path,
+                 feature=self.feature, threshold=self.threshold,
+                 left=self.left, right=self.right, default_left=self.default_left,
+                 value=self.value, roots=self.roots,
+                 depth=self.depth, base_score=self.base_score,
+                 feature_names=np.asarray(self.feature_names or [], dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Charge un export .npz."""
+        with np.load(path) as data:
+            return cls(**{key: data[key] for key in data.files})
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict(self, X):
+        """
+        Évalue tous les arbres pour un lot d'incidents.
+
+        Args:
+            X (np.ndarray): Matrice (n_incidents, n_variables), convertie en float32
+
+        Returns:
+            np.ndarray: Prédictions float32 (n_incidents,)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        predictions = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), CHUNK_SIZE):
+            predictions[start:start + CHUNK_SIZE] = self._predict_chunk(X[start:start + CHUNK_SIZE])
+        return predictions
+
+    def _predict_chunk(self, X):
+        """Descend tous les arbres simultanément : tableau de nœuds (n_arbres, n_incidents)."""
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        offsets = np.arange(n_rows, dtype=np.int64) * n_features
+        has_missing = np.isnan(values).any()
+
+        # Fils [droit, gauche] de chaque nœud : nœud suivant = children[2 * nœud + va_à_gauche]
+        children = self._children
+        nodes = np.repeat(self.roots[:, None], n_rows, axis=1).astype(np.int64)
+
+        for _ in range(self.depth):
+            x = values.take(offsets + self.feature.take(nodes))
+            go_left = x < self.threshold.take(nodes)
+            if has_missing:
+                missing = np.isnan(x)
+                go_left[missing] = self.default_left.take(nodes[missing])
+            nodes = children.take(2 * nodes + go_left)
+
+        # Somme des feuilles, arbre après arbre (même ordre d'accumulation que XGBoost)
+        leaves = self.value.take(nodes)
+        total = np.full(n_rows, self.base_score, dtype=np.float32)
+        for tree_leaves in leaves:
+            total += tree_leaves
+        return total
+
+    @property
+    def _children(self):
+        children = getattr(self, '_children_cache', None)
+        if children is None:
+            children = np.column_stack([self.right, self.left]).ravel().astype(np.int64)
+            self._children_cache = children
+        return children
+
+
+def _tree_depth(left, right):
+    """Calcule la profondeur maximale d'un arbre (nombre d'arêtes de la racine à la feuille)."""
+    depth = np.zeros(len(left), dtype=np.int32)
+    for node in range(len(left)):
+        if left[node] != -1:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+if __name__ == "__main__":
+
+    # Export des arbres : python -m src.ml.trees <modèle JSON> <export .npz>
+    model_path, export_path = sys.argv[1:3]
+    ensemble = TreeEnsemble.from_xgboost_json(model_path)
+    ensemble.save(export_path)
+    print(f"{ensemble.n_trees} arbres, {len(ensemble.feature)} nœuds, profondeur {ensemble.depth} : {export_path}")
@@ -0,0 +1,233 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : gazetteer.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : géocodage local (sans réseau) des adresses et codes postaux de Londres
+
+Tâches réalisées par ce script :
+ - Chargement du fichier de centroïdes (codes postaux et rues) de data/3_external
+ - Index exact des codes postaux (complets puis district)
+ - Arbre préfixe (trie) des noms de rues normalisés, une entrée par (rue, district, borough)
+ - Levée des homonymies ("High Street", "Church Road") par le district postal ou le borough
+   cités dans l'adresse ; une rue ambiguë n'est pas résolue (repli sur le géocodeur distant)
+ - Recherche approchée des noms de rues en dernier recours, limitée aux noms de même initiale
+   et de longueur compatible avec le seuil de similarité
+ - Consulté derrière le cache de géocodage (src/utils/geocoding.py) : une adresse déjà résolue
+   ne déclenche aucune recherche
+
+Format du fichier (CSV, construit par src/data/gazetteer.py à partir d'OS Open Names) :
+ - name      : code postal ("SW1A 0AA", "SW1A") ou nom de rue ("Downing Street")
+ - kind      : 'postcode' ou 'street'
+ - latitude  : latitude du centroïde (WGS84)
+ - longitude : longitude du centroïde (WGS84)
+ - district  : district postal de la rue ("SW1A"), vide pour les codes postaux
+ - borough   : borough de la rue ("City of Westminster"), vide pour les codes postaux
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import re
+import csv
+import math
+import difflib
+import logging
+import threading
+from array import array
+
+from src.utils.geocoding import normalize_address
+
+logger = logging.getLogger(__name__)
+
+# Fichier des centroïdes
+GAZETTEER_PATH = os.getenv('LFB_GAZETTEER_PATH', './data/3_external/london_gazetteer.csv')
+
+# Code postal britannique : district (outward code) puis secteur et unité (inward code)
+POSTCODE_PATTERN = re.compile(r"\b([A-Z]{1,2}[0-9][A-Z0-9]?)\s*([0-9][A-Z]{2})?\b")
+
+# Mots sans valeur discriminante en fin d'adresse
+STOP_WORDS = {"london", "greater", "uk", "united", "kingdom", "england"}
+
+# Seuil de similarité de la recherche approchée
+FUZZY_CUTOFF = 0.85
+
+
+def _fuzzy_lengths(length, cutoff=FUZZY_CUTOFF):
+    """
+    Longueurs des noms pouvant atteindre le seuil de similarité de difflib avec un nom de
+    longueur `length` (ratio au plus 2 * min(a, b) / (a + b)).
+    """
+    return range(math.ceil(cutoff * length / (2 - cutoff)), math.floor(length * (2 - cutoff) / cutoff) + 1)
+
+
+def normalize_postcode(postcode):
+    """Normalise un code postal : majuscules, sans espaces."""
+    return re.sub(r"\s+", "", postcode.upper())
+
+
+class _Trie:
+    """Arbre préfixe sur les caractères des noms de rues normalisés."""
+
+    _END = ''
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key, value):
+        """Ajoute value aux valeurs de key (une clé peut porter plusieurs valeurs)."""
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(self._END, []).append(value)
+
+    def longest_prefix(self, text):
+        """
+        Retourne les valeurs associées à la plus longue clé préfixe de text, terminée sur une
+        frontière de mot (fin de texte ou espace), ou None.
+        """
+        node = self.root
+        found = None
+        for i, char in enumerate(text):
+            node = node.get(char)
+            if node is None:
+                break
+            if self._END in node and (i + 1 == len(text) or text[i + 1] == ' '):
+                found = node[self._END]
+        return found
+
+
+class GazetteerGeocoder:
+    """
+    Géocodeur local construit sur un fichier de centroïdes de codes postaux et de rues.
+
+    Ordre de résolution : code postal complet, nom de rue (préfixe le plus long), district postal,
+    nom de rue approché. Une adresse non résolue, ou dont la rue porte un nom présent dans
+    plusieurs districts sans que l'adresse ne précise lequel, retourne None.
+    """
+
+    def __init__(self, path=GAZETTEER_PATH):
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.districts = []
+        self.boroughs = []
+        self.postcodes = {}
+        self.streets = _Trie()
+        self.street_names = {}
+        self.counters = {"postcode": 0, "street": 0, "district": 0, "fuzzy": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                position = len(self.latitudes)
+                self.latitudes.append(float(row['latitude']))
+                self.longitudes.append(float(row['longitude']))
+                self.districts.append(normalize_postcode(row.get('district') or ''))
+                self.boroughs.append(normalize_address(row.get('borough') or ''))
+                if row['kind'] == 'postcode':
+                    self.postcodes[normalize_postcode(row['name'])] = position
+                else:
+                    name = normalize_address(row['name'])
+                    self.streets.insert(name, position)
+                    self.street_names.setdefault((name[:1], len(name)), {}).setdefault(name, []).append(position)
+
+        logger.info(f"Gazetteer chargé : {len(self.postcodes)} codes postaux, "
+                    f"{sum(len(names) for names in self.street_names.values())} noms de rues")
+
+    @classmethod
+    def from_default(cls):
+        """Charge le gazetteer par défaut s'il est disponible, None sinon."""
+        if not os.path.exists(GAZETTEER_PATH):
+            logger.warning(f"Gazetteer introuvable : {GAZETTEER_PATH}")
+            return None
+        return cls(GAZETTEER_PATH)
+
+    def _coordinates(self, position):
+        return self.latitudes[position], self.longitudes[position]
+
+    def _count(self, method):
+        with self._lock:
+            self.counters[method] += 1
+
+    def _disambiguate(self, positions, districts, address):
+        """
+        Choisit une rue parmi ses homonymes à partir des districts postaux puis des boroughs cités
+        dans l'adresse normalisée. Retourne None si l'ambiguïté demeure.
+        """
+        if len(positions) > 1 and districts:
+            positions = [position for position in positions if self.districts[position] in districts] or positions
+        if len(positions) > 1:
+            padded = f" {address} "
+            positions = [position for position in positions
+                         if self.boroughs[position] and f" {self.boroughs[position]} " in padded] or positions
+        return positions[0] if len(positions) == 1 else None
+
+    def _street_candidates(self, address):
+        """Segments de l'adresse normalisés, sans numéros de voie ni mots vides finaux."""
+        for segment in address.split(','):
+            words = normalize_address(segment).split()
+            while words and any(char.isdigit() for char in words[0]):
+                words.pop(0)
+            while words and words[-1] in STOP_WORDS:
+                words.pop()
+            if words:
+                yield " ".join(words)
+
+    def geocode(self, address):
+        """
+        Géocode une adresse à partir du gazetteer.
+
+        Returns:
+            tuple | None: (latitude, longitude), ou None si l'adresse n'est pas résolue
+        """
+        # Code postal complet
+        districts = []
+        for outward, inward in POSTCODE_PATTERN.findall(address.upper()):
+            if inward:
+                position = self.postcodes.get(outward + inward)
+                if position is not None:
+                    self._count("postcode")
+                    return self._coordinates(position)
+            districts.append(outward)
+
+        # Nom de rue (préfixe le plus long), homonymes départagés par le district ou le borough
+        normalized = normalize_address(address)
+        candidates = list(self._street_candidates(address))
+        for candidate in candidates:
+            positions = self.streets.longest_prefix(candidate)
+            position = self._disambiguate(positions, districts, normalized) if positions else None
+            if position is not None:
+                self._count("street")
+                return self._coordinates(position)
+
+        # District postal
+        for outward in districts:
+            position = self.postcodes.get(outward)
+            if position is not None:
+                self._count("district")
+                return self._coordinates(position)
+
+        # Nom de rue approché (noms de même initiale et de longueur compatible)
+        for candidate in candidates:
+            names = {}
+            for length in _fuzzy_lengths(len(candidate)):
+                names.update(self.street_names.get((candidate[:1], length), {}))
+            matches = difflib.get_close_matches(candidate, names.keys(), n=1, cutoff=FUZZY_CUTOFF)
+            position = self._disambiguate(names[matches[0]], districts, normalized) if matches else None
+            if position is not None:
+                self._count("fuzzy")
+                return self._coordinates(position)
+
+        self._count("misses")
+        return None
+
+    def stats(self):
+        """Retourne le nombre d'adresses résolues par méthode."""
+        with self._lock:
+            return dict(self.counters)
@@ -0,0 +1,95 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+
+""""
+---------------------------------------------------------------------------------------------------
+
+    Calculs géographiques vectorisés, partagés par l'entraînement (preprocess.py) et la
+    prédiction (API, prédiction en masse, index des stations) : les variables sont calculées de
+    la même façon des deux côtés, sur des tableaux NumPy complets et sans boucle Python.
+
+    Précision des calculs : float64 par défaut ; LFB_GEO_FLOAT32=1 passe les conversions et les
+    distances en float32 (deux fois moins de mémoire, précision d'environ un mètre à Londres).
+    Le réglage doit être le même pour l'entraînement et pour la prédiction.
+
+---------------------------------------------------------------------------------------------------
+"""
+
+# Type des coordonnées et des distances calculées
+GEO_DTYPE = np.float32 if os.getenv('LFB_GEO_FLOAT32', '0') == '1' else np.float64
+
+# Rayon de la Terre (mètres)
+EARTH_RADIUS = 6378137.0
+
+
+""""
+---------------------------------------------------------------------------------------------------
+
+    FONCTION : haversine(lat1, lon1, lat2, lon2, dtype=GEO_DTYPE)
+
+    Fonction qui implémente la formule d'Haversine pour calculer la distance entre deux points,
+    sur la Terre, le long du grand cercle, à partir de leurs latitudes et leurs longitudes.
+    Le résultat est une distance exprimée en mètres.
+
+    Accepte des scalaires ou des tableaux (avec diffusion NumPy) : un appel traite une colonne
+    entière. Les calculs sont faits dans le type `dtype`.
+
+    Exemple :
+
+        distances = haversine(df['IncidentLatitude'].to_numpy(), df['IncidentLongitude'].to_numpy(),
+                              df['StationLatitude'].to_numpy(), df['StationLongitude'].to_numpy())
+
+---------------------------------------------------------------------------------------------------
+"""
+
+def haversine(lat1, lon1, lat2, lon2, dtype=GEO_DTYPE):
+
+    # Conversion des degrés en radians (dans le type de calcul)
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=dtype)) for value in (lat1, lon1, lat2, lon2))
+
+    # Différences des latitudes et des longitudes
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    # Formule d'Haversine
+    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    # Distance en mètres
+    return dtype(EARTH_RADIUS) * c
+
+
+""""
+---------------------------------------------------------------------------------------------------
+
+    FONCTION : bng_to_wgs84(easting, northing, dtype=GEO_DTYPE)
+
+    Fonction qui convertit des coordonnées British National Grid (EPSG:27700) en latitude et
+    longitude WGS84 (EPSG:4326). Le transformateur pyproj est créé une seule fois par processus
+    et convertit une colonne entière en un seul appel. Accepte des scalaires ou des tableaux.
+
+    Exemple :
+
+        latitudes, longitudes = bng_to_wgs84(df['Easting_rounded'].to_numpy(),
+                                             df['Northing_rounded'].to_numpy())
+
+---------------------------------------------------------------------------------------------------
+"""
+
+@lru_cache(maxsize=1)
+def _bng_transformer():
+    from pyproj import Transformer
+
+    return Transformer.from_crs("epsg:27700", "epsg:4326")
+
+
+def bng_to_wgs84(easting, northing, dtype=GEO_DTYPE):
+
+    # Conversion (Easting, Northing) > (Latitude, Longitude), calculée en float64 par pyproj
+    latitude, longitude = _bng_transformer().transform(easting, northing)
+
+    if np.ndim(latitude) == 0:
+        return float(dtype(latitude)), float(dtype(longitude))
+    return np.asarray(latitude, dtype=dtype), np.asarray(longitude, dtype=dtype)
@@ -1,39 +1,20 @@
-import numpy as np
-from geopy.geocoders import Nominatim
+from src.utils.geo_arrays import haversine, bng_to_wgs84
+from src.utils.geocoding import get_geocoder
+from src.utils.metrics import STAGE_SECONDS
+
+# Fonctions réexportées depuis src/utils/geo_arrays.py
+__all__ = ['haversine', 'bng_to_wgs84', 'address_to_lat_long']
 
 """"
 ---------------------------------------------------------------------------------------------------
-    
-    FONCTION : haversine(lat1, lon1, lat2, lon2)
-    
-    Fonction qui implémente la formule d'Haversine pour calculer la distance entre deux points,
-    sur la Terre, le long du grand cercle, à partir de leurs latitudes et leurs longitudes.
-    Le résultat est une distance exprimée en mètres
 
----------------------------------------------------------------------------------------------------
-"""
+    FONCTIONS : haversine(lat1, lon1, lat2, lon2), bng_to_wgs84(easting, northing)
 
-def haversine(lat1, lon1, lat2, lon2):
-
-    # Radius of Earth in meters
-    R = 6378137.0
-    
-    # Convert degrees to radians
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-    
-    # Differences in latitudes and longitudes
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    
-    # Haversine formula
-    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-    
-    # Distance in meters
-    distance = R * c
-    
-    return distance
+    Calculs géographiques vectorisés, définis dans src/utils/geo_arrays.py (module partagé par
+    l'entraînement et la prédiction) et réexportés ici.
 
+---------------------------------------------------------------------------------------------------
+"""
 
 """"
 ---------------------------------------------------------------------------------------------------
@@ -42,6 +23,10 @@ def haversine(lat1, lon1, lat2, lon2):
     
     Fonction qui donne la latitude et la longitude à partir d'une addresse postale.
 
+    Le géocodage passe par le géocodeur par défaut du processus (src/utils/geocoding.py) :
+    les adresses déjà résolues sont servies par le cache mémoire ou par le cache SQLite.
+    Une adresse introuvable lève une ValueError.
+
     Exemple : 
     
         latitude, longitude = address_to_lat_long("Big Ben, London")
@@ -52,12 +37,14 @@ def haversine(lat1, lon1, lat2, lon2):
 ---------------------------------------------------------------------------------------------------
 """
 
+
 def address_to_lat_long(address):
 
-    # Initialiser le géocodeur
-    geolocator = Nominatim(user_agent="ML_Ops_LondonFireBrigade")
+    # Géocodage (avec cache)
+    with STAGE_SECONDS.time('geocoding'):
+        location = get_geocoder().geocode(address)
 
-    # Géocodage
-    location = geolocator.geocode(address)
+    if location is None:
+        raise ValueError(f"Adresse introuvable : {address}")
 
-    return location.latitude, location.longitude
\ No newline at end of file
+    return location
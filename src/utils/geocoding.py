@@ -0,0 +1,336 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : geocoding.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : géocodage des adresses avec cache à deux niveaux
+
+Tâches réalisées par ce script :
+ - Normalisation des adresses (clé de cache)
+ - Géocodeurs interchangeables (Nominatim, table statique pour les tests)
+ - Cache mémoire LRU avec durée de vie (TTL)
+ - Cache persistant SQLite partagé entre les processus (workers uvicorn)
+ - Mise en cache des résultats négatifs (adresse introuvable)
+ - Compteurs de succès / échecs du cache
+ - Chaîne de géocodeurs derrière le cache : gazetteer local d'abord, géocodeur distant en cas
+   d'échec ; une adresse déjà résolue ne consulte ni l'un ni l'autre
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Paramètres
+---------------------------------------------------------------------------------------------------
+"""
+
+# Fichier du cache persistant
+CACHE_PATH = os.getenv('LFB_GEOCODING_CACHE_PATH', './data/geocoding_cache.sqlite')
+
+# Taille maximale du cache mémoire (nombre d'adresses)
+CACHE_SIZE = int(os.getenv('LFB_GEOCODING_CACHE_SIZE', '10000'))
+
+# Durées de vie (en secondes) des résultats positifs et négatifs
+CACHE_TTL = float(os.getenv('LFB_GEOCODING_CACHE_TTL', str(30 * 24 * 3600)))
+NEGATIVE_TTL = float(os.getenv('LFB_GEOCODING_NEGATIVE_TTL', str(24 * 3600)))
+
+# Géocodeur utilisé par défaut ('nominatim' ou 'static')
+GEOCODER = os.getenv('LFB_GEOCODER', 'nominatim')
+
+# Table {adresse: [latitude, longitude]} du géocodeur 'static' (fichier JSON, facultatif)
+STATIC_GEOCODER_PATH = os.getenv('LFB_STATIC_GEOCODER_PATH')
+
+
+""""
+---------------------------------------------------------------------------------------------------
+
+    FONCTION : normalize_address(address)
+
+    Normalise une adresse pour en faire une clé de cache : forme Unicode NFKC, minuscules,
+    ponctuation remplacée par des espaces, espaces multiples réduits.
+
+    Exemple :
+
+        normalize_address("  Big Ben,   LONDON ")
+
+        'big ben london'
+
+---------------------------------------------------------------------------------------------------
+"""
+
+def normalize_address(address):
+    address = unicodedata.normalize('NFKC', address).lower()
+    address = re.sub(r"[^\w]+", " ", address)
+    return " ".join(address.split())
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Géocodeurs
+---------------------------------------------------------------------------------------------------
+"""
+
+class NominatimGeocoder:
+    """Géocodeur distant (OpenStreetMap Nominatim), client créé une seule fois."""
+
+    def __init__(self, user_agent="ML_Ops_LondonFireBrigade", timeout=5):
+        from geopy.geocoders import Nominatim
+
+        self.geolocator = Nominatim(user_agent=user_agent, timeout=timeout)
+
+    def geocode(self, address):
+        """
+        Géocode une adresse.
+
+        Returns:
+            tuple | None: (latitude, longitude), ou None si l'adresse est introuvable
+        """
+        location = self.geolocator.geocode(address)
+        if location is None:
+            return None
+        return location.latitude, location.longitude
+
+
+class StaticGeocoder:
+    """Géocodeur local à partir d'une table {adresse: (latitude, longitude)}, pour les tests."""
+
+    def __init__(self, locations=None, default=None):
+        self.locations = {normalize_address(address): tuple(coords)
+                          for address, coords in (locations or {}).items()}
+        self.default = default
+        self.calls = 0
+
+    @classmethod
+    def from_file(cls, path):
+        """Charge la table depuis un fichier JSON {adresse: [latitude, longitude]}."""
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def geocode(self, address):
+        self.calls += 1
+        return self.locations.get(normalize_address(address), self.default)
+
+    def stats(self):
+        return {"calls": self.calls}
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Cache à deux niveaux
+---------------------------------------------------------------------------------------------------
+"""
+
+class GeocodingCache:
+    """
+    Cache de géocodage : LRU mémoire avec TTL, adossé à une base SQLite persistante.
+
+    Une entrée vaut (latitude, longitude) ou None (résultat négatif). La base SQLite est ouverte
+    en mode WAL, ce qui permet à plusieurs processus de la lire et de l'alimenter simultanément.
+    """
+
+    def __init__(self,
+                 path=CACHE_PATH,
+                 maxsize=CACHE_SIZE,
+                 ttl=CACHE_TTL,
+                 negative_ttl=NEGATIVE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "negative_hits": 0}
+
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocoding ("
+                " key TEXT PRIMARY KEY,"
+                " latitude REAL,"
+                " longitude REAL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _count(self, counter, value):
+        self.counters[counter] += 1
+        if value is None:
+            self.counters["negative_hits"] += 1
+
+    def get(self, key):
+        """
+        Recherche une adresse normalisée dans le cache.
+
+        Returns:
+            tuple: (trouvé, valeur) ; valeur vaut None pour un résultat négatif
+        """
+        now = time.time()
+
+        with self._lock:
+            # Cache mémoire
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._count("memory_hits", value)
+                    return True, value
+                del self._memory[key]
+
+            # Cache persistant
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT latitude, longitude, expires_at FROM geocoding WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[2] > now:
+                    value = None if row[0] is None else (row[0], row[1])
+                    self._remember(key, value, row[2])
+                    self._count("disk_hits", value)
+                    return True, value
+
+            self.counters["misses"] += 1
+            return False, None
+
+    def _remember(self, key, value, expires_at):
+        """Ajoute une entrée au cache mémoire en évinçant la plus ancienne si nécessaire."""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def put(self, key, value):
+        """Enregistre un résultat (positif ou négatif) dans les deux niveaux du cache."""
+        expires_at = time.time() + (self.ttl if value is not None else self.negative_ttl)
+        latitude, longitude = value if value is not None else (None, None)
+
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO geocoding (key, latitude, longitude, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, latitude, longitude, expires_at)
+                )
+                self._db.commit()
+
+    def stats(self):
+        """Retourne les compteurs du cache et son taux de succès."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_size"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = hits / total if total else 0.0
+        return stats
+
+
+class CachedGeocoder:
+    """Géocodeur qui interroge le cache avant le géocodeur sous-jacent."""
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+
+    def geocode(self, address):
+        key = normalize_address(address)
+
+        found, value = self.cache.get(key)
+        if found:
+            return value
+
+        # Les exceptions du géocodeur (réseau, quota...) ne sont pas mises en cache
+        value = self.backend.geocode(address)
+        self.cache.put(key, value)
+        return value
+
+    def stats(self):
+        """Compteurs du cache ('geocoding'), puis ceux des géocodeurs sous-jacents."""
+        stats = {"geocoding": self.cache.stats()}
+        if isinstance(self.backend, FallbackGeocoder):
+            stats.update(self.backend.stats())
+        return stats
+
+
+class FallbackGeocoder:
+    """Interroge des géocodeurs successifs et retourne le premier résultat obtenu."""
+
+    def __init__(self, geocoders):
+        self.geocoders = [(name, geocoder) for name, geocoder in geocoders if geocoder is not None]
+
+    def geocode(self, address):
+        for _, geocoder in self.geocoders:
+            location = geocoder.geocode(address)
+            if location is not None:
+                return location
+        return None
+
+    def stats(self):
+        return {name: geocoder.stats() for name, geocoder in self.geocoders if hasattr(geocoder, 'stats')}
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Géocodeur par défaut du processus
+---------------------------------------------------------------------------------------------------
+"""
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def create_geocoder(name=GEOCODER):
+    """
+    Crée le géocodeur par défaut : le cache à deux niveaux, devant le gazetteer local (s'il est
+    disponible) puis le géocodeur demandé.
+
+    Args:
+        name (str): 'nominatim' (par défaut) ou 'static' (aucun accès réseau)
+    """
+    from src.utils.gazetteer import GazetteerGeocoder
+
+    if name == 'static':
+        backend = StaticGeocoder.from_file(STATIC_GEOCODER_PATH) if STATIC_GEOCODER_PATH else StaticGeocoder()
+    else:
+        backend = NominatimGeocoder()
+
+    chain = FallbackGeocoder([
+        ("gazetteer", GazetteerGeocoder.from_default()),
+        (name, backend)
+    ])
+    return CachedGeocoder(chain, GeocodingCache())
+
+
+def get_geocoder():
+    """Retourne le géocodeur par défaut du processus (créé au premier appel)."""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = create_geocoder()
+    return _geocoder
+
+
+def set_geocoder(geocoder):
+    """Remplace le géocodeur par défaut (par exemple par un StaticGeocoder dans les tests)."""
+    global _geocoder
+    _geocoder = geocoder
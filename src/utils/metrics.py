@@ -0,0 +1,223 @@
+"""
+---------------------------------------------------------------------------------------------------
+Nom du script : metrics.py
+
+Dernière mise à jour : samedi 17 octobre 2026
+
+Fonction de ce script : métriques de l'API au format texte Prometheus
+
+Tâches réalisées par ce script :
+ - Compteurs et histogrammes étiquetés, sans dépendance externe
+ - Chronométrage des étapes de la prédiction (géocodage, recherche de station, encodage, inférence)
+ - Collecteurs appelés au rendu (compteurs des caches, lus dans leurs statistiques)
+ - Rendu au format d'exposition texte de Prometheus (route /metrics)
+
+Le coût d'une mesure est celui d'un appel à time.perf_counter, d'une recherche dichotomique
+dans les bornes de l'histogramme et d'une mise à jour sous verrou.
+---------------------------------------------------------------------------------------------------
+"""
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Import des bibliothèques
+---------------------------------------------------------------------------------------------------
+"""
+
+import time
+import threading
+from bisect import bisect_left
+
+# Bornes par défaut des histogrammes de durée (secondes)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames, labels):
+    """Formate les étiquettes d'un échantillon ({nom="valeur",...})."""
+    if not labelnames:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labelnames, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Compteurs et histogrammes
+---------------------------------------------------------------------------------------------------
+"""
+
+class Counter:
+    """
+    Compteur monotone, avec une valeur par combinaison d'étiquettes.
+
+    Args:
+        name (str): Nom de la métrique (suffixe _total conseillé)
+        documentation (str): Description (ligne HELP)
+        labelnames (tuple): Noms des étiquettes
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, value=1):
+        """Incrémente le compteur des étiquettes données (dans l'ordre de labelnames)."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+
+class _Timer:
+    """Gestionnaire de contexte qui mesure une durée dans un histogramme."""
+
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram:
+    """
+    Histogramme à bornes fixes (comptes par intervalle, somme et nombre d'observations).
+
+    Args:
+        name (str): Nom de la métrique
+        documentation (str): Description (ligne HELP)
+        labelnames (tuple): Noms des étiquettes
+        buckets (tuple): Bornes supérieures croissantes des intervalles
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Enregistre une observation pour les étiquettes données."""
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][position] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, *labels):
+        """Retourne un gestionnaire de contexte qui mesure la durée du bloc."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            values = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._values.items()]
+
+        samples = []
+        bucket_labelnames = self.labelnames + ('le',)
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", labels + (_format_value(bound),), cumulative, bucket_labelnames))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+""""
+---------------------------------------------------------------------------------------------------
+                            Registre et rendu
+---------------------------------------------------------------------------------------------------
+"""
+
+class MetricsRegistry:
+    """
+    Ensemble des métriques d'un processus.
+
+    Les collecteurs sont des fonctions appelées à chaque rendu ; elles retournent des tuples
+    (nom, type, description, [(étiquettes (dict), valeur)]). Ils servent à exposer des compteurs
+    tenus ailleurs (statistiques des caches) sans les dupliquer.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """Retourne toutes les métriques au format d'exposition texte de Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample in metric.samples():
+                name, labels, value = sample[:3]
+                labelnames = sample[3] if len(sample) > 3 else metric.labelnames
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} "
+                                 f"{_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Registre du processus et métriques du chemin de prédiction
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    'lfb_prediction_stage_seconds',
+    "Durée des étapes de la prédiction (geocoding, station_search, encoding, inference)",
+    ('stage',))
+
+REQUESTS = metrics.counter(
+    'lfb_requests_total',
+    "Requêtes de l'API par route et par issue (success, client_error, error)",
+    ('route', 'outcome'))
+
+REQUEST_SECONDS = metrics.histogram(
+    'lfb_request_seconds',
+    "Durée de traitement des requêtes de l'API par route",
+    ('route',))
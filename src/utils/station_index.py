@@ -0,0 +1,87 @@
+import numpy as np
+
+from src.utils.geo_arrays import haversine
+
+""""
+---------------------------------------------------------------------------------------------------
+
+    CLASSE : StationIndex(latitudes, longitudes)
+
+    Index spatial (BallTree, métrique haversine) construit une seule fois sur les coordonnées des
+    stations. Il répond aux requêtes « station la plus proche » et « k stations les plus proches »
+    pour un point ou pour un tableau de points, sans boucle Python.
+
+    Les distances retournées sont recalculées avec la fonction haversine du projet, afin d'être
+    identiques à celles utilisées lors de l'entraînement (en mètres).
+
+    Exemple :
+
+        index = StationIndex.from_stations(df_stations)
+        indices, distances = index.query([51.5007042], [-0.1245721], k=3)
+
+---------------------------------------------------------------------------------------------------
+"""
+
+class StationIndex:
+    """Index spatial des stations pour la recherche des plus proches voisins."""
+
+    def __init__(self, latitudes, longitudes, leaf_size=16):
+        # Import différé : scikit-learn (et scipy) n'est chargé qu'à la construction de l'index,
+        # et non à l'import de l'API
+        from sklearn.neighbors import BallTree
+
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.tree = BallTree(np.radians(np.column_stack([self.latitudes, self.longitudes])),
+                             leaf_size=leaf_size,
+                             metric='haversine')
+
+    @classmethod
+    def from_stations(cls, df_stations):
+        """Construit l'index à partir de la table des stations (StationLatitude, StationLongitude)."""
+        return cls(df_stations['StationLatitude'].to_numpy(),
+                   df_stations['StationLongitude'].to_numpy())
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    def query(self, latitudes, longitudes, k=1):
+        """
+        Recherche les k stations les plus proches de chaque point.
+
+        Args:
+            latitudes (array-like): Latitudes des points (degrés)
+            longitudes (array-like): Longitudes des points (degrés)
+            k (int): Nombre de stations à retourner par point
+
+        Returns:
+            tuple: (indices, distances), tableaux de forme (n_points, k) triés par distance croissante.
+            Les indices sont des positions dans la table des stations, les distances sont en mètres.
+        """
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        k = min(k, len(self))
+
+        indices = self.tree.query(np.radians(np.column_stack([latitudes, longitudes])),
+                                  k=k,
+                                  return_distance=False)
+
+        distances = haversine(self.latitudes[indices], self.longitudes[indices],
+                              latitudes[:, None], longitudes[:, None])
+
+        # Tri par distance croissante (distances du projet, et non celles de l'arbre)
+        order = np.argsort(distances, axis=1, kind='stable')
+        indices = np.take_along_axis(indices, order, axis=1)
+        distances = np.take_along_axis(distances, order, axis=1)
+
+        return indices, distances
+
+    def nearest(self, latitude, longitude):
+        """
+        Recherche la station la plus proche d'un point.
+
+        Returns:
+            tuple: (position de la station, distance en mètres)
+        """
+        indices, distances = self.query(latitude, longitude, k=1)
+        return int(indices[0, 0]), float(distances[0, 0])
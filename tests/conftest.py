@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parents[1]
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+# Racine du dépôt dans le chemin d'import (paquet src), que pytest soit lancé par `pytest` ou `python -m pytest`
+sys.path.insert(0, str(REPO))
+
+
+@pytest.fixture(scope='session')
+def artifacts():
+    """Artefacts du dépôt (modèle et encodeurs de models/), avec la liste de stations de test."""
+    pytest.importorskip("xgboost")
+    pytest.importorskip("pandas")
+    from src.ml.artifacts import ArtifactRegistry
+
+    return ArtifactRegistry(model_path=str(REPO / 'models' / 'model-XGB.json'),
+                            encoders_path=str(REPO / 'models' / 'encoders.json'),
+                            stations_path=str(FIXTURES / 'stations.csv'),
+                            manifest_path=str(FIXTURES / 'no_deploy.json'),
+                            backend='xgboost').load()
@@ -0,0 +1,112 @@
+import json
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from src.ml.artifacts import ArtifactRegistry, write_deploy_manifest  # noqa: E402
+
+REPO = Path(__file__).resolve().parents[1]
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+class CountingRegistry(ArtifactRegistry):
+    builds = 0
+
+    def _build(self, hashes):
+        self.builds += 1
+        return super()._build(hashes)
+
+
+@pytest.fixture
+def deployment(tmp_path):
+    paths = {
+        "model_path": tmp_path / 'model-XGB.json',
+        "encoders_path": tmp_path / 'encoders.json',
+        "stations_path": tmp_path / 'stations.csv'
+    }
+    shutil.copy(REPO / 'models' / 'model-XGB.json', paths["model_path"])
+    shutil.copy(REPO / 'models' / 'encoders.json', paths["encoders_path"])
+    shutil.copy(FIXTURES / 'stations.csv', paths["stations_path"])
+    paths = {key: str(value) for key, value in paths.items()}
+    return dict(paths, manifest_path=str(tmp_path / 'deploy.json'))
+
+
+def registry_for(deployment):
+    return CountingRegistry(poll_interval=0, backend='numpy', **deployment)
+
+
+def manifest_for(deployment):
+    return write_deploy_manifest(deployment["model_path"], deployment["encoders_path"],
+                                 deployment["stations_path"], deployment["manifest_path"])
+
+
+def test_concurrent_first_calls_load_once(deployment):
+    registry = registry_for(deployment)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def first_call():
+        barrier.wait()
+        results.append(registry.get())
+
+    threads = [threading.Thread(target=first_call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.builds == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_file_change_without_manifest_is_not_reloaded(deployment):
+    manifest_for(deployment)
+    registry = registry_for(deployment)
+    version = registry.get().version
+
+    with open(deployment["encoders_path"], 'r') as f:
+        encoders = json.load(f)
+    encoders["PropertyCategory"].insert(0, "Office")
+    with open(deployment["encoders_path"], 'w') as f:
+        json.dump(encoders, f)
+
+    assert registry.refresh() is False
+    assert registry.get().version == version
+
+
+def test_new_manifest_reloads_model_and_encoders_together(deployment):
+    manifest_for(deployment)
+    registry = registry_for(deployment)
+    version = registry.get().version
+
+    with open(deployment["encoders_path"], 'r') as f:
+        encoders = json.load(f)
+    encoders["PropertyCategory"].append("Office")
+    with open(deployment["encoders_path"], 'w') as f:
+        json.dump(encoders, f)
+    manifest_for(deployment)
+
+    assert registry.refresh() is True
+    assert registry.get().version != version
+    assert "Office" in registry.get().encoders["PropertyCategory"]
+
+
+def test_files_not_matching_manifest_are_refused(deployment):
+    manifest_for(deployment)
+    registry = registry_for(deployment)
+    artifacts = registry.get()
+
+    # Manifeste publié avant la copie des encodeurs : rechargement refusé, instantané conservé
+    with open(deployment["manifest_path"], 'r') as f:
+        manifest = json.load(f)
+    manifest["encoders"] = "0" * 64
+    with open(deployment["manifest_path"], 'w') as f:
+        json.dump(manifest, f)
+
+    with pytest.raises(ValueError):
+        registry.refresh()
+    assert registry.get() is artifacts
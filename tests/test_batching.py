@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from src.api.batching import MicroBatcher
+
+
+def make_predict(seconds=0.0, sizes=None):
+    def predict(latitudes, longitudes, HourOfCall, IncidentGroup, PropertyCategory):
+        if sizes is not None:
+            sizes.append(len(latitudes))
+        time.sleep(seconds)
+        return [{"latitude": latitude, "prediction": float(hour)} for latitude, hour in zip(latitudes, HourOfCall)]
+    return predict
+
+
+def test_idle_request_is_not_delayed_by_the_window():
+    async def run():
+        batcher = MicroBatcher(make_predict(), window_ms=200)
+        await batcher.start()
+        start = time.perf_counter()
+        result = await batcher.submit(51.5, -0.1, 10, "Fire", "Dwelling")
+        elapsed = time.perf_counter() - start
+        await batcher.stop()
+        return result, elapsed, batcher.stats()
+
+    result, elapsed, stats = asyncio.run(run())
+    assert result == {"latitude": 51.5, "prediction": 10.0}
+    assert elapsed < 0.1
+    assert stats["queue_delay_ms"]["max"] < 100
+
+
+def test_requests_arriving_during_a_batch_are_grouped():
+    sizes = []
+
+    async def run():
+        batcher = MicroBatcher(make_predict(0.05, sizes), window_ms=20)
+        await batcher.start()
+        first = asyncio.ensure_future(batcher.submit(51.5, -0.1, 0, "Fire", "Dwelling"))
+        await asyncio.sleep(0.01)
+        results = await asyncio.gather(*(batcher.submit(51.5, -0.1, hour, "Fire", "Dwelling")
+                                         for hour in range(1, 9)))
+        await first
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert [result["prediction"] for result in results] == [float(hour) for hour in range(1, 9)]
+    assert sizes == [1, 8]
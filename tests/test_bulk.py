@@ -0,0 +1,30 @@
+import io
+import json
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from src.ml.bulk import score_file  # noqa: E402
+
+CSV = """IncidentNumber,HourOfCall,IncidentGroup,PropertyCategory,Latitude,Longitude
+001,10,Fire,Dwelling,51.5,-0.1
+,23,Fire,Dwelling,51.5,-0.1
+003,24,Fire,Dwelling,51.5,-0.1
+004,-1,Fire,Dwelling,51.5,-0.1
+005,,Fire,Dwelling,51.5,-0.1
+006,10.5,Fire,Dwelling,51.5,-0.1
+007,0,Fire,Dwelling,,
+"""
+
+
+def test_rows_are_validated(artifacts):
+    lines = "".join(score_file(artifacts, io.StringIO(CSV), 'csv')).splitlines()
+    results = [json.loads(line) for line in lines]
+
+    assert [result["row"] for result in results] == list(range(7))
+    assert results[0]["IncidentNumber"] == "001" and results[0]["prediction"] > 0
+    assert results[1]["IncidentNumber"] is None and results[1]["prediction"] > 0
+    for result in results[2:6]:
+        assert "prediction" not in result and "Heure" in result["error"]
+    assert results[6]["error"] == "Coordonnées manquantes"
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+pytest.importorskip("pandas")
+
+from src.benchmarks.parity import synthetic_incidents  # noqa: E402
+from src.ml.features import build_feature_frame  # noqa: E402
+from src.ml.predict import predict_coordinates_batch  # noqa: E402
+
+
+@pytest.mark.parametrize('n_rows', [1, 2000])
+def test_feature_builder_matches_reference_frame(artifacts, n_rows):
+    incidents = synthetic_incidents(artifacts, n_rows)
+    frame = build_feature_frame(artifacts.encoders, artifacts.stations, **incidents)
+    X = artifacts.features.build(**incidents)
+    assert X.dtype == np.float32
+    assert np.array_equal(frame.to_numpy(dtype=np.float32), X)
+
+
+@pytest.mark.parametrize('n_rows', [1, 2000])
+def test_predict_matches_reference_path(artifacts, n_rows):
+    incidents = synthetic_incidents(artifacts, n_rows)
+    frame = build_feature_frame(artifacts.encoders, artifacts.stations, **incidents)
+    reference = artifacts.model.booster.predict(xgb.DMatrix(frame))
+
+    results = predict_coordinates_batch(incidents["latitudes"], incidents["longitudes"], incidents["HourOfCall"],
+                                        incidents["IncidentGroup"], incidents["PropertyCategory"],
+                                        artifacts=artifacts, use_cache=False)
+    predictions = np.array([result["prediction"] for result in results], dtype=np.float32)
+    assert np.array_equal(reference, predictions)
+
+
+def test_cached_results_are_not_shared_with_callers(artifacts):
+    from src.ml.result_cache import PredictionCache
+    import src.ml.predict as predict
+
+    cache, predict.prediction_cache = predict.prediction_cache, PredictionCache()
+    try:
+        first = predict_coordinates_batch([51.5], [-0.1], 10, "Fire", "Dwelling", artifacts=artifacts)[0]
+        first["station"] = "modifié"
+        first["extra"] = True
+        second = predict_coordinates_batch([51.5], [-0.1], 10, "Fire", "Dwelling", artifacts=artifacts)[0]
+    finally:
+        predict.prediction_cache = cache
+    assert second["station"] != "modifié" and "extra" not in second
@@ -0,0 +1,94 @@
+import csv
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.utils.gazetteer import GazetteerGeocoder
+from src.utils.geocoding import CachedGeocoder, FallbackGeocoder, GeocodingCache, StaticGeocoder
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+@pytest.fixture
+def gazetteer():
+    return GazetteerGeocoder(FIXTURES / 'london_gazetteer.csv')
+
+
+def test_full_postcode(gazetteer):
+    assert gazetteer.geocode("10 Downing St, London SW1A 2AA") == (51.5033960, -0.1276400)
+    assert gazetteer.stats()["postcode"] == 1
+
+
+def test_unique_street(gazetteer):
+    assert gazetteer.geocode("10 Downing Street, London") == (51.5033, -0.1276)
+
+
+def test_homonymous_street_by_district(gazetteer):
+    assert gazetteer.geocode("12 High Street, London E1") == (51.51, -0.06)
+    assert gazetteer.geocode("12 High Street, Wimbledon, London SW19 9ZZ") == (51.423, -0.218)
+
+
+def test_homonymous_street_by_borough(gazetteer):
+    assert gazetteer.geocode("3 Church Road, Brent, London") == (51.53, -0.23)
+    assert gazetteer.geocode("3 Church Road, Merton") == (51.42, -0.21)
+
+
+def test_ambiguous_street_is_not_resolved(gazetteer):
+    assert gazetteer.geocode("12 High Street, London") is None
+    assert gazetteer.geocode("12 High Streett, London") is None
+    assert gazetteer.stats()["misses"] == 2
+
+
+def test_ambiguous_street_falls_back_to_district(gazetteer):
+    # Rue absente du district cité : centroïde du district
+    assert gazetteer.geocode("Church Road, London E1") == (51.517399, -0.05762)
+    assert gazetteer.stats()["district"] == 1
+
+
+def test_fuzzy_street(gazetteer):
+    assert gazetteer.geocode("10 Downing Stret, London") == (51.5033, -0.1276)
+    assert gazetteer.stats()["fuzzy"] == 1
+
+
+def test_cache_is_consulted_before_gazetteer(gazetteer):
+    static = StaticGeocoder({"Unknown Place": (51.0, 0.0)})
+    geocoder = CachedGeocoder(FallbackGeocoder([("gazetteer", gazetteer), ("static", static)]),
+                              GeocodingCache(path=None))
+
+    for _ in range(3):
+        assert geocoder.geocode("10 Downing Street, London") == (51.5033, -0.1276)
+        assert geocoder.geocode("Unknown Place") == (51.0, 0.0)
+
+    stats = geocoder.stats()
+    assert stats["gazetteer"]["street"] == 1 and stats["gazetteer"]["misses"] == 1
+    assert stats["static"]["calls"] == 1
+    assert stats["geocoding"]["memory_hits"] == 4
+
+
+def test_counters_are_thread_safe(gazetteer):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(gazetteer.geocode, ["Downing Street"] * 2000))
+    assert gazetteer.stats()["street"] == 2000
+
+
+def test_build_gazetteer(tmp_path):
+    pytest.importorskip("pyproj")
+    from src.data.gazetteer import build_gazetteer
+
+    output = tmp_path / 'london_gazetteer.csv'
+    counts = build_gazetteer([FIXTURES / 'os_open_names_sample.csv'], output)
+    assert counts == {"postcode": 3, "street": 3}
+
+    with open(output, newline='') as f:
+        rows = list(csv.DictReader(f))
+    streets = [(row['name'], row['district'], row['borough']) for row in rows if row['kind'] == 'street']
+    assert streets == [("Downing Street", "SW1A", "City of Westminster"),
+                       ("High Street", "E1", "Tower Hamlets"),
+                       ("High Street", "SW19", "Merton")]
+
+    # Le fichier produit est lu par le géocodeur, homonymes compris
+    gazetteer = GazetteerGeocoder(output)
+    latitude, longitude = gazetteer.geocode("High Street, London E1")
+    assert latitude == pytest.approx(51.515, abs=0.01) and longitude == pytest.approx(-0.06, abs=0.01)
+    assert gazetteer.geocode("High Street, London") is None
@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+pytest.importorskip("xgboost")
+
+from src.benchmarks.micro import main, meta_mismatches, run_meta  # noqa: E402
+
+
+def test_meta_mismatches():
+    baseline_meta = run_meta(1_000_000, 20_000)
+    assert meta_mismatches(run_meta(1_000_000, 20_000), baseline_meta) == []
+    assert meta_mismatches(run_meta(10_000, 20_000), baseline_meta) == [("rows", 1_000_000, 10_000)]
+    assert meta_mismatches(run_meta(1_000_000, 20_000), {**baseline_meta, "machine": "other"}) == \
+        [("machine", "other", baseline_meta["machine"])]
+
+
+def test_baseline_with_other_rows_is_not_compared(tmp_path):
+    baseline = tmp_path / 'baselines.json'
+    argv = ['--apply-rows', '100', '--repeat', '1', '--only', 'haversine_vectorized', '--baseline', str(baseline)]
+    assert main(['--rows', '2000', '--save'] + argv) == 0
+    assert json.loads(baseline.read_text())["meta"]["rows"] == 2000
+    assert main(['--rows', '1000'] + argv) == 2
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from src.ml.preprocess_incremental import (seed_encoders, preprocess_incremental, read_manifest,  # noqa: E402
+                                           load_modelisation, CATEGORICAL_COLUMNS)
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+@pytest.fixture
+def deployed(tmp_path):
+    path = tmp_path / 'encoders.json'
+    path.write_text(json.dumps({column: ["B", "A"] for column in CATEGORICAL_COLUMNS}))
+    return path
+
+
+def test_first_run_starts_from_deployed_codes(deployed):
+    empty = {column: [] for column in CATEGORICAL_COLUMNS}
+    assert seed_encoders(empty, deployed) == {column: ["B", "A"] for column in CATEGORICAL_COLUMNS}
+
+
+def test_manifest_codes_are_kept(deployed):
+    manifest = {column: ["B", "A", "C"] for column in CATEGORICAL_COLUMNS}
+    assert seed_encoders(manifest, deployed) == manifest
+
+
+def test_deployed_encoders_are_never_overwritten(tmp_path, deployed):
+    with pytest.raises(ValueError):
+        preprocess_incremental([], [], None, tmp_path / 'dataset', path_to_encoders=deployed,
+                               deployed_encoders_path=deployed)
+
+
+INCIDENT_HEADER = ("IncidentNumber,DateOfCall,CalYear,HourOfCall,IncidentGroup,IncidentStationGround,PropertyCategory,"
+                   "IncGeo_BoroughName,Easting_rounded,Northing_rounded,FirstPumpArriving_AttendanceTime\n")
+MOBILISATION_HEADER = "IncidentNumber,CalYear,DeployedFromStation_Name,AttendanceTimeSeconds\n"
+
+
+def write_sources(directory, months, mobilised_months):
+    """Un incident par jour (du 1er au 3) des mois `months` ; mobilisations des mois `mobilised_months`."""
+    incidents = directory / 'incidents.csv'
+    mobilisations = directory / 'mobilisations.csv'
+    with open(incidents, 'w') as f_incidents, open(mobilisations, 'w') as f_mobilisations:
+        f_incidents.write(INCIDENT_HEADER)
+        f_mobilisations.write(MOBILISATION_HEADER)
+        for month in months:
+            for day in (1, 2, 3):
+                number = f"{month}-{day}"
+                f_incidents.write(f"{number},0{day}/{month}/2023,2023,{day},Fire,Acton,Dwelling,Ealing,"
+                                  f"530000,180000,{300 + day}\n")
+                if month in mobilised_months:
+                    f_mobilisations.write(f"{number},2023,Acton,{300 + day}\n")
+    return [incidents], [mobilisations]
+
+
+def test_only_new_or_changed_months_are_processed(tmp_path, deployed):
+    def run(months, mobilised_months):
+        incident_paths, mobilisation_paths = write_sources(tmp_path, months, mobilised_months)
+        return preprocess_incremental(incident_paths, mobilisation_paths, FIXTURES / 'stations.csv',
+                                      tmp_path / 'dataset', cache_dir=tmp_path / 'cache',
+                                      deployed_encoders_path=deployed)
+
+    # Février publié sans ses mobilisations
+    assert run(["01", "02"], ["01"])["partitions"] == ["2023-01", "2023-02"]
+    assert run(["01", "02"], ["01"])["partitions"] == []
+
+    # Février complété et mars ajouté : janvier n'est pas retraité
+    summary = run(["01", "02", "03"], ["01", "02", "03"])
+    assert summary["partitions"] == ["2023-02", "2023-03"] and summary["rows"] == 6
+
+    manifest = read_manifest(tmp_path / 'dataset')
+    assert {partition: summary["rows"] for partition, summary in manifest["partitions"].items()} == \
+        {"2023-01": 3, "2023-02": 3, "2023-03": 3}
+    assert len(load_modelisation(tmp_path / 'dataset')) == 9
@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from src.ml.preprocess_stream import preprocess_stream, check_encoders_path  # noqa: E402
+
+
+def test_deployed_encoders_are_never_overwritten(tmp_path):
+    deployed = tmp_path / 'models' / 'encoders.json'
+    with pytest.raises(ValueError):
+        check_encoders_path(tmp_path / 'models' / '..' / 'models' / 'encoders.json', deployed)
+    with pytest.raises(ValueError):
+        preprocess_stream([], [], None, tmp_path / 'df_modelisation.csv', path_to_encoders=deployed,
+                          deployed_encoders_path=deployed)
+    check_encoders_path(tmp_path / 'encoders.json', deployed)
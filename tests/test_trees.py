@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from src.ml.trees import TreeEnsemble  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def model(tmp_path_factory):
+    """Petit modèle entraîné sur des données synthétiques avec valeurs manquantes, et son export JSON."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 5)).astype(np.float32)
+    y = 3 * X[:, 0] - 2 * X[:, 1] * X[:, 2] + rng.normal(scale=0.1, size=500)
+    X[rng.random(X.shape) < 0.2] = np.nan
+
+    booster = xgb.train({'objective': 'reg:squarederror', 'max_depth': 4, 'eta': 0.3},
+                        xgb.DMatrix(X, label=y), num_boost_round=20)
+    path = tmp_path_factory.mktemp('model') / 'model.json'
+    booster.save_model(str(path))
+    return booster, path
+
+
+def test_predictions_equal_inplace_predict(model):
+    booster, path = model
+    ensemble = TreeEnsemble.from_xgboost_json(path)
+    X = np.random.default_rng(1).normal(size=(3000, 5)).astype(np.float32)
+    assert np.array_equal(booster.inplace_predict(X), ensemble.predict(X))
+
+
+def test_missing_values_follow_default_direction(model):
+    booster, path = model
+    ensemble = TreeEnsemble.from_xgboost_json(path)
+    X = np.random.default_rng(2).normal(size=(3000, 5)).astype(np.float32)
+    X[::3, 0] = np.nan
+    X[::5, 2] = np.nan
+    X[7] = np.nan
+    assert np.array_equal(booster.inplace_predict(X), ensemble.predict(X))
+
+
+def test_saved_export_predicts_the_same(model, tmp_path):
+    booster, path = model
+    ensemble = TreeEnsemble.from_xgboost_json(path)
+    ensemble.save(tmp_path / 'model.npz')
+    X = np.random.default_rng(3).normal(size=(100, 5)).astype(np.float32)
+    X[::2, 1] = np.nan
+    assert np.array_equal(booster.inplace_predict(X), TreeEnsemble.load(tmp_path / 'model.npz').predict(X))